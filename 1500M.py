@@ -1,69 +1,24 @@
 from tkinter import *
-import random
-
-class GUIDie(Canvas):
-    '''6-sided Die class for GUI'''
-
-    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
-        '''GUIDie(master,[valueList,colorList]) -> GUIDie
-        creates a GUI 6-sided die
-          valueList is the list of values (1,2,3,4,5,6 by default)
-          colorList is the list of colors (all black by default)'''
-        # create a 60x60 white canvas with a 5-pixel grooved border
-        Canvas.__init__(self,master,width=60,height=60,bg='white',\
-                        bd=5,relief=GROOVE)
-        # store the valuelist and colorlist
-        self.valueList = valueList
-        self.colorList = colorList
-        # initialize the top value
-        self.top = 1
-
-    def get_top(self):
-        '''GUIDie.get_top() -> int
-        returns the value on the die'''
-        return self.valueList[self.top-1]
-
-    def roll(self):
-        '''GUIDie.roll()
-        rolls the die'''
-        self.top = random.randrange(1,7)
-        self.draw()
-
-    def draw(self):
-        '''GUIDie.draw()
-        draws the pips on the die'''
-        # clear old pips first
-        self.erase()
-        # location of which pips should be drawn
-        pipList = [[(1,1)],
-                   [(0,0),(2,2)],
-                   [(0,0),(1,1),(2,2)],
-                   [(0,0),(0,2),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,1),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,0),(1,2),(2,0),(2,2)]]
-        for location in pipList[self.top-1]:
-            self.draw_pip(location,self.colorList[self.top-1])
-
-    def draw_pip(self,location,color):
-        '''GUIDie.draw_pip(location,color)
-        draws a pip at (row,col) given by location, with given color'''
-        (centerx,centery) = (17+20*location[1],17+20*location[0])  # center
-        self.create_oval(centerx-5,centery-5,centerx+5,centery+5,fill=color)
-
-    def erase(self):
-        '''GUIDie.erase()
-        erases all the pips'''
-        pipList = self.find_all()
-        for pip in pipList:
-            self.delete(pip)
+import dice
+import sys
+import advice
+import engine
+import gamelog
+import instrument
+from guidie import GUIDie
+import solvereroll
 
 class Decath1500MFrame(Frame):
     '''frame for a game of 1500 Meters'''
+    PLAYER = gamelog.HUMAN  # player id in the game log
+    ADVICE = True  # show the expected-score label
 
-    def __init__(self,master,name):
-        '''Decath1500MFrame(master,name) -> Decath1500MFrame
+    def __init__(self,master,name,rng=dice.stream,log=gamelog.nolog):
+        '''Decath1500MFrame(master,name,[rng,log]) -> Decath1500MFrame
         creates a new 1500 Meters frame
-        name is the name of the player'''
+        name is the name of the player
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
         # set up Frame object
         Frame.__init__(self,master)
         self.grid()
@@ -75,9 +30,10 @@ class Decath1500MFrame(Frame):
         self.rerollLabel = Label(self,text='Rerolls: 5',font=('Arial',18))
         self.rerollLabel.grid(row=0,column=5,columnspan=3,sticky=E)
         # initialize game data
-        self.score = 0
-        self.rerolls = 5
-        self.gameround = 0
+        self.rng = rng
+        self.state = engine.Decath1500MState()
+        self.log = log
+        self.game = log.new_game()
         # set up dice
         self.dice = []
         for n in range(8):
@@ -88,31 +44,36 @@ class Decath1500MFrame(Frame):
         self.rollButton.grid(row=2,columnspan=1)
         self.keepButton = Button(self,text='Keep',state=DISABLED,command=self.keep)
         self.keepButton.grid(row=3,columnspan=1)
+        if self.ADVICE:  # expected score of the best play from here
+            self.adviceLabel = Label(self,font=('Arial',12))
+            self.adviceLabel.grid(row=4,columnspan=8,sticky=W)
+            self.show_advice()
 
     def roll(self):
         '''Decath1500MFrame.roll()
         handler method for the roll button click'''
-        # roll a die
-        self.dice[self.gameround].roll()
-        # if this was the first roll of the round, turn on the keep button
-        if self.keepButton['state'] == DISABLED :
-            self.keepButton['state'] = ACTIVE
-        else:  # otherwise we just spent a reroll
-            self.rerolls -= 1
-            self.rerollLabel['text'] = 'Rerolls: '+str(self.rerolls)
-        if (self.rerolls == 0):  # no rerolls left, so turn off roll button
+        # roll a die, spending a reroll if it was already rolled
+        if engine.running_roll(self.state,self.rng):
+            self.log.roll(self.game,self.PLAYER,self.state)
+            self.show_advice()
+        self.dice[self.state.gameround].show(self.state.tops[0])
+        # turn on the keep button and update the rerolls
+        self.keepButton['state'] = ACTIVE
+        self.rerollLabel['text'] = 'Rerolls: '+str(self.state.rerolls)
+        if (self.state.rerolls == 0):  # no rerolls left, so turn off roll button
             self.rollButton['state'] = DISABLED
 
     def keep(self):
         '''Decath1500MFrame.keep()
         handler method for the keep button click'''
         # add die to score and update the scoreboard
-        self.score += self.dice[self.gameround].get_top()
-        self.scoreLabel['text'] = 'Score: '+str(self.score)
-        self.gameround += 1  # go to next round
-        if self.gameround < 8:  # move buttons to next die
-            self.rollButton.grid(row=2,column=self.gameround,columnspan=1)
-            self.keepButton.grid(row=3,column=self.gameround,columnspan=1)
+        if engine.running_keep(self.state):  # and go to next round
+            self.log.keep(self.game,self.PLAYER,self.state)
+            self.show_advice()
+        self.scoreLabel['text'] = 'Score: '+str(self.state.score)
+        if self.state.gameround < 8:  # move buttons to next die
+            self.rollButton.grid(row=2,column=self.state.gameround,columnspan=1)
+            self.keepButton.grid(row=3,column=self.state.gameround,columnspan=1)
             self.rollButton['state'] = ACTIVE
             self.keepButton['state'] = DISABLED
         else:  # game over
@@ -120,11 +81,74 @@ class Decath1500MFrame(Frame):
             self.rollButton.grid_remove()
             self.rerollLabel['text'] = 'Game over'
 
-# play the game
-name = ''
-while name.strip() == '':
-    name = input("Enter your name: ")
-root = Tk()
-root.title('1500 Meters')
-game = Decath1500MFrame(root,name.strip())
-game.mainloop()
\ No newline at end of file
+    def reset(self):
+        '''Decath1500MFrame.reset()
+        starts a new game in the frame, reusing all of its widgets'''
+        self.state = engine.Decath1500MState()
+        self.game = self.log.new_game()
+        for die in self.dice:
+            die.reset()
+        self.scoreLabel['text'] = 'Score: 0'
+        self.rerollLabel['text'] = 'Rerolls: '+str(self.state.rerolls)
+        # put back the buttons that were removed at game over
+        self.rollButton.grid(row=2,column=0,columnspan=1)
+        self.keepButton.grid(row=3,column=0,columnspan=1)
+        self.rollButton['state'] = ACTIVE
+        self.keepButton['state'] = DISABLED
+        self.show_advice()
+
+    def show_advice(self):
+        '''Decath1500MFrame.show_advice()
+        updates the expected-score label'''
+        if self.ADVICE:
+            self.adviceLabel['text'] = advice.advice_text(self.state,'keep','reroll')
+
+class Decath1500MComputerFrame(Decath1500MFrame):
+    '''frame for a computer-played game of 1500 Meters'''
+    PLAYER = gamelog.COMPUTER
+    ADVICE = False
+
+    def __init__(self,master,rng=dice.stream,log=gamelog.nolog):
+        '''Decath1500MComputerFrame(master,[rng,log]) -> Decath1500MComputerFrame
+        creates a new computer-player 1500 Meters frame
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
+        Decath1500MFrame.__init__(self,master,'Computer',rng,log)
+        # lowest roll sum to keep, indexed by [gameround][rerolls]
+        self.keepTable = solvereroll.solve_event('1500M')[1]
+
+    def roll(self):
+        '''Decath1500MComputerFrame.roll()
+        handler method for the roll button click'''
+        Decath1500MFrame.roll(self)  # call the superclass roll
+        # decide whether to reroll or keep
+        if self.should_reroll():
+            self.keepButton['state'] = DISABLED # force reroll
+        else:
+            self.rollButton['state'] = DISABLED # force keep
+
+    def should_reroll(self):
+        '''Decath1500MComputerFrame.should_reroll()
+        returns True if computer player should reroll, False if should keep'''
+        # must keep if no rerolls
+        if self.state.rerolls == 0:
+            return False
+        rollValue = engine.running_value(self.state)
+        # look up the move in the table from solvereroll
+        return rollValue < self.keepTable[self.state.gameround][self.state.rerolls]
+
+if __name__ == '__main__':
+    # play the game
+    name = ''
+    while name.strip() == '':
+        name = input("Enter your name: ")
+    root = Tk()
+    root.title('1500 Meters')
+    if '--instrument' in sys.argv[1:]:  # time the handlers
+        instrument.install(root,[Decath1500MFrame,Decath1500MComputerFrame])
+    # one dice stream per frame; --seed=N replays the same dice
+    playerRNG,computerRNG = dice.game_streams(sys.argv[1:])
+    log = gamelog.open_log(sys.argv[1:])  # --log=PATH records the games
+    playerGame = Decath1500MFrame(root,name.strip(),playerRNG,log)
+    computerGame = Decath1500MComputerFrame(root,computerRNG,log)
+    root.mainloop()
\ No newline at end of file
@@ -1,71 +1,25 @@
 from tkinter import *
-import random
- 
-class GUIDie(Canvas):
-    '''6-sided Die class for GUI'''
- 
-    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
-        '''GUIDie(master,[valueList,colorList]) -> GUIDie
-        creates a GUI 6-sided die
-          valueList is the list of values (1,2,3,4,5,6 by default)
-          colorList is the list of colors (all black by default)'''
-        # create a 60x60 white canvas with a 5-pixel grooved border
-        Canvas.__init__(self,master,width=60,height=60,bg='white',\
-                        bd=5,relief=GROOVE)
-        # store the valuelist and colorlist
-        self.valueList = valueList
-        self.colorList = colorList
- 
-    def get_value(self):
-        '''GUIDie.get_value() -> int
-        returns the value of the die
-        returns 0 if the die hasn't been rolled yet'''
-        if hasattr(self,'top'):
-            return self.valueList[self.top-1]
-        else:
-            return 0
- 
-    def roll(self):
-        '''GUIDie.roll()
-        rolls the die'''
-        self.top = random.randrange(1,7)
-        self.draw()
- 
-    def draw(self):
-        '''GUIDie.draw()
-        draws the pips on the die'''
-        # clear old pips first
-        self.erase()
-        # location of which pips should be drawn
-        pipList = [[(1,1)],
-                   [(0,0),(2,2)],
-                   [(0,0),(1,1),(2,2)],
-                   [(0,0),(0,2),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,1),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,0),(1,2),(2,0),(2,2)]]
-        for location in pipList[self.top-1]:
-            self.draw_pip(location,self.colorList[self.top-1])
- 
-    def draw_pip(self,location,color):
-        '''GUIDie.draw_pip(location,color)
-        draws a pip at (row,col) given by location, with given color'''
-        (centerx,centery) = (17+20*location[1],17+20*location[0])  # center
-        self.create_oval(centerx-5,centery-5,centerx+5,centery+5,fill=color)
- 
-    def erase(self):
-        '''GUIDie.erase()
-        erases all the pips'''
-        pipList = self.find_all()
-        for pip in pipList:
-            self.delete(pip)
+import dice
+import sys
+import advice
+import engine
+import gamelog
+import instrument
+from guidie import GUIDie
+import solve400m
+import headtohead400m
  
 class Decath400MFrame(Frame):
     '''frame for a game of 400 Meters'''
+    PLAYER = gamelog.HUMAN  # player id in the game log
+    ADVICE = True  # show the expected-score label
  
-    def __init__(self,master,name):
-        '''Decath400MFrame(master,name) -> Decath400MFrame
+    def __init__(self,master,name,rng=dice.stream,log=gamelog.nolog):
+        '''Decath400MFrame(master,name,[rng,log]) -> Decath400MFrame
         creates a new 400 Meters frame
-        name is the name of the player'''
+        name is the name of the player
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
         # set up Frame object
         Frame.__init__(self,master)
         self.grid()
@@ -77,9 +31,10 @@ class Decath400MFrame(Frame):
         self.rerollLabel = Label(self,text='Rerolls: 5',font=('Arial',18))
         self.rerollLabel.grid(row=0,column=5,columnspan=3,sticky=E)
         # initialize game data
-        self.score = 0
-        self.rerolls = 5
-        self.gameround = 0
+        self.rng = rng
+        self.state = engine.Decath400MState()
+        self.log = log
+        self.game = log.new_game()
         # set up dice
         self.dice = []
         for n in range(8):
@@ -90,33 +45,39 @@ class Decath400MFrame(Frame):
         self.rollButton.grid(row=2,columnspan=2)
         self.keepButton = Button(self,text='Keep',state=DISABLED,command=self.keep)
         self.keepButton.grid(row=3,columnspan=2)
+        self.opponent = None  # frame of the player to beat
+        self.watcher = None   # frame showing its chance of beating this one
+        if self.ADVICE:  # expected score of the best play from here
+            self.adviceLabel = Label(self,font=('Arial',12),justify=LEFT)
+            self.adviceLabel.grid(row=4,columnspan=8,sticky=W)
+            self.show_advice()
  
     def roll(self):
         '''Decath400MFrame.roll()
         handler method for the roll button click'''
-        # roll both dice
-        self.dice[2*self.gameround].roll()
-        self.dice[2*self.gameround+1].roll()
-        # if this was the first roll of the round, turn on the keep button
-        if self.keepButton['state'] == DISABLED:
-            self.keepButton['state'] = ACTIVE
-        else:  # otherwise we just spent a reroll
-            self.rerolls -= 1
-            self.rerollLabel['text'] = 'Rerolls: '+str(self.rerolls)
-        if (self.rerolls == 0):  # no rerolls left, so turn off roll button
+        # roll both dice, spending a reroll if they were already rolled
+        if engine.running_roll(self.state,self.rng):
+            self.log.roll(self.game,self.PLAYER,self.state)
+            self.show_advice()
+        self.dice[2*self.state.gameround].show(self.state.tops[0])
+        self.dice[2*self.state.gameround+1].show(self.state.tops[1])
+        # turn on the keep button and update the rerolls
+        self.keepButton['state'] = ACTIVE
+        self.rerollLabel['text'] = 'Rerolls: '+str(self.state.rerolls)
+        if (self.state.rerolls == 0):  # no rerolls left, so turn off roll button
             self.rollButton['state'] = DISABLED
  
     def keep(self):
         '''Decath400MFrame.keep()
         handler method for the keep button click'''
         # add dice to score and update the scoreboard
-        self.score += self.dice[2*self.gameround].get_value() + \
-                      self.dice[2*self.gameround+1].get_value()
-        self.scoreLabel['text'] = 'Score: '+str(self.score)
-        self.gameround += 1  # go to next round
-        if self.gameround < 4:  # move buttons to next pair of dice
-            self.rollButton.grid(row=2,column=2*self.gameround,columnspan=2)
-            self.keepButton.grid(row=3,column=2*self.gameround,columnspan=2)
+        if engine.running_keep(self.state):  # and go to next round
+            self.log.keep(self.game,self.PLAYER,self.state)
+            self.show_advice()
+        self.scoreLabel['text'] = 'Score: '+str(self.state.score)
+        if self.state.gameround < 4:  # move buttons to next pair of dice
+            self.rollButton.grid(row=2,column=2*self.state.gameround,columnspan=2)
+            self.keepButton.grid(row=3,column=2*self.state.gameround,columnspan=2)
             self.rollButton['state'] = ACTIVE
             self.keepButton['state'] = DISABLED
         else:  # game over
@@ -124,65 +85,125 @@ class Decath400MFrame(Frame):
             self.rollButton.grid_remove()
             self.rerollLabel['text'] = 'Game over'
  
+    def watch(self,opponent):
+        '''Decath400MFrame.watch(opponent)
+        shows the chance of beating the player in the frame opponent
+        (assuming it plays for the best expected score), updated after
+        every move of either player'''
+        self.opponent = opponent
+        opponent.watcher = self
+        self.show_advice()
+ 
+    def reset(self):
+        '''Decath400MFrame.reset()
+        starts a new game in the frame, reusing all of its widgets'''
+        self.state = engine.Decath400MState()
+        self.game = self.log.new_game()
+        for die in self.dice:
+            die.reset()
+        self.scoreLabel['text'] = 'Score: 0'
+        self.rerollLabel['text'] = 'Rerolls: '+str(self.state.rerolls)
+        # put back the buttons that were removed at game over
+        self.rollButton.grid(row=2,column=0,columnspan=2)
+        self.keepButton.grid(row=3,column=0,columnspan=2)
+        self.rollButton['state'] = ACTIVE
+        self.keepButton['state'] = DISABLED
+        self.show_advice()
+ 
+    def show_advice(self):
+        '''Decath400MFrame.show_advice()
+        updates the expected-score label, and the one of the frame
+        watching this one'''
+        if self.ADVICE:
+            text = advice.advice_text(self.state,'keep','reroll')
+            if self.opponent is not None:
+                text += '\n'+advice.win_text(self.state,self.opponent.state,
+                                             'Computer')
+            self.adviceLabel['text'] = text.strip()
+        if self.watcher is not None:  # its chance of winning changed too
+            self.watcher.show_advice()
+ 
 class Decath400MComputerFrame(Decath400MFrame):
     '''frame for a computer-played game of 400 Meters'''
- 
-    def __init__(self,master):
-        '''Decath400MComputerFrame(master) -> Decath400MComputerFrame
-        created a new computer-player 400 Meters frame'''
-        Decath400MFrame.__init__(self,master,'Computer')
-        self.isReroll = False
+    PLAYER = gamelog.COMPUTER
+    ADVICE = False
+ 
+    def __init__(self,master,rng=dice.stream,log=gamelog.nolog):
+        '''Decath400MComputerFrame(master,[rng,log]) -> Decath400MComputerFrame
+        created a new computer-player 400 Meters frame
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
+        Decath400MFrame.__init__(self,master,'Computer',rng,log)
+        # optimal strategy chart, indexed by [gameround][rerolls][sum-MINSUM]
+        self.rerollTable = solve400m.solve()[1]
  
     def roll(self):
         '''Decath400MComputerFrame.roll()
         handler method for the roll button click'''
         Decath400MFrame.roll(self)  # call the superclass roll
-        # deduct a reroll if necessary
-        if self.isReroll:
-            self.rerolls -= 1
-            self.rerollLabel['text'] = 'Rerolls: '+str(self.rerolls)
         # decide whether to reroll or keep
         if self.should_reroll():
             self.keepButton['state'] = DISABLED # force reroll
-            self.isReroll = True
         else:
             self.rollButton['state'] = DISABLED # force keep
-            self.isReroll = False
  
     def should_reroll(self):
         '''Decath400MComputerFrame.should_reroll()
         returns True if computer player should reroll, False if should keep'''
         # must keep if no rerolls
-        if self.rerolls == 0:
+        if self.state.rerolls == 0:
             return False
-        rollValue = self.dice[2*self.gameround].get_value() + \
-                    self.dice[2*self.gameround+1].get_value()
-        # use chart from optimal strategy
-        if self.gameround == 0 and self.rerolls >=2 :
-            return rollValue < self.rerolls
-        if self.gameround == 0 and self.rerolls == 1:
-            return rollValue < -1
-        if self.gameround == 1:
-            return rollValue < (self.rerolls + 1)
-        if self.gameround == 2 and self.rerolls >= 4:
-            return rollValue < 6
-        if self.gameround == 2 and 3 >= self.rerolls >= 2:
-            return rollValue < (self.rerolls + 2)
-        if self.gameround == 2 and self.rerolls == 1:
-            return rollValue < 2
-        if self.gameround == 3 and self.rerolls >= 3:
-            return rollValue < 7
-        if self.gameround == 3 and self.rerolls == 2:
-            return rollValue < 6
-        if self.gameround == 3 and self.rerolls == 1:
-            return rollValue < 3
+        rollValue = engine.running_value(self.state)
+        # look up the move in the table from solve400m
+        return self.rerollTable[self.state.gameround][self.state.rerolls][rollValue-solve400m.MINSUM]
+ 
+class Decath400MHeadToHeadFrame(Decath400MComputerFrame):
+    '''frame for a computer-played game of 400 Meters that plays to beat
+    another player's frame instead of for the best average score'''
+    PLAYER = gamelog.HEADTOHEAD
+ 
+    def __init__(self,master,opponent,rng=dice.stream,log=gamelog.nolog):
+        '''Decath400MHeadToHeadFrame(master,opponent,[rng,log]) -> Decath400MHeadToHeadFrame
+        creates a new computer-player 400 Meters frame
+        opponent is the Decath400MFrame to beat
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
+        Decath400MComputerFrame.__init__(self,master,rng,log)
+        self.opponent = opponent
  
-# play the game
-name = ''
-while name.strip() == '':
-    name = input('Enter your name: ')
-root = Tk()
-root.title('400 Meters')
-playerGame = Decath400MFrame(root,name.strip())
-computerGame = Decath400MComputerFrame(root)
-root.mainloop()
\ No newline at end of file
+    def should_reroll(self):
+        '''Decath400MHeadToHeadFrame.should_reroll()
+        returns True if computer player should reroll, False if should keep'''
+        # must keep if no rerolls
+        if self.state.rerolls == 0:
+            return False
+        rollValue = engine.running_value(self.state)
+        # win-probability table for where the opponent is now
+        opponentState = self.opponent.state
+        winTable = headtohead400m.opponent_table(opponentState.gameround,\
+                                                 opponentState.rerolls,\
+                                                 opponentState.score)
+        return headtohead400m.should_reroll(winTable,self.state.gameround,\
+                                            self.state.rerolls,\
+                                            self.state.score,rollValue)
+ 
+if __name__ == '__main__':
+    # play the game
+    name = ''
+    while name.strip() == '':
+        name = input('Enter your name: ')
+    root = Tk()
+    root.title('400 Meters')
+    if '--instrument' in sys.argv[1:]:  # time the handlers
+        instrument.install(root,[Decath400MFrame,Decath400MComputerFrame,
+                                Decath400MHeadToHeadFrame])
+    # one dice stream per frame; --seed=N replays the same dice
+    playerRNG,computerRNG = dice.game_streams(sys.argv[1:])
+    log = gamelog.open_log(sys.argv[1:])  # --log=PATH records the games
+    playerGame = Decath400MFrame(root,name.strip(),playerRNG,log)
+    if '--head-to-head' in sys.argv[1:]:  # computer plays to beat the player
+        computerGame = Decath400MHeadToHeadFrame(root,playerGame,computerRNG,log)
+    else:
+        computerGame = Decath400MComputerFrame(root,computerRNG,log)
+    playerGame.watch(computerGame)  # show the chance of winning
+    root.mainloop()
\ No newline at end of file
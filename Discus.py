@@ -1,102 +1,24 @@
 from tkinter import *
-import random
-
-class GUIDie(Canvas):
-    '''6-sided Die class for GUI'''
-
-    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
-        '''GUIDie(master,[valueList,colorList]) -> GUIDie
-        creates a GUI 6-sided die
-          valueList is the list of values (1,2,3,4,5,6 by default)
-          colorList is the list of colors (all black by default)'''
-        # create a 60x60 white canvas with a 5-pixel grooved border
-        Canvas.__init__(self,master,width=60,height=60,bg='white',\
-                        bd=5,relief=GROOVE)
-        # store the valuelist and colorlist
-        self.valueList = valueList
-        self.colorList = colorList
-        # initialize the top value
-        self.top = 1
-
-    def get_top(self):
-        '''GUIDie.get_top() -> int
-        returns the value on the die'''
-        return self.valueList[self.top-1]
-
-    def roll(self):
-        '''GUIDie.roll()
-        rolls the die'''
-        self.top = random.randrange(1,7)
-        self.draw()
-
-    def draw(self):
-        '''GUIDie.draw()
-        draws the pips on the die'''
-        # clear old pips first
-        self.erase()
-        # location of which pips should be drawn
-        pipList = [[(1,1)],
-                   [(0,0),(2,2)],
-                   [(0,0),(1,1),(2,2)],
-                   [(0,0),(0,2),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,1),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,0),(1,2),(2,0),(2,2)]]
-        for location in pipList[self.top-1]:
-            self.draw_pip(location,self.colorList[self.top-1])
-
-    def draw_pip(self,location,color):
-        '''GUIDie.draw_pip(location,color)
-        draws a pip at (row,col) given by location, with given color'''
-        (centerx,centery) = (17+20*location[1],17+20*location[0])  # center
-        self.create_oval(centerx-5,centery-5,centerx+5,centery+5,fill=color)
-
-    def erase(self):
-        '''GUIDie.erase()
-        erases all the pips'''
-        pipList = self.find_all()
-        for pip in pipList:
-            self.delete(pip)
-
-
-class GUIFreezeableDie(GUIDie):
-    '''a GUIDie that can be "frozen" so that it can't be rolled'''
-
-    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
-        '''GUIFreezeableDie(master,[valueList,colorList]) -> GUIFreezeableDie
-        creates a GUI 6-sided freeze-able die
-          valueList is the list of values (1,2,3,4,5,6 by default)
-          colorList is the list of colors (all black by default)'''
-        GUIDie.__init__(self,master,valueList,colorList)
-        self.isFrozen = False  # die starts out unfrozen
-
-    def is_frozen(self):
-        '''GUIFreezeableDie.is_frozen() -> bool
-        returns True if the die is frozen, False otherwise'''
-        return self.isFrozen
-    
-    def toggle_freeze(self):
-        '''GUIFreezeableDie.toggle_freeze()
-        toggles the frozen status'''
-        self.isFrozen = not self.isFrozen
-        if self.isFrozen:
-            self['bg'] = 'gray'
-        else:
-            self['bg'] = 'white'
-
-    def roll(self):
-        '''GuiFreezeableDie.roll()
-        overloads GUIDie.roll() to not allow a roll if frozen'''
-        if not self.isFrozen:
-            GUIDie.roll(self)
-
+import dice
+import sys
+import advice
+import engine
+import gamelog
+import instrument
+from guidie import GUIFreezeableDie
+import solvediscus
 
 class DecathDiscusFrame(Frame):
     '''frame for a game of Discus'''
+    PLAYER = gamelog.HUMAN  # player id in the game log
+    ADVICE = True  # show the expected-score label
 
-    def __init__(self,master,name):
-        '''DecathDiscusFrame(master,name) -> DecathDiscusFrame
+    def __init__(self,master,name,rng=dice.stream,log=gamelog.nolog):
+        '''DecathDiscusFrame(master,name,[rng,log]) -> DecathDiscusFrame
         creates a new Discus frame
-        name is the name of the player'''
+        name is the name of the player
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
         # set up Frame object
         Frame.__init__(self,master)
         self.grid()
@@ -108,9 +30,10 @@ class DecathDiscusFrame(Frame):
         self.scoreLabel = Label(self,text='High Score: 0',font=('Arial',18))
         self.scoreLabel.grid(row=0,column=5)
         # initialize game data
-        self.score = 0
-        self.attempt = 1
-        self.numFrozen = -1
+        self.rng = rng
+        self.state = engine.DiscusState()
+        self.log = log
+        self.game = log.new_game()
         # set up dice and freeze buttons
         self.dice = []
         self.freezeButtons = []
@@ -118,7 +41,7 @@ class DecathDiscusFrame(Frame):
             self.dice.append(GUIFreezeableDie(self,[0,2,0,4,0,6],['red','black']*3))
             self.dice[n].grid(row=1,column=n)
             self.freezeButtons.append(Button(self,text='Freeze',state=DISABLED,\
-                                             command=self.dice[n].toggle_freeze))
+                                             command=lambda n=n: self.freeze(n)))
             self.freezeButtons[n].grid(row=2,column=n)
         # set up roll/stop buttons
         self.rollButton = Button(self,text='Roll',command=self.roll)
@@ -128,86 +51,163 @@ class DecathDiscusFrame(Frame):
         # freeze warning label
         self.messageLabel = Label(self,text='Click Roll button to start',font=('Arial',18))
         self.messageLabel.grid(row=3,column=0,columnspan=5)
+        if self.ADVICE:  # expected score of the best play from here
+            self.adviceLabel = Label(self,font=('Arial',12))
+            self.adviceLabel.grid(row=4,columnspan=6,sticky=W)
+            self.show_advice()
+
+    def freeze(self,n):
+        '''DecathDiscusFrame.freeze(n)
+        handler method for the freeze button click on die n'''
+        if engine.discus_freeze(self.state,n):
+            self.log.freeze(self.game,self.PLAYER,self.state,n)
+            self.show_advice()
+            self.dice[n].toggle_freeze()
 
     def roll(self):
         '''DecathDiscusFrame.roll()
         handler method for the roll button click'''
-        currentlyFrozen = len([die for die in self.dice if die.is_frozen()])
-        if currentlyFrozen <= self.numFrozen:
+        # roll the dice that aren't frozen
+        if not engine.discus_roll(self.state,self.rng):
             # need to freeze a die before can roll
             self.messageLabel['text'] = 'You must freeze a die to reroll'
             return
+        self.log.roll(self.game,self.PLAYER,self.state)
+        self.show_advice()
         # clear label and activate stop button
         self.messageLabel['text'] = 'Click Stop button to keep'
         self.stopButton['state'] = ACTIVE
-        # roll all dice
-        for die in self.dice:
-            die.roll()
-        # check frozen dice -- adjust freeze buttons to only allow freezing
-        #  on not-already-frozen scoring dice
-        self.numFrozen = 0
         for n in range(5):
-            if self.dice[n].is_frozen():
-                self.freezeButtons[n]['state'] = DISABLED
-                self.numFrozen += 1
-            elif self.dice[n].get_top() == 0:
-                self.freezeButtons[n]['state'] = DISABLED
-            else:
-                self.freezeButtons[n]['state'] = ACTIVE
-        # need an unfrozen die to score to avoid a foul
-        self.rollFouled = True
+            if not self.dice[n].is_frozen():
+                self.dice[n].show(self.state.tops[n])
+        # adjust freeze buttons to only allow freezing on
+        #  not-already-frozen scoring dice
         for n in range(5):
-            if not self.dice[n].is_frozen() and self.dice[n].get_top() > 0:
-                self.rollFouled = False  # found a good die
-        # foul 
-        if self.rollFouled:
+            if engine.discus_can_freeze(self.state,n):
+                self.freezeButtons[n]['state'] = ACTIVE
+            else:
+                self.freezeButtons[n]['state'] = DISABLED
+        # foul if no unfrozen die scored
+        if self.state.rollFouled:
             self.attemptscoreLabel['text'] = 'FOULED ATTEMPT'
             self.messageLabel['text'] = 'Click FOUL button to continue'
             self.rollButton['state'] = DISABLED
             self.stopButton['text'] = 'FOUL'
             self.stopButton['state'] = ACTIVE
         else:
-            attemptscore = sum([die.get_top() for die in self.dice])
+            attemptscore = engine.discus_attempt_score(self.state)
             self.attemptscoreLabel['text'] = 'Attempt #{} Score: {}'.format( \
-                                             self.attempt,attemptscore)
+                                             self.state.attempt,attemptscore)
                 
     def stop_attempt(self):
         '''DecathDiscusFrame.stop_attempt()
         handler method for the stop button click'''
-        # check for foul
-        if self.rollFouled:
-            attemptscore = 0
-        else:
-            attemptscore = sum([die.get_top() for die in self.dice])
-        if attemptscore > self.score:  # new high score
-            self.score = attemptscore
-            self.scoreLabel['text'] = 'High Score: '+str(self.score)
+        # keep the attempt score (0 for a foul) if it's a new high score
+        if engine.can_stop(self.state):  # not before the first roll
+            self.log.stop(self.game,self.PLAYER,self.state)  # before it's reset
+        engine.discus_stop(self.state)  # and go to next attempt
+        self.show_advice()
+        self.scoreLabel['text'] = 'High Score: '+str(self.state.score)
         self.messageLabel['text'] = 'Click Roll button to start'
-        self.attempt += 1  # go to next attempt
-        if self.attempt <= 3:  # reset dice,buttons,labels
-            for n in range(5):
-                self.dice[n] = (GUIFreezeableDie(self,[0,2,0,4,0,6],['red','black']*3))
-                self.dice[n].grid(row=1,column=n)
-                self.freezeButtons[n]['state'] = DISABLED
-                self.freezeButtons[n]['command'] = self.dice[n].toggle_freeze
-            self.numFrozen = -1
-            self.attemptscoreLabel['text'] = 'Attempt #{} Score: 0'.format( \
-                                             self.attempt)
-            self.rollButton['state'] = ACTIVE
-            self.stopButton['state'] = DISABLED
-            self.stopButton['text'] = 'Stop'
+        if self.state.attempt <= 3:
+            self.reset_attempt()
         else:  # game over
             self.stopButton.grid_remove()
             self.rollButton.grid_remove()
             self.messageLabel.grid_remove()
+            for button in self.freezeButtons:
+                button['state'] = DISABLED
             self.attemptscoreLabel['text'] = 'Game over'
 
+    def reset_attempt(self):
+        '''DecathDiscusFrame.reset_attempt()
+        resets the dice, buttons and labels for the next attempt'''
+        for n in range(5):
+            self.dice[n].reset()
+            self.freezeButtons[n]['state'] = DISABLED
+        self.attemptscoreLabel['text'] = 'Attempt #{} Score: 0'.format( \
+                                         self.state.attempt)
+        self.rollButton['state'] = ACTIVE
+        self.stopButton['state'] = DISABLED
+        self.stopButton['text'] = 'Stop'
+
+    def reset(self):
+        '''DecathDiscusFrame.reset()
+        starts a new game in the frame, reusing all of its widgets'''
+        self.state = engine.DiscusState()
+        self.game = self.log.new_game()
+        self.scoreLabel['text'] = 'High Score: 0'
+        self.messageLabel['text'] = 'Click Roll button to start'
+        # put back the widgets that were removed at game over
+        self.rollButton.grid()
+        self.stopButton.grid()
+        self.messageLabel.grid()
+        self.reset_attempt()
+        self.show_advice()
+
+    def show_advice(self):
+        '''DecathDiscusFrame.show_advice()
+        updates the expected-score label'''
+        if self.ADVICE:
+            self.adviceLabel['text'] = advice.advice_text(self.state,'stop','reroll')
+
+
+class DecathDiscusComputerFrame(DecathDiscusFrame):
+    '''frame for a computer-played game of Discus'''
+    PLAYER = gamelog.COMPUTER
+    ADVICE = False
+
+    def __init__(self,master,rng=dice.stream,log=gamelog.nolog):
+        '''DecathDiscusComputerFrame(master,[rng,log]) -> DecathDiscusComputerFrame
+        creates a new computer-player Discus frame
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
+        DecathDiscusFrame.__init__(self,master,'Computer',rng,log)
 
-# play the game
-name = ''
-while name.strip() == '':
-    name = input("Enter your name: ")
-root = Tk()
-root.title('Discus')
-game = DecathDiscusFrame(root,name.strip())
-game.mainloop()
\ No newline at end of file
+    def roll(self):
+        '''DecathDiscusComputerFrame.roll()
+        handler method for the roll button click'''
+        DecathDiscusFrame.roll(self)  # call the superclass roll
+        if self.state.rollFouled:  # nothing to decide, just take the foul
+            return
+        # the computer does its own freezing
+        for button in self.freezeButtons:
+            button['state'] = DISABLED
+        # look up the move in the table from solvediscus
+        values = [self.state.FACES[top-1] for top in self.state.tops]
+        frozenCode = solvediscus.encode([values[n] for n in range(5)
+                                         if self.state.frozen & (1 << n)])
+        rollCode = solvediscus.encode([values[n] for n in range(5)
+                                       if not self.state.frozen & (1 << n)])
+        freezeCode = solvediscus.best_move(self.state.attempt,\
+                                           self.state.score,\
+                                           frozenCode,rollCode)
+        if freezeCode is None:
+            self.rollButton['state'] = DISABLED  # force stop
+        else:
+            # freeze the chosen dice and force a reroll
+            counts = list(solvediscus.decode(freezeCode))
+            for n in range(5):
+                if engine.discus_can_freeze(self.state,n) and \
+                   counts[solvediscus.SCORINGFACES.index(values[n])] > 0:
+                    counts[solvediscus.SCORINGFACES.index(values[n])] -= 1
+                    self.freeze(n)
+            self.stopButton['state'] = DISABLED
+            self.messageLabel['text'] = 'Click Roll button to reroll'
+
+
+if __name__ == '__main__':
+    # play the game
+    name = ''
+    while name.strip() == '':
+        name = input("Enter your name: ")
+    root = Tk()
+    root.title('Discus')
+    if '--instrument' in sys.argv[1:]:  # time the handlers
+        instrument.install(root,[DecathDiscusFrame,DecathDiscusComputerFrame])
+    # one dice stream per frame; --seed=N replays the same dice
+    playerRNG,computerRNG = dice.game_streams(sys.argv[1:])
+    log = gamelog.open_log(sys.argv[1:])  # --log=PATH records the games
+    playerGame = DecathDiscusFrame(root,name.strip(),playerRNG,log)
+    computerGame = DecathDiscusComputerFrame(root,computerRNG,log)
+    root.mainloop()
\ No newline at end of file
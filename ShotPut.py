@@ -1,70 +1,24 @@
 from tkinter import *
-import random
- 
-class GUIDie(Canvas):
-    '''6-sided Die class for GUI'''
- 
-    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
-        '''GUIDie(master,[valueList,colorList]) -> GUIDie
-        creates a GUI 6-sided die
-          valueList is the list of values (1,2,3,4,5,6 by default)
-          colorList is the list of colors (all black by default)'''
-        # create a 60x60 white canvas with a 5-pixel grooved border
-        Canvas.__init__(self,master,width=60,height=60,bg='white',\
-                        bd=5,relief=GROOVE)
-        # store the valuelist and colorlist
-        self.valueList = valueList
-        self.colorList = colorList
-        # initialize the top value
-        self.top = 1
- 
-    def get_top(self):
-        '''GUIDie.get_top() -> int
-        returns the value on the die'''
-        return self.valueList[self.top-1]
- 
-    def roll(self):
-        '''GUIDie.roll()
-        rolls the die'''
-        self.top = random.randrange(1,7)
-        self.draw()
- 
-    def draw(self):
-        '''GUIDie.draw()
-        draws the pips on the die'''
-        # clear old pips first
-        self.erase()
-        # location of which pips should be drawn
-        pipList = [[(1,1)],
-                   [(0,0),(2,2)],
-                   [(0,0),(1,1),(2,2)],
-                   [(0,0),(0,2),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,1),(2,0),(2,2)],
-                   [(0,0),(0,2),(1,0),(1,2),(2,0),(2,2)]]
-        for location in pipList[self.top-1]:
-            self.draw_pip(location,self.colorList[self.top-1])
- 
-    def draw_pip(self,location,color):
-        '''GUIDie.draw_pip(location,color)
-        draws a pip at (row,col) given by location, with given color'''
-        (centerx,centery) = (17+20*location[1],17+20*location[0])  # center
-        self.create_oval(centerx-5,centery-5,centerx+5,centery+5,fill=color)
- 
-    def erase(self):
-        '''GUIDie.erase()
-        erases all the pips'''
-        pipList = self.find_all()
-        for pip in pipList:
-            self.delete(pip)
-
+import dice
+import sys
+import advice
+import engine
+import gamelog
+import instrument
+from guidie import GUIDie
+import solveshotput
  
 class ShotPutFrame(Frame):
     '''frame for a game of Shot Put'''
+    PLAYER = gamelog.HUMAN  # player id in the game log
+    ADVICE = True  # show the expected-score label
  
-    def __init__(self,master,name):
-        '''ShotPutFrame(master,name) -> ShotPutFrameFrame
+    def __init__(self,master,name,rng=dice.stream,log=gamelog.nolog):
+        '''ShotPutFrame(master,name,[rng,log]) -> ShotPutFrame
         creates a new Shot Put frame
-        name is the name of the player'''
+        name is the name of the player
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
         # set up Frame object
         Frame.__init__(self,master)
         self.grid()
@@ -79,11 +33,10 @@ class ShotPutFrame(Frame):
         self.scoreLabel.grid(row=0,column=6,columnspan=2)
         
         # initialize game data
-        self.score = 0
-        self.max_score = 0
-        self.score_list = []
-        self.die = 0
-        self.attempt = 1
+        self.rng = rng
+        self.state = engine.ShotPutState()
+        self.log = log
+        self.game = log.new_game()
         
         # set up dice
         self.dice = []
@@ -96,50 +49,49 @@ class ShotPutFrame(Frame):
         self.rollButton.grid(row=2,columnspan=1)
         self.stopButton = Button(self,text='Stop',state=DISABLED,command=self.stop)
         self.stopButton.grid(row=3,columnspan=1)
+        if self.ADVICE:  # expected score of the best play from here
+            self.adviceLabel = Label(self,font=('Arial',10))
+            self.adviceLabel.grid(row=4,columnspan=8,sticky=W)
+            self.show_advice()
  
     def roll(self):
         '''ShotPutFrame.roll()
         handler method for the roll button click'''
         # roll a die
-        self.dice[self.die].roll()
+        n = self.state.die
+        if engine.shotput_roll(self.state,self.rng):
+            self.log.roll(self.game,self.PLAYER,self.state)
+            self.show_advice()
+        self.dice[n].show(self.state.tops[n])
 
         # if this was the first roll of the round, turn on the stop button
         if self.stopButton['state'] == DISABLED:
             self.stopButton['state'] = ACTIVE
-            self.attemptscore = 0
 
         # check for a foul roll
-        self.rollFouled = self.dice[self.die].get_top() == 1
-        if self.rollFouled:
+        if self.state.rollFouled:
             self.attemptscoreLabel['text'] = 'FOULED ATTEMPT'
             self.rollButton['state'] = DISABLED
             self.stopButton['text'] = 'FOUL'
         else:
-            self.attemptscore += self.dice[self.die].get_top()
-            self.attemptscoreLabel['text'] = f'Attempt #{self.attempt} Score: {self.attemptscore}'
-            self.die += 1
-            if self.die < 8:  # move buttons to next die
-                self.rollButton.grid(row=2,column=self.die,columnspan=1)
-                self.stopButton.grid(row=3,column=self.die,columnspan=1)
+            self.attemptscoreLabel['text'] = f'Attempt #{self.state.attempt} Score: {self.state.attemptscore}'
+            if self.state.die < 8:  # move buttons to next die
+                self.rollButton.grid(row=2,column=self.state.die,columnspan=1)
+                self.stopButton.grid(row=3,column=self.state.die,columnspan=1)
             else:
                 self.rollButton['state'] = DISABLED
  
     def stop(self):
         '''ShotPutFrame.stop()
         handler method for the stop button click'''
-        # check for foul
-        if self.rollFouled:
-            self.attemptscore = 0
-        
-        # append the score to the list of scores
-        self.score_list.append(self.attemptscore)
-     
-        if max(self.score_list) == self.attemptscore:  # new high score
-            self.score = self.attemptscore
-            self.scoreLabel['text'] = f'High Score: {self.score}'
-        self.attempt += 1  # go to next attempt
-        if self.attempt <= 3:  # reset dice,buttons,labels
-            self.attemptscoreLabel['text'] = f'Attempt #{self.attempt} Score: 0'
+        # keep the attempt score (0 for a foul) if it's a new high score
+        if engine.can_stop(self.state):  # not before the first roll
+            self.log.stop(self.game,self.PLAYER,self.state)  # before it's reset
+        engine.shotput_stop(self.state)  # and go to next attempt
+        self.show_advice()
+        self.scoreLabel['text'] = f'High Score: {self.state.score}'
+        if self.state.attempt <= 3:  # reset dice,buttons,labels
+            self.attemptscoreLabel['text'] = f'Attempt #{self.state.attempt} Score: 0'
             self.rollButton['state'] = ACTIVE
             self.stopButton['state'] = DISABLED
             self.stopButton['text'] = 'Stop'
@@ -147,18 +99,77 @@ class ShotPutFrame(Frame):
             self.stopButton.grid(row=3,column=0,columnspan=1)
             for die in self.dice:
                 die.erase()
-            self.die = 0
         else:  # game over
             self.stopButton.grid_remove()
             self.rollButton.grid_remove()
             self.attemptscoreLabel['text'] = 'Game over'
  
+    def reset(self):
+        '''ShotPutFrame.reset()
+        starts a new game in the frame, reusing all of its widgets'''
+        self.state = engine.ShotPutState()
+        self.game = self.log.new_game()
+        for die in self.dice:
+            die.reset()
+        self.scoreLabel['text'] = 'High Score: 0'
+        self.attemptscoreLabel['text'] = 'Attempt #1 Score: 0'
+        # put back the buttons that were removed at game over
+        self.rollButton.grid(row=2,column=0,columnspan=1)
+        self.stopButton.grid(row=3,column=0,columnspan=1)
+        self.rollButton['state'] = ACTIVE
+        self.stopButton['state'] = DISABLED
+        self.stopButton['text'] = 'Stop'
+        self.show_advice()
+ 
+    def show_advice(self):
+        '''ShotPutFrame.show_advice()
+        updates the expected-score label'''
+        if self.ADVICE:
+            self.adviceLabel['text'] = advice.advice_text(self.state,'stop','roll')
+ 
+ 
+class ShotPutComputerFrame(ShotPutFrame):
+    '''frame for a computer-played game of Shot Put'''
+    PLAYER = gamelog.COMPUTER
+    ADVICE = False
+ 
+    def __init__(self,master,rng=dice.stream,log=gamelog.nolog):
+        '''ShotPutComputerFrame(master,[rng,log]) -> ShotPutComputerFrame
+        creates a new computer-player Shot Put frame
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
+        ShotPutFrame.__init__(self,master,'Computer',rng,log)
+ 
+    def roll(self):
+        '''ShotPutComputerFrame.roll()
+        handler method for the roll button click'''
+        # the stop button is only off mid-attempt if we turned it off to
+        # force a roll, so turn it back on before the superclass roll
+        if self.state.die > 0:
+            self.stopButton['state'] = ACTIVE
+        ShotPutFrame.roll(self)  # call the superclass roll
+        if self.state.rollFouled:  # nothing to decide, just take the foul
+            return
+        # look up the move in the table from solveshotput
+        if solveshotput.should_stop(self.state.attempt,self.state.die,\
+                                    self.state.attemptscore,self.state.score):
+            self.rollButton['state'] = DISABLED # force stop
+        else:
+            self.stopButton['state'] = DISABLED # force roll
+ 
  
-# play the game
-name = ''
-while name.strip() == '':
-    name = input('Enter your name: ')
-root = Tk()
-root.title('Shot Put')
-game = ShotPutFrame(root,name.strip())
-game.mainloop()
\ No newline at end of file
+if __name__ == '__main__':
+    # play the game
+    name = ''
+    while name.strip() == '':
+        name = input('Enter your name: ')
+    root = Tk()
+    root.title('Shot Put')
+    if '--instrument' in sys.argv[1:]:  # time the handlers
+        instrument.install(root,[ShotPutFrame,ShotPutComputerFrame])
+    # one dice stream per frame; --seed=N replays the same dice
+    playerRNG,computerRNG = dice.game_streams(sys.argv[1:])
+    log = gamelog.open_log(sys.argv[1:])  # --log=PATH records the games
+    playerGame = ShotPutFrame(root,name.strip(),playerRNG,log)
+    computerGame = ShotPutComputerFrame(root,computerRNG,log)
+    root.mainloop()
\ No newline at end of file
@@ -0,0 +1,226 @@
+'''live expected-score advice for the game frames
+
+Looks up, for a player's current state, the expected final score with
+the best play from here, and what each choice is worth: keeping versus
+rerolling in the running events, stopping versus rolling on in Shot Put,
+and stopping versus freezing and rerolling in Discus.  In 400 Meters it
+also gives the chance of beating an opponent, who is assumed to play
+for the best expected score as Decath400MComputerFrame does.
+
+All of it comes from the solvers' value tables, which are worked out the
+first time they are needed (when the first frame is made) and cached, so
+each lookup after that is a few table reads.
+
+Run it from the command line to time the lookups:
+    python advice.py [numLookups]'''
+import functools
+import sys
+import time
+
+import numpy as np
+
+import dice
+import engine
+import headtohead400m
+import solve400m
+import solvediscus
+import solvereroll
+import solveshotput
+
+EVENTS = {engine.Decath100MState:'100M',engine.Decath400MState:'400M',
+          engine.Decath1500MState:'1500M'}
+
+@functools.lru_cache(maxsize=None)
+def running_values(event):
+    '''running_values(event) -> ndarray
+    returns solvereroll's value table for a running event as floats,
+    indexed by [gameround][rerolls]'''
+    return np.array(solvereroll.solve_event(event)[0],dtype=float)
+
+def running_advice(state):
+    '''running_advice(state) -> (float,float,float)
+    returns (expected,keep,reroll) for a running event: the expected
+    final score with the best play, and from keeping and from rerolling
+    the roll (None for a choice that can't be made right now)'''
+    if engine.game_over(state):
+        return state.score,None,None
+    values = running_values(EVENTS[type(state)])
+    if not state.rolled:
+        return state.score+values[state.gameround,state.rerolls],None,None
+    keep = state.score+engine.running_value(state)+ \
+           values[state.gameround+1,state.rerolls]
+    if state.rerolls == 0:
+        return keep,keep,None
+    reroll = state.score+values[state.gameround,state.rerolls-1]
+    return max(keep,reroll),keep,reroll
+
+def shotput_advice(state):
+    '''shotput_advice(state) -> (float,float,float)
+    returns (expected,stop,roll) for Shot Put: the expected final high
+    score with the best play, and from stopping and from rolling another
+    die (None for a choice that can't be made right now)'''
+    if engine.game_over(state):
+        return state.score,None,None
+    gameValue,stopTable,rollTable = solveshotput.solve()
+    attempt = state.attempt
+    if state.rollFouled:  # the attempt scores nothing
+        stop = gameValue[attempt,state.score]
+        return stop,stop,None
+    if state.die == 0:
+        return gameValue[attempt-1,state.score],None,None
+    stop = gameValue[attempt,max(state.attemptscore,state.score)]
+    if state.die == state.NUMDICE:
+        return stop,stop,None
+    roll = rollTable[attempt-1,state.die,state.attemptscore,state.score]
+    return max(stop,roll),stop,roll
+
+def discus_advice(state):
+    '''discus_advice(state) -> (float,float,float)
+    returns (expected,stop,reroll) for Discus: the expected final high
+    score with the best play, and from stopping and from rerolling (with
+    the dice frozen since the roll, or the best ones to freeze if none
+    have been; None for a choice that can't be made right now)'''
+    if engine.game_over(state):
+        return state.score,None,None
+    gameValue,rollValues = solvediscus.solve()
+    best = state.score//2
+    if state.numFrozen < 0:  # not rolled yet this attempt
+        return gameValue[state.attempt-1,best],None,None
+    values = [state.FACES[top-1] for top in state.tops]
+    stop = gameValue[state.attempt,
+                     max(state.score,engine.discus_attempt_score(state))//2]
+    if state.rollFouled:
+        return stop,stop,None
+    lockedCode = solvediscus.encode([values[n]
+                                     for n in range(state.NUMDICE)
+                                     if state.locked & (1 << n)])
+    frozenCode = solvediscus.encode([values[n]
+                                     for n in range(state.NUMDICE)
+                                     if state.frozen & (1 << n)])
+    memo = rollValues[state.attempt-1]
+    if frozenCode != lockedCode:  # the dice chosen so far
+        reroll = memo[frozenCode][best]
+    else:  # the best dice to freeze
+        rollCode = solvediscus.encode([values[n]
+                                       for n in range(state.NUMDICE)
+                                       if not state.locked & (1 << n)])
+        freezeCodes = solvediscus.SUBSETS[rollCode]
+        if not freezeCodes:
+            return stop,stop,None
+        reroll = max(memo[lockedCode+code][best] for code in freezeCodes)
+    return max(stop,reroll),stop,reroll
+
+def advice(state):
+    '''advice(state) -> (float,float,float)
+    returns (expected,first,second) for any event: the expected final
+    score and the value of each choice, as from running_advice(),
+    shotput_advice() or discus_advice()'''
+    if isinstance(state,engine.RunningState):
+        return running_advice(state)
+    if isinstance(state,engine.ShotPutState):
+        return shotput_advice(state)
+    return discus_advice(state)
+
+def final_distribution(state):
+    '''final_distribution(state) -> ndarray
+    returns the final-score distribution (over headtohead400m.SCORES) of
+    a 400 Meters player who plays for the best expected score from state'''
+    table = headtohead400m.final_distributions()
+    low = headtohead400m.LOWSCORE
+    if state.rolled and not engine.game_over(state):
+        # the move is already decided by the roll
+        rollValue = engine.running_value(state)
+        if state.rerolls > 0 and \
+           solve400m.should_reroll(state.gameround,state.rerolls,
+                                   rollValue):
+            return table[state.gameround,state.rerolls-1,state.score-low]
+        return table[state.gameround+1,state.rerolls,
+                     state.score+rollValue-low]
+    return table[state.gameround,state.rerolls,state.score-low]
+
+def win_advice(state,opponentState):
+    '''win_advice(state,opponentState) -> (float,float,float)
+    returns (chance,keep,reroll) for a 400 Meters player against an
+    opponent: the chance of winning with the best play for expected
+    score, and from keeping and from rerolling the roll (None for a
+    choice that can't be made right now); ties count as half a win'''
+    table = headtohead400m.final_distributions()
+    low = headtohead400m.LOWSCORE
+    utility = headtohead400m.win_utility(final_distribution(opponentState))
+    if not state.rolled or engine.game_over(state):
+        return float(final_distribution(state) @ utility),None,None
+    keep = float(table[state.gameround+1,state.rerolls,
+                       state.score+engine.running_value(state)-low] @ utility)
+    if state.rerolls == 0:
+        return keep,keep,None
+    reroll = float(table[state.gameround,state.rerolls-1,state.score-low]
+                   @ utility)
+    chance = reroll if solve400m.should_reroll(
+        state.gameround,state.rerolls,engine.running_value(state)) else keep
+    return chance,keep,reroll
+
+def advice_text(state,firstName,secondName):
+    '''advice_text(state,firstName,secondName) -> str
+    returns the label text for the advice on state
+      firstName and secondName name the two choices, as in
+      ('keep','reroll')'''
+    expected,first,second = advice(state)
+    if engine.game_over(state):
+        return ''
+    text = 'Expected score: {:.1f}'.format(expected)
+    choices = ['{} {:.1f}'.format(name,value)
+               for name,value in ((firstName,first),(secondName,second))
+               if value is not None]
+    if choices:
+        text += ' ({})'.format(', '.join(choices))
+    return text
+
+def win_text(state,opponentState,opponentName):
+    '''win_text(state,opponentState,opponentName) -> str
+    returns the label text for the chance of beating opponentName'''
+    chance,keep,reroll = win_advice(state,opponentState)
+    text = 'Chance to beat {}: {:.0%}'.format(opponentName,chance)
+    choices = ['{} {:.0%}'.format(name,value)
+               for name,value in (('keep',keep),('reroll',reroll))
+               if value is not None]
+    if choices and not engine.game_over(state):
+        text += ' ({})'.format(', '.join(choices))
+    return text
+
+def main(args):
+    numLookups = int(args[0]) if len(args) > 0 else 100000
+    rng = dice.DiceRNG(0)
+    for stateClass in (engine.Decath100MState,engine.Decath400MState,
+                       engine.Decath1500MState,engine.ShotPutState,
+                       engine.DiscusState):
+        state = stateClass()
+        start = time.perf_counter()
+        advice(state)  # works out the tables
+        setup = time.perf_counter() - start
+        # time the lookups on the states after a first roll
+        if isinstance(state,engine.RunningState):
+            engine.running_roll(state,rng)
+        elif isinstance(state,engine.ShotPutState):
+            engine.shotput_roll(state,rng)
+        else:
+            engine.discus_roll(state,rng)
+        start = time.perf_counter()
+        for n in range(numLookups):
+            advice(state)
+        elapsed = time.perf_counter() - start
+        print('{:15s} tables in {:7.1f} ms, {:6.2f} us per lookup'.format(
+            stateClass.__name__,1000*setup,1e6*elapsed/numLookups))
+    state,opponentState = engine.Decath400MState(),engine.Decath400MState()
+    engine.running_roll(state,rng)
+    start = time.perf_counter()
+    win_advice(state,opponentState)
+    setup = time.perf_counter() - start
+    start = time.perf_counter()
+    for n in range(numLookups):
+        win_advice(state,opponentState)
+    elapsed = time.perf_counter() - start
+    print('{:15s} tables in {:7.1f} ms, {:6.2f} us per lookup'.format(
+        'win chance',1000*setup,1e6*elapsed/numLookups))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
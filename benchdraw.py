@@ -0,0 +1,61 @@
+'''micro-benchmark for drawing dice faces
+
+Times GUIDie.draw(), which shows and hides pips that were created once,
+against the old way of deleting every pip and creating the new ones on
+each roll.  Both draw the same faces on 16 dice, as two 400 Meters
+frames do.
+
+It needs a display; on a machine without one use a virtual X display:
+    xvfb-run python benchdraw.py [numRedraws]'''
+import sys
+import time
+from tkinter import Tk,TclError
+
+from guidie import GUIDie
+
+NUMDICE = 16
+
+def recreate_draw(die):
+    '''recreate_draw(die)
+    draws die the old way, by deleting all its items and creating the
+    pips for its top'''
+    for pip in die.find_all():
+        die.delete(pip)
+    for location in die.pipList[die.top-1]:
+        (centerx,centery) = (17+20*location[1],17+20*location[0])
+        die.create_oval(centerx-5,centery-5,centerx+5,centery+5,
+                        fill=die.colorList[die.top-1])
+
+def time_redraws(root,dice,draw,numRedraws):
+    '''time_redraws(root,dice,draw,numRedraws) -> float
+    draws every die numRedraws times with draw, showing each face in
+    turn, and returns the redraws per second (of a single die)'''
+    start = time.perf_counter()
+    for n in range(numRedraws):
+        for die in dice:
+            die.top = n%6 + 1
+            draw(die)
+        root.update_idletasks()  # let Tk do the drawing too
+    elapsed = time.perf_counter() - start
+    return numRedraws*len(dice)/elapsed
+
+def main(args):
+    numRedraws = int(args[0]) if len(args) > 0 else 2000
+    try:
+        root = Tk()
+    except TclError:
+        print('no display: run this under xvfb-run')
+        return
+    dice = []
+    for n in range(NUMDICE):
+        dice.append(GUIDie(root,[1,2,3,4,5,-6],['black']*5+['red']))
+        dice[n].grid(row=n//8,column=n%8)
+    root.update()
+    for name,draw in (('GUIDie.draw',GUIDie.draw),
+                      ('recreate',recreate_draw)):
+        print('{:12s} {:10,.0f} redraws/sec'.format(
+            name,time_redraws(root,dice,draw,numRedraws)))
+    root.destroy()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,272 @@
+'''single-canvas board that draws every die of every player
+
+A frame gives each die its own Canvas widget, so a screen with many
+players has hundreds of widgets to lay out.  A DiceBoard is one Canvas
+for the whole screen: each player is a row of BoardDie items, and each
+die is a tagged group of canvas items (its face and seven pips, made
+once), so adding a player or rolling a die costs the same however many
+players there are.
+
+BoardDie has the same API as GUIDie and GUIFreezeableDie (roll, show,
+get_top, get_value, erase, reset, is_frozen, toggle_freeze), and draws
+the same pips, so the frames' handler code can drive it unchanged.
+
+Run it from the command line to watch computer players play a running
+event on one board and time it:
+    python board.py [numPlayers] [event] [--seed=N]'''
+from tkinter import *
+import sys
+import time
+
+import dice
+import engine
+import solvereroll
+from guidie import GUIDie
+
+DIESIZE = 40     # width of a die on the board, in pixels
+NAMEWIDTH = 160  # room for the player's name and score
+STATES = {'100M':engine.Decath100MState,'400M':engine.Decath400MState,
+          '1500M':engine.Decath1500MState}
+
+class BoardDie:
+    '''a die drawn as a group of items on a DiceBoard'''
+    # the same pips as a GUIDie
+    pipList = GUIDie.pipList
+    pipLocations = GUIDie.pipLocations
+
+    def __init__(self,board,x,y,tag,valueList=[1,2,3,4,5,6],
+                 colorList=['black']*6):
+        '''BoardDie(board,x,y,tag,[valueList,colorList]) -> BoardDie
+        creates a die on board with its top left corner at (x,y)
+          tag is the canvas tag for all of the die's items
+          valueList is the list of values (1,2,3,4,5,6 by default)
+          colorList is the list of colors (all black by default)'''
+        self.board = board
+        self.tag = tag
+        self.valueList = valueList
+        self.colorList = colorList
+        self.top = 1
+        self.rolled = False
+        self.isFrozen = False
+        self.face = board.create_rectangle(x,y,x+DIESIZE,y+DIESIZE,
+                                           fill='white',outline='gray',
+                                           width=2,tags=(tag,))
+        # create the pips for every location once; draw() only shows
+        #  and hides them
+        step = DIESIZE//4
+        radius = DIESIZE//12
+        self.pips = {}
+        for (row,col) in self.pipLocations:
+            (centerx,centery) = (x+step*(col+1),y+step*(row+1))
+            self.pips[(row,col)] = board.create_oval(
+                centerx-radius,centery-radius,centerx+radius,centery+radius,
+                state=HIDDEN,tags=(tag,))
+
+    def get_top(self):
+        '''BoardDie.get_top() -> int
+        returns the value on the die'''
+        return self.valueList[self.top-1]
+
+    def get_value(self):
+        '''BoardDie.get_value() -> int
+        returns the value of the die
+        returns 0 if the die hasn't been rolled yet'''
+        if self.rolled:
+            return self.valueList[self.top-1]
+        return 0
+
+    def roll(self,rng=dice.stream):
+        '''BoardDie.roll([rng])
+        rolls the die, unless it is frozen'''
+        if not self.isFrozen:
+            self.show(rng.randrange(1,7))
+
+    def show(self,top):
+        '''BoardDie.show(top)
+        sets the die to show top and draws it'''
+        self.top = top
+        self.rolled = True
+        self.draw()
+
+    def draw(self):
+        '''BoardDie.draw()
+        draws the pips on the die'''
+        # show the pips for this top and hide the rest
+        shown = self.pipList[self.top-1]
+        color = self.colorList[self.top-1]
+        for location,pip in self.pips.items():
+            if location in shown:
+                self.board.itemconfigure(pip,state=NORMAL,fill=color)
+            else:
+                self.board.itemconfigure(pip,state=HIDDEN)
+
+    def erase(self):
+        '''BoardDie.erase()
+        erases all the pips'''
+        for pip in self.pips.values():
+            self.board.itemconfigure(pip,state=HIDDEN)
+
+    def reset(self):
+        '''BoardDie.reset()
+        unfreezes and erases the die so it can be used again'''
+        if self.isFrozen:
+            self.toggle_freeze()
+        self.top = 1
+        self.rolled = False
+        self.erase()
+
+    def is_frozen(self):
+        '''BoardDie.is_frozen() -> bool
+        returns True if the die is frozen, False otherwise'''
+        return self.isFrozen
+
+    def toggle_freeze(self):
+        '''BoardDie.toggle_freeze()
+        toggles the frozen status'''
+        self.isFrozen = not self.isFrozen
+        if self.isFrozen:
+            self.board.itemconfigure(self.face,fill='gray')
+        else:
+            self.board.itemconfigure(self.face,fill='white')
+
+    def bind_click(self,command):
+        '''BoardDie.bind_click(command)
+        calls command() when the die is clicked'''
+        self.board.tag_bind(self.tag,'<Button-1>',lambda event: command())
+
+class DiceBoard(Canvas):
+    '''one Canvas showing a row of dice for each player'''
+
+    def __init__(self,master,numDice,height=600):
+        '''DiceBoard(master,numDice,[height]) -> DiceBoard
+        creates an empty board with room for numDice dice per player
+        and a scrollbar once the players don't fit in height'''
+        width = NAMEWIDTH+numDice*(DIESIZE+4)
+        Canvas.__init__(self,master,width=width,height=height,bg='white')
+        scrollbar = Scrollbar(master,orient=VERTICAL,command=self.yview)
+        self['yscrollcommand'] = scrollbar.set
+        self.grid(row=0,column=0)
+        scrollbar.grid(row=0,column=1,sticky=N+S)
+        self.numDice = numDice
+        self.boardWidth = width
+        self.rows = []  # (dice,scoreText) for each player
+
+    def add_player(self,name,valueList=[1,2,3,4,5,6],colorList=['black']*6):
+        '''DiceBoard.add_player(name,[valueList,colorList]) -> int
+        adds a row for a player and returns its row number'''
+        row = len(self.rows)
+        y = 4+row*(DIESIZE+8)
+        tag = 'player{}'.format(row)
+        self.create_text(4,y+DIESIZE//4,text=name,anchor=W,
+                         font=('Arial',12),tags=(tag,))
+        scoreText = self.create_text(4,y+3*DIESIZE//4,text='',anchor=W,
+                                     font=('Arial',10),tags=(tag,))
+        rowDice = []
+        for n in range(self.numDice):
+            rowDice.append(BoardDie(self,NAMEWIDTH+n*(DIESIZE+4),y,
+                                    '{}die{}'.format(tag,n),
+                                    valueList,colorList))
+        self.rows.append((rowDice,scoreText))
+        self['scrollregion'] = (0,0,self.boardWidth,y+DIESIZE+8)
+        return row
+
+    def get_dice(self,row):
+        '''DiceBoard.get_dice(row) -> list
+        returns the dice of the player in row'''
+        return self.rows[row][0]
+
+    def set_text(self,row,text):
+        '''DiceBoard.set_text(row,text)
+        sets the score line of the player in row'''
+        self.itemconfigure(self.rows[row][1],text=text)
+
+class RunningBoardPlayer:
+    '''a computer player of a running event, shown on a row of a board'''
+
+    def __init__(self,board,event,name,rng):
+        '''RunningBoardPlayer(board,event,name,rng) -> RunningBoardPlayer
+        adds a player of event ('100M','400M' or '1500M') to board'''
+        self.board = board
+        self.state = STATES[event]()
+        self.rng = rng
+        self.keepTable = solvereroll.solve_event(event)[1]
+        self.row = board.add_player(name,engine.RUNFACES,
+                                    ['black']*5+['red'])
+        self.dice = board.get_dice(self.row)
+        self.show_score()
+
+    def reset(self):
+        '''RunningBoardPlayer.reset()
+        starts a new game on the player's row of the board'''
+        self.state = type(self.state)()
+        for die in self.dice:
+            die.reset()
+        self.show_score()
+
+    def show_score(self):
+        '''RunningBoardPlayer.show_score()
+        updates the score line'''
+        if engine.game_over(self.state):
+            text = 'Score: {}  Game over'.format(self.state.score)
+        else:
+            text = 'Score: {}  Rerolls: {}'.format(self.state.score,
+                                                   self.state.rerolls)
+        self.board.set_text(self.row,text)
+
+    def step(self):
+        '''RunningBoardPlayer.step() -> bool
+        makes the player's next move and returns True if it rolled dice'''
+        state = self.state
+        if state.rolled and (state.rerolls == 0 or
+                             engine.running_value(state) >=
+                             self.keepTable[state.gameround][state.rerolls]):
+            engine.running_keep(state)
+            self.show_score()
+            return False
+        engine.running_roll(state,self.rng)
+        for n in range(state.NUMDICE):
+            self.dice[state.NUMDICE*state.gameround+n].show(state.tops[n])
+        self.show_score()
+        return True
+
+def main(args):
+    numbers = [arg for arg in args if not arg.startswith('--')]
+    numPlayers = int(numbers[0]) if len(numbers) > 0 else 32
+    event = numbers[1] if len(numbers) > 1 else '400M'
+    try:
+        root = Tk()
+    except TclError:
+        print('no display: run this under xvfb-run')
+        return
+    root.title('{} board, {} players'.format(event,numPlayers))
+    stateClass = STATES[event]
+    start = time.perf_counter()
+    board = DiceBoard(root,stateClass.NUMDICE*stateClass.NUMROUNDS)
+    rngs = dice.game_streams(args,numPlayers)
+    players = [RunningBoardPlayer(board,event,'Computer {}'.format(n+1),
+                                  rngs[n])
+               for n in range(numPlayers)]
+    root.update()
+    print('{} players set up in {:.1f} ms'.format(
+        numPlayers,1000*(time.perf_counter()-start)))
+    rollTimes = []
+
+    def tick():
+        # every player still playing makes one move
+        for player in players:
+            if not engine.game_over(player.state):
+                start = time.perf_counter()
+                if player.step():
+                    root.update_idletasks()
+                    rollTimes.append(time.perf_counter()-start)
+        if any(not engine.game_over(player.state) for player in players):
+            root.after(50,tick)
+        else:
+            print('{} rolls, {:.3f} ms per roll update'.format(
+                len(rollTimes),1000*sum(rollTimes)/len(rollTimes)))
+
+    root.after(50,tick)
+    root.mainloop()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
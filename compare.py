@@ -0,0 +1,260 @@
+'''paired comparison of two policies for an event, on common dice
+
+To tell whether one policy beats another, both play every game on the
+same dice.  Game n gives each policy the same block of die tops, with a
+row for each round (or attempt) taken in order, so the k-th die either
+policy rolls in a round comes up the same, and a round starts on the same
+dice however many rerolls the rounds before it took.  The two scores of a
+game are correlated, so the variance of their difference is smaller than
+the sum of their variances, which is what two independent runs would
+have to beat down.  How much smaller depends on how alike the policies
+play: optimal against myopic in 100 or 400 Meters needs 3 to 4 times
+fewer games than independent runs, optimal against timid in 400 Meters
+about 2 times fewer, and in Shot Put common dice gain next to nothing
+for optimal against timid.  With --antithetic each block
+is also played mirrored, every top turned into the one whose value ranks
+the same from the other end (in the running events, where a 6 is worth
+-6, the best top 5 swaps with the worst 6, 4 with 1 and 3 with 2), and a
+game's difference is the mean of the two.  On top of the common dice this
+gains little, as a mirrored game shifts both policies' scores alike: the
+variance per game falls by about a fifth in 100 Meters and Shot Put, and
+by a few percent or less in the other events.
+
+Games are played in batches, and after each batch the mean difference is
+tested; the run stops as soon as it is significant, or as soon as the
+interval is narrower than a tolerance, so that any difference left is too
+small to matter.  Every look at the data is a chance of a false alarm, so
+the confidence of each look is raised to cover all the looks a run could
+take (Bonferroni).
+
+Policies are named as in tournament.py ('optimal', 'timid', 'myopic', and
+'chart' for the chart Decath400MComputerFrame used to play 400 Meters
+by).
+
+Run it from the command line:
+    python compare.py [EVENT] [POLICY] [POLICY] [--seed=N] [--antithetic]
+        [--batch=N] [--max-games=N] [--confidence=P] [--tolerance=X]
+(400M optimal timid by default)'''
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import engine
+import stats
+import tournament
+
+BATCHSIZE = 1000
+MAXGAMES = 1000000
+CONFIDENCE = 0.95
+TOLERANCE = 0.01  # a difference in mean score too small to matter
+
+def block_shape(stateClass):
+    '''block_shape(stateClass) -> (int,int)
+    returns the (rounds or attempts, most dice rolled in one of them) of a
+    game played with states of stateClass, whatever the policy'''
+    if issubclass(stateClass,engine.RunningState):
+        return stateClass.NUMROUNDS, \
+               stateClass.NUMDICE*(stateClass.NUMREROLLS+1)
+    if issubclass(stateClass,engine.DiscusState):
+        # each reroll has at least one die fewer than the roll before
+        return stateClass.NUMATTEMPTS, \
+               stateClass.NUMDICE*(stateClass.NUMDICE+1)//2
+    return stateClass.NUMATTEMPTS,stateClass.NUMDICE
+
+def mirror_tops(stateClass):
+    '''mirror_tops(stateClass) -> ndarray
+    returns the antithetic top of each top (indexed by top, with 0 for 0):
+    the top whose face value ranks the same from the other end'''
+    order = np.argsort(stateClass.FACES,kind='stable')+1  # worst top first
+    mirror = np.zeros(len(order)+1,np.int8)
+    mirror[order] = order[::-1]
+    return mirror
+
+class BlockRNG:
+    '''dice stream that hands out a block of die tops, a row for each
+    round or attempt of a game'''
+    __slots__ = ('block','state','phaseName','phase','_next')
+
+    def __init__(self,block,state):
+        '''BlockRNG(block,state) -> BlockRNG
+        creates a stream of the tops in block for the game with state
+        state; each round (or attempt) of the game rolls the next tops
+        from its own row'''
+        self.block = block
+        self.state = state
+        self.phaseName = 'gameround' if isinstance(
+            state,engine.RunningState) else 'attempt'
+        self.phase = None
+
+    def randrange(self,start,stop):
+        '''BlockRNG.randrange(1,7) -> int
+        returns the next top of the row for the game's round or attempt'''
+        phase = getattr(self.state,self.phaseName)
+        if phase != self.phase:
+            self.phase = phase
+            self._next = iter(self.block[phase-(self.phaseName ==
+                                                'attempt')]).__next__
+        return self._next()
+
+class PairedComparison:
+    '''running paired comparison of policy A against policy B'''
+
+    def __init__(self,maxLooks,confidence=CONFIDENCE,antithetic=False):
+        '''PairedComparison(maxLooks,[confidence,antithetic])
+          -> PairedComparison
+        creates a comparison with no games, to be tested up to maxLooks
+        times with overall confidence confidence
+        antithetic is True if each sample is a game and its mirror'''
+        self.gamesPerSample = 2 if antithetic else 1
+        self.scoresA = stats.Moments()  # of single games
+        self.scoresB = stats.Moments()
+        self.differences = stats.Moments()  # A's score minus B's, per sample
+        # two-sided, with the error rate split over all the looks
+        self.z = statistics.NormalDist().inv_cdf(
+            1-(1-confidence)/(2*maxLooks))
+
+    def add(self,scoresA,scoresB):
+        '''PairedComparison.add(scoresA,scoresB)
+        adds the paired scores of a batch of samples, arrays with a row of
+        scores for each game of a sample'''
+        self.scoresA.add_array(np.ravel(scoresA))
+        self.scoresB.add_array(np.ravel(scoresB))
+        self.differences.add_array(np.mean(scoresA,axis=0)-
+                                   np.mean(scoresB,axis=0))
+
+    def games(self):
+        '''PairedComparison.games() -> int
+        returns the number of games each policy has played'''
+        return self.gamesPerSample*self.differences.count
+
+    def interval(self):
+        '''PairedComparison.interval() -> (float,float)
+        returns the mean difference and the half-width of its confidence
+        interval'''
+        count = self.differences.count
+        return self.differences.mean, \
+               self.z*self.differences.std()/np.sqrt(max(count,1))
+
+    def significant(self):
+        '''PairedComparison.significant() -> bool
+        returns True if the interval doesn't contain 0'''
+        mean,halfWidth = self.interval()
+        return self.differences.count > 1 and abs(mean) > halfWidth
+
+    def settled(self,tolerance=TOLERANCE):
+        '''PairedComparison.settled([tolerance]) -> bool
+        returns True if the difference is significant, or known to within
+        tolerance either way'''
+        return self.significant() or \
+               (self.differences.count > 1 and
+                self.interval()[1] < tolerance)
+
+    def variance_ratio(self):
+        '''PairedComparison.variance_ratio() -> float
+        returns how many times as many games two independent runs would
+        need for the same interval'''
+        return (self.scoresA.variance()+self.scoresB.variance())/ \
+               max(self.gamesPerSample*self.differences.variance(),1e-300)
+
+def play_batch(event,policies,blocks):
+    '''play_batch(event,policies,blocks) -> (ndarray,ndarray)
+    plays a game of event on each block of die tops with each of the two
+    policies and returns the scores of each'''
+    player = tournament.PLAYERS[event]
+    stateClass = tournament.STATES[event]
+    scores = np.empty((2,len(blocks)))
+    for n,block in enumerate(blocks):
+        for p,policy in enumerate(policies):
+            state = stateClass()
+            scores[p,n] = player(state,policy,BlockRNG(block,state))
+    return scores[0],scores[1]
+
+def compare(event,nameA,nameB,seed=0,antithetic=False,batchSize=BATCHSIZE,
+            maxGames=MAXGAMES,confidence=CONFIDENCE,tolerance=TOLERANCE,
+            report=None):
+    '''compare(event,nameA,nameB,[seed,antithetic,batchSize,maxGames,
+               confidence,tolerance,report]) -> PairedComparison
+    plays batches of games of event with the policies named nameA and
+    nameB on common dice, until the difference is significant or known
+    to within tolerance, or maxGames games have been played, and returns
+    the comparison
+      antithetic also plays each game on the mirrored dice
+      report is called with the comparison after each batch'''
+    policies = (tournament.get_policy(event,nameA),
+                tournament.get_policy(event,nameB))
+    shape = block_shape(tournament.STATES[event])
+    mirror = mirror_tops(tournament.STATES[event])
+    blocksPerBatch = batchSize//2 if antithetic else batchSize
+    comparison = PairedComparison(-(-maxGames//batchSize),confidence,
+                                  antithetic)
+    batch = 0
+    while batch*batchSize < maxGames and not comparison.settled(tolerance):
+        rng = np.random.default_rng(np.random.SeedSequence(
+            seed,spawn_key=(batch,)))
+        blocks = rng.integers(1,7,size=(blocksPerBatch,)+shape,dtype=np.int8)
+        scoresA,scoresB = play_batch(event,policies,blocks.tolist())
+        if antithetic:  # each pair of games counts as one sample
+            mirroredA,mirroredB = play_batch(event,policies,
+                                             mirror[blocks].tolist())
+            scoresA = np.stack((scoresA,mirroredA))
+            scoresB = np.stack((scoresB,mirroredB))
+        comparison.add(np.atleast_2d(scoresA),np.atleast_2d(scoresB))
+        batch += 1
+        if report is not None:
+            report(comparison)
+    return comparison
+
+def main(args):
+    names = [arg for arg in args if not arg.startswith('--')]
+    event,nameA,nameB = (names+['400M','optimal','timid'][len(names):])[:3]
+    seed = 0
+    batchSize = BATCHSIZE
+    maxGames = MAXGAMES
+    confidence = CONFIDENCE
+    tolerance = TOLERANCE
+    for arg in args:
+        if arg.startswith('--seed='):
+            seed = int(arg[len('--seed='):])
+        elif arg.startswith('--batch='):
+            batchSize = int(arg[len('--batch='):])
+        elif arg.startswith('--max-games='):
+            maxGames = int(arg[len('--max-games='):])
+        elif arg.startswith('--confidence='):
+            confidence = float(arg[len('--confidence='):])
+        elif arg.startswith('--tolerance='):
+            tolerance = float(arg[len('--tolerance='):])
+    antithetic = '--antithetic' in args
+
+    def report(comparison):
+        mean,halfWidth = comparison.interval()
+        print('{:9,d} games: {} - {} = {:+.4f} +/- {:.4f}'.format(
+            comparison.games(),nameA,nameB,mean,halfWidth))
+
+    print('{} {} against {}, common dice{}, {:.0%} confidence over up to '
+          '{:,} games'.format(event,nameA,nameB,
+                              ' and antithetic' if antithetic else '',
+                              confidence,maxGames))
+    start = time.perf_counter()
+    comparison = compare(event,nameA,nameB,seed,antithetic,batchSize,
+                         maxGames,confidence,tolerance,report)
+    elapsed = time.perf_counter() - start
+    mean,halfWidth = comparison.interval()
+    games = comparison.games()
+    if comparison.significant():
+        print('{} {} {} by {:.4f} +/- {:.4f} after {:,} games ({:.1f} s)'
+              .format(nameA,'beats' if mean > 0 else 'loses to',nameB,
+                      abs(mean),halfWidth,games,elapsed))
+    else:
+        print('no significant difference after {:,} games ({:.1f} s)'.format(
+            games,elapsed))
+    if comparison.differences.variance() == 0:
+        print('the policies scored the same in every game')
+    else:
+        print('independent runs would need about {:,.0f} games for the same '
+              'interval ({:.0f}x)'.format(comparison.variance_ratio()*games,
+                                          comparison.variance_ratio()))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,127 @@
+'''one window for all five events
+
+The launcher asks for the player's name in the window, then shows one
+event at a time: the player's frame and the computer's frame, the same
+ones the event scripts make.  An event's module is only imported the
+first time it is picked, and moving to another event just swaps the
+frames in the same root window, so Tk and the shared GUIDie are only set
+up once.  The status line shows how long the window and each event took
+to appear.
+
+Run it from the command line:
+    python decathlon.py [--seed=N] [--head-to-head] [--instrument] [--log=PATH]'''
+import time
+START = time.perf_counter()  # as early as possible, for time-to-first-frame
+
+from tkinter import *
+import importlib
+import sys
+
+import dice
+import gamelog
+import instrument
+
+# (module, title, player frame class, computer frame class) for each event
+EVENTS = [('100M','100 Meters','Decath100MFrame','Decath100MComputerFrame'),
+          ('400M','400 Meters','Decath400MFrame','Decath400MComputerFrame'),
+          ('1500M','1500 Meters','Decath1500MFrame',
+           'Decath1500MComputerFrame'),
+          ('Discus','Discus','DecathDiscusFrame','DecathDiscusComputerFrame'),
+          ('ShotPut','Shot Put','ShotPutFrame','ShotPutComputerFrame')]
+NUMSTREAMS = 2*len(EVENTS)  # a player and a computer dice stream per event
+
+def event_streams(rngs,n):
+    '''event_streams(rngs,n) -> (DiceRNG,DiceRNG)
+    returns the player's and the computer's dice streams for event
+    number n, from the NUMSTREAMS streams of a session'''
+    return rngs[2*n],rngs[2*n+1]
+
+class DecathlonLauncher(Frame):
+    '''frame that switches between the five events in one window'''
+
+    def __init__(self,master,args):
+        '''DecathlonLauncher(master,args) -> DecathlonLauncher
+        creates the launcher
+        args are the command-line arguments (--seed=N, --head-to-head,
+        --instrument, --log=PATH)'''
+        Frame.__init__(self,master)
+        self.grid()
+        self.headToHead = '--head-to-head' in args
+        self.instrumented = '--instrument' in args
+        self.rngs = dice.game_streams(args,NUMSTREAMS)
+        self.log = gamelog.open_log(args)
+        self.name = ''
+        self.eventFrame = None  # holds the frames of the current event
+        # name entry and event buttons
+        Label(self,text='Name:',font=('Arial',14)).grid(row=0,column=0)
+        self.nameEntry = Entry(self,font=('Arial',14))
+        self.nameEntry.grid(row=0,column=1,columnspan=2,sticky=W)
+        self.nameEntry.bind('<Return>',lambda event: self.show_event(0))
+        self.nameEntry.focus_set()
+        self.eventButtons = []
+        for n,(module,title,playerClass,computerClass) in enumerate(EVENTS):
+            self.eventButtons.append(Button(self,text=title,state=DISABLED,
+                                 command=lambda n=n: self.show_event(n)))
+            self.eventButtons[n].grid(row=1,column=n)
+        self.startButton = Button(self,text='Start',
+                                  command=lambda: self.show_event(0))
+        self.startButton.grid(row=0,column=3)
+        self.statusLabel = Label(self,font=('Arial',10))
+        self.statusLabel.grid(row=2,columnspan=len(EVENTS),sticky=W)
+        # time from startup to the first frame on screen
+        self.update_idletasks()
+        self.firstFrameTime = time.perf_counter() - START
+        self.statusLabel['text'] = 'window ready in {:.0f} ms; enter your ' \
+            'name to start'.format(1000*self.firstFrameTime)
+
+    def show_event(self,n):
+        '''DecathlonLauncher.show_event(n)
+        replaces the current event with event number n'''
+        if self.name == '':
+            self.name = self.nameEntry.get().strip()
+            if self.name == '':
+                return
+            # the name is fixed for the session from now on
+            self.nameEntry['state'] = DISABLED
+            self.startButton.grid_remove()
+            for button in self.eventButtons:
+                button['state'] = ACTIVE
+        start = time.perf_counter()
+        module,title,playerClass,computerClass = EVENTS[n]
+        if self.eventFrame is not None:
+            self.eventFrame.destroy()
+        eventModule = importlib.import_module(module)  # cached after once
+        if self.instrumented:  # time the new event's handlers too
+            for cls in vars(eventModule).values():
+                if isinstance(cls,type) and cls.__module__ == module:
+                    instrument.instrument_class(cls)
+        self.eventFrame = Frame(self)
+        self.eventFrame.grid(row=3,columnspan=len(EVENTS))
+        playerRNG,computerRNG = event_streams(self.rngs,n)
+        playerGame = getattr(eventModule,playerClass)(self.eventFrame,
+                                                      self.name,playerRNG,
+                                                      self.log)
+        if module == '400M' and self.headToHead:
+            computerGame = eventModule.Decath400MHeadToHeadFrame(
+                self.eventFrame,playerGame,computerRNG,self.log)
+        else:
+            computerGame = getattr(eventModule,computerClass)(
+                self.eventFrame,computerRNG,self.log)
+        if module == '400M':  # show the chance of winning
+            playerGame.watch(computerGame)
+        self.master.title('Decathlon: '+title)
+        self.update_idletasks()
+        elapsed = time.perf_counter() - start
+        self.statusLabel['text'] = '{} ready in {:.0f} ms (window in ' \
+            '{:.0f} ms)'.format(title,1000*elapsed,1000*self.firstFrameTime)
+
+def main(args):
+    root = Tk()
+    root.title('Decathlon')
+    if '--instrument' in args:  # time the handlers
+        instrument.install(root,[DecathlonLauncher])
+    DecathlonLauncher(root,args)
+    root.mainloop()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
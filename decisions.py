@@ -0,0 +1,367 @@
+'''how much expected score the players give up, from a game log
+
+For every choice in a logged game (keep or reroll in the running events,
+stop or roll on in Shot Put, stop or freeze and reroll in Discus) this
+looks up, in the solvers' value tables, the expected final score of the
+move that was made and of the best move, and adds up the difference: the
+expected score lost.  It is totalled for each player (human, computer,
+random or head-to-head, as the log records them) in each event, along
+with the state where the most was lost.  The computer frames play the
+best moves, so they should lose nothing; a head-to-head computer gives
+up score to beat its opponent.
+
+The log is read a chunk at a time with gamelog.scan(), and each chunk is
+worked out with array operations, so a log of any size is analyzed in the
+same memory.  A game's records can be spread over several chunks: the
+last record of each unfinished game is carried into the next chunk along
+with the rolls, keeps and high score before it.  A game that has no new
+records in a whole chunk is taken to be abandoned and dropped.
+
+Run it from the command line:
+    python decisions.py [path] [--chunk=records]'''
+import functools
+import sys
+import time
+
+import numpy as np
+
+import advice
+import gamelog
+import solvediscus
+import solvereroll
+import solveshotput
+from gamelog import ROLL,FOUL,KEEP,FREEZE,STOP
+
+# by gamelog player id
+PLAYERS = ('human','computer','random','head-to-head')
+TOLERANCE = 1e-9  # losses below this are ties, not mistakes
+# the running events by event id, with (dice per group, number of groups)
+RUNNING = {gamelog.EVENTS.index(event):sizes
+           for event,sizes in solvereroll.EVENTS.items()}
+SHOTPUT = gamelog.EVENTS.index('ShotPut')
+DISCUS = gamelog.EVENTS.index('Discus')
+# last round (or attempt) of each event, to tell when a game is over
+LASTROUND = np.array([RUNNING[event][1]-1 if event in RUNNING else
+                      solveshotput.NUMATTEMPTS if event == SHOTPUT else
+                      solvediscus.NUMATTEMPTS
+                      for event in range(len(gamelog.EVENTS))])
+
+# lookups by the faces field of a record (0 for no die)
+RUNVALUES = np.array((0,)+solvereroll.RUNFACES)
+DISCUSCODES = np.array([0]+[solvediscus.encode([value])
+                            for value in solvediscus.FACES])
+DIEBITS = 1 << np.arange(gamelog.MAXDICE)
+# number of the die rolled, from a Shot Put dice bitmask
+DIENUMBER = np.array([mask.bit_length() for mask in range(256)])
+
+# the Discus codes of at most NUMDICE dice, numbered from 0
+DISCUSCODELIST = [code for code in range(512)
+                  if solvediscus.CODECOUNT[code] <= solvediscus.NUMDICE]
+CODEINDEX = np.full(512,-1)
+CODEINDEX[DISCUSCODELIST] = np.arange(len(DISCUSCODELIST))
+
+# columns kept for each record: the log fields that are used, then the
+#  rolls, keeps and high score before it, and whether it was carried
+COLUMNS = ('game','event','player','round','action','dice','score','faces')
+
+def num_states(event):
+    '''num_states(event) -> int
+    returns the number of decision states of event (an event id), which
+    number the states in describe_state()'''
+    if event in RUNNING:
+        numDice,numGroups = RUNNING[event]
+        span = numDice*(max(solvereroll.RUNFACES)-min(solvereroll.RUNFACES))
+        return numGroups*(solvereroll.NUMREROLLS+1)*(span+1)
+    if event == SHOTPUT:
+        return solveshotput.NUMATTEMPTS*(solveshotput.NUMDICE+1)* \
+               solveshotput.NUMSCORES**2
+    return solvediscus.NUMATTEMPTS*len(DISCUSCODELIST)**2* \
+           solvediscus.NUMSCORES
+
+def _faces(code):
+    # the scoring faces in a Discus code, highest first
+    return [face for face,count in
+            reversed(list(zip(solvediscus.SCORINGFACES,
+                              solvediscus.decode(code))))
+            for n in range(count)]
+
+def describe_state(event,state):
+    '''describe_state(event,state) -> str
+    returns a description of a decision state of event (an event id)'''
+    if event in RUNNING:
+        numDice,numGroups = RUNNING[event]
+        span = numDice*(max(solvereroll.RUNFACES)-min(solvereroll.RUNFACES))
+        rest,rollValue = divmod(state,span+1)
+        gameround,rerolls = divmod(rest,solvereroll.NUMREROLLS+1)
+        return 'round {}, {} rerolls left, rolled {}'.format(
+            gameround+1,rerolls,rollValue+numDice*min(solvereroll.RUNFACES))
+    if event == SHOTPUT:
+        rest,best = divmod(state,solveshotput.NUMSCORES)
+        rest,score = divmod(rest,solveshotput.NUMSCORES)
+        attempt,dice = divmod(rest,solveshotput.NUMDICE+1)
+        return 'attempt {}, {} dice rolled for {}, best {}'.format(
+            attempt+1,dice,score,best)
+    numCodes = len(DISCUSCODELIST)
+    rest,best = divmod(state,solvediscus.NUMSCORES)
+    rest,rollIndex = divmod(rest,numCodes)
+    attempt,lockedIndex = divmod(rest,numCodes)
+    return 'attempt {}, frozen {}, rolled {}, best {}'.format(
+        attempt+1,
+        '+'.join(map(str,_faces(DISCUSCODELIST[lockedIndex]))) or 'none',
+        '+'.join(map(str,_faces(DISCUSCODELIST[rollIndex]))),2*best)
+
+@functools.lru_cache(maxsize=None)
+def discus_reroll_values():
+    '''discus_reroll_values() -> ndarray
+    returns the expected final high score of freezing the best of the
+    dice just rolled and rerolling, as a table indexed by
+    [attempt-1,CODEINDEX[lockedCode],CODEINDEX[rollCode],best//2]
+    (-inf where nothing can be frozen)'''
+    gameValue,rollValues = solvediscus.solve()
+    numCodes = len(DISCUSCODELIST)
+    table = np.full((solvediscus.NUMATTEMPTS,numCodes,numCodes,
+                     solvediscus.NUMSCORES),-np.inf)
+    for lockedIndex,lockedCode in enumerate(DISCUSCODELIST):
+        for rollIndex,rollCode in enumerate(DISCUSCODELIST):
+            codes = [lockedCode+code for code in solvediscus.SUBSETS[rollCode]]
+            if codes and solvediscus.CODECOUNT[lockedCode]+ \
+               solvediscus.CODECOUNT[rollCode] <= solvediscus.NUMDICE:
+                table[:,lockedIndex,rollIndex] = \
+                    rollValues[:,codes].max(axis=1)
+    table.flags.writeable = False
+    return table
+
+class LossTable:
+    '''expected score lost by one player in one event'''
+
+    def __init__(self,event):
+        '''LossTable(event) -> LossTable
+        creates an empty table for event (an event id)'''
+        self.event = event
+        self.games = 0
+        self.decisions = 0
+        self.mistakes = 0   # decisions that lost anything
+        self.lost = 0.0
+        # expected score lost and decisions made in each state
+        self.stateLost = np.zeros(num_states(event))
+        self.stateDecisions = np.zeros(num_states(event),np.int64)
+
+    def add(self,states,losses):
+        '''LossTable.add(states,losses)
+        adds decisions made in the given states (arrays of state numbers
+        and of the expected score each lost)'''
+        self.decisions += len(losses)
+        self.mistakes += int(np.count_nonzero(losses > TOLERANCE))
+        self.lost += float(losses.sum())
+        self.stateLost += np.bincount(states,losses,len(self.stateLost))
+        self.stateDecisions += np.bincount(states,
+                                           minlength=len(self.stateLost))
+
+    def costliest(self):
+        '''LossTable.costliest() -> (int,float,int)
+        returns (state,lost,decisions) for the state where the most
+        expected score was lost in all'''
+        state = int(np.argmax(self.stateLost))
+        return state,float(self.stateLost[state]), \
+               int(self.stateDecisions[state])
+
+def running_losses(event,rows,columns,rolls,keeps,following):
+    '''running_losses(event,rows,columns,rolls,keeps,following)
+        -> (ndarray,ndarray,ndarray)
+    returns (rows,states,losses) for the keep/reroll choices after the
+    rolls at rows, in a running event (an event id)'''
+    numDice,numGroups = RUNNING[event]
+    values = advice.running_values(gamelog.EVENTS[event])
+    minSum = numDice*min(solvereroll.RUNFACES)
+    span = numDice*(max(solvereroll.RUNFACES)-min(solvereroll.RUNFACES))
+    gameround = columns['round'][rows].astype(np.intp)
+    # the first roll of each round isn't a reroll
+    rerolls = solvereroll.NUMREROLLS-(rolls[rows]-keeps[rows]-1)
+    choice = rerolls > 0  # with none left it has to be kept
+    rows,gameround,rerolls = rows[choice],gameround[choice],rerolls[choice]
+    rollValue = RUNVALUES[columns['faces'][rows,:numDice]].sum(axis=1)
+    keep = rollValue+values[gameround+1,rerolls]
+    reroll = values[gameround,rerolls-1]
+    chosen = np.where(following[rows] == KEEP,keep,reroll)
+    states = (gameround*(solvereroll.NUMREROLLS+1)+rerolls)*(span+1)+ \
+             rollValue-minSum
+    return rows,states,np.maximum(keep,reroll)-chosen
+
+def shotput_losses(rows,columns,best,following):
+    '''shotput_losses(rows,columns,best,following)
+        -> (ndarray,ndarray,ndarray)
+    returns (rows,states,losses) for the stop/roll choices after the
+    rolls at rows, in Shot Put'''
+    gameValue,stopTable,rollTable = solveshotput.solve()
+    dice = DIENUMBER[columns['dice'][rows]]
+    choice = dice < solveshotput.NUMDICE  # with no dice left it has to stop
+    rows,dice = rows[choice],dice[choice]
+    attempt = columns['round'][rows].astype(np.intp)
+    score = columns['score'][rows].astype(np.intp)
+    high = best[rows]
+    stop = gameValue[attempt,np.maximum(score,high)]
+    roll = rollTable[attempt-1,dice,score,high]
+    chosen = np.where(following[rows] == STOP,stop,roll)
+    states = (((attempt-1)*(solveshotput.NUMDICE+1)+dice)*
+              solveshotput.NUMSCORES+score)*solveshotput.NUMSCORES+high
+    return rows,states,np.maximum(stop,roll)-chosen
+
+def discus_losses(rows,columns,best,following):
+    '''discus_losses(rows,columns,best,following)
+        -> (ndarray,ndarray,ndarray)
+    returns (rows,states,losses) for the stop/freeze choices after the
+    rolls at rows, in Discus'''
+    gameValue,rollValues = solvediscus.solve()
+    numDice = solvediscus.NUMDICE
+    allDice = (1 << numDice)-1
+    bits = DIEBITS[:numDice]
+    dieCodes = DISCUSCODES[columns['faces'][rows,:numDice]]
+    rolled = columns['dice'][rows]
+    # the dice frozen before the roll, and before the next one
+    lockedCode = (dieCodes*((~rolled[:,None] & allDice & bits) > 0)).sum(1)
+    rollCode = (dieCodes*((rolled[:,None] & bits) > 0)).sum(1)
+    nextLocked = ~columns['dice'][rows+1] & allDice
+    nextCode = (dieCodes*((nextLocked[:,None] & bits) > 0)).sum(1)
+    attempt = columns['round'][rows].astype(np.intp)
+    high = best[rows]//2
+    stop = gameValue[attempt,
+                     np.maximum(columns['score'][rows]//2,high)]
+    reroll = discus_reroll_values()[attempt-1,CODEINDEX[lockedCode],
+                                    CODEINDEX[rollCode],high]
+    chosen = np.where(following[rows] == STOP,stop,
+                      rollValues[attempt-1,nextCode,high])
+    numCodes = len(DISCUSCODELIST)
+    states = (((attempt-1)*numCodes+CODEINDEX[lockedCode])*numCodes+
+              CODEINDEX[rollCode])*solvediscus.NUMSCORES+high
+    return rows,states,np.maximum(stop,reroll)-chosen
+
+def to_columns(records):
+    '''to_columns(records) -> dict
+    returns the columns of a chunk of log records, leaving out freezes
+    (a Discus choice shows in the roll or stop that follows them)'''
+    records = records[records['action'] != FREEZE]
+    columns = {name:np.asarray(records[name]) for name in COLUMNS}
+    columns['rolls'] = np.zeros(len(records),np.int64)
+    columns['keeps'] = np.zeros(len(records),np.int64)
+    columns['best'] = np.zeros(len(records),np.int64)
+    columns['carried'] = np.zeros(len(records),bool)
+    return columns
+
+def analyze_chunk(columns,tables):
+    '''analyze_chunk(columns,tables) -> dict
+    adds the choices in a chunk of columns (with the records carried from
+    the last chunk first) to tables, a dict of LossTables by
+    (player,event), and returns the columns to carry into the next one'''
+    # group the records by game, keeping them in order within a game
+    if len(columns['game']) == 0:
+        return columns
+    order = np.argsort(columns['game'],kind='stable')
+    columns = {name:values[order] for name,values in columns.items()}
+    game,action = columns['game'],columns['action']
+    starts = np.flatnonzero(np.r_[True,game[1:] != game[:-1]])
+    lengths = np.diff(np.r_[starts,len(game)])
+    segment = np.repeat(np.arange(len(starts)),lengths)
+
+    def game_total(values,before):
+        # running total of values within each game, starting from before
+        total = np.cumsum(values)
+        return total-np.repeat(total[starts]-values[starts]-before[starts],
+                               lengths)
+    rolled = (action == ROLL) | (action == FOUL)
+    rolls = game_total(rolled,columns['rolls'])
+    keeps = game_total(action == KEEP,columns['keeps'])
+    # high score so far: a running max that starts again with each game
+    stops = np.where(action == STOP,columns['score'],0).astype(np.int64)
+    stops[starts] = np.maximum(stops[starts],columns['best'][starts])
+    offset = segment << 8  # bigger than any score
+    best = np.maximum.accumulate(stops+offset)-offset
+    # the choice after a roll shows in the next record of the game
+    hasNext = np.r_[segment[1:] == segment[:-1],False]
+    following = np.r_[action[1:],0]
+    event = columns['event']
+    for eventId in range(len(gamelog.EVENTS)):
+        rows = np.flatnonzero((event == eventId) & (action == ROLL) & hasNext)
+        if eventId in RUNNING:
+            rows,states,losses = running_losses(eventId,rows,columns,rolls,
+                                                keeps,following)
+        elif eventId == SHOTPUT:
+            rows,states,losses = shotput_losses(rows,columns,best,following)
+        else:
+            rows,states,losses = discus_losses(rows,columns,best,following)
+        # the first record of each game not seen before
+        newGames = starts[(event[starts] == eventId) &
+                          ~columns['carried'][starts]]
+        for player in range(len(PLAYERS)):
+            mine = columns['player'][rows] == player
+            numGames = int(np.count_nonzero(
+                columns['player'][newGames] == player))
+            if numGames == 0 and not mine.any():
+                continue
+            if (player,eventId) not in tables:
+                tables[player,eventId] = LossTable(eventId)
+            tables[player,eventId].games += numGames
+            tables[player,eventId].add(states[mine],losses[mine])
+    # carry the last record of each game that is still going
+    last = starts+lengths-1
+    over = (columns['round'][last] == LASTROUND[event[last]]) & \
+           (action[last] == np.where(event[last] < SHOTPUT,KEEP,STOP))
+    idle = (lengths == 1) & columns['carried'][last]
+    last = last[~over & ~idle]
+    carry = {name:values[last] for name,values in columns.items()}
+    carry['rolls'] = rolls[last]-rolled[last]
+    carry['keeps'] = keeps[last]-(action[last] == KEEP)
+    carry['best'] = best[last]
+    carry['carried'][:] = True
+    return carry
+
+def analyze(path,chunkSize=1 << 20):
+    '''analyze(path,[chunkSize]) -> dict
+    returns a LossTable for each (player,event) in the log at path,
+    reading it chunkSize records at a time'''
+    tables = {}
+    carry = to_columns(np.zeros(0,gamelog.RECORD))
+    for chunk in gamelog.scan(path,chunkSize):
+        columns = to_columns(chunk)
+        carry = analyze_chunk({name:np.concatenate((carry[name],values))
+                               for name,values in columns.items()},tables)
+    return tables
+
+def report(tables):
+    '''report(tables) -> str
+    returns a table of the expected score lost by each player in each
+    event, with the costliest state of each'''
+    lines = ['{:12s} {:8s} {:>9s} {:>10s} {:>8s} {:>10s} {:>12s}'.format(
+        'player','event','games','decisions','mistakes','lost/game',
+        'lost/choice')]
+    for player,event in sorted(tables):
+        table = tables[player,event]
+        lines.append('{:12s} {:8s} {:9d} {:10d} {:7.1%} {:10.3f} {:12.4f}'
+                     .format(PLAYERS[player],gamelog.EVENTS[event],
+                             table.games,table.decisions,
+                             table.mistakes/max(table.decisions,1),
+                             table.lost/max(table.games,1),
+                             table.lost/max(table.decisions,1)))
+        state,lost,decisions = table.costliest()
+        if lost > TOLERANCE:
+            lines.append('    costliest: {} ({:.2f} lost over {} '
+                         'decisions)'.format(describe_state(event,state),
+                                             lost,decisions))
+    return '\n'.join(lines)
+
+def main(args):
+    paths = [arg for arg in args if not arg.startswith('--')]
+    path = paths[0] if len(paths) > 0 else 'games.declog'
+    chunkSize = 1 << 20
+    for arg in args:
+        if arg.startswith('--chunk='):
+            chunkSize = int(arg[len('--chunk='):])
+    start = time.perf_counter()
+    tables = analyze(path,chunkSize)
+    elapsed = time.perf_counter() - start
+    print(report(tables))
+    numRecords = len(gamelog.read_log(path))
+    print('analyzed {:,} records in {:.2f} s ({:,.0f} records/s)'.format(
+        numRecords,elapsed,numRecords/elapsed))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,116 @@
+'''seedable dice streams that hand out rolls from pre-generated blocks
+
+A DiceRNG fills a block of die tops (1-6) at a time from a NumPy
+Generator and hands them out one by one, which costs a fraction of a
+random.randrange(1,7) call.  It has a randrange(1,7) method, so it can be
+passed anywhere the engine takes an rng, and array() for vectorized
+simulations that want a whole block of tops at once.
+
+A stream seeded with the same seed always gives the same rolls, so a game
+can be replayed.  spawn() splits a stream into independent substreams,
+one per frame or per worker, whose rolls don't depend on each other.
+The games take --seed=N to replay the same dice.
+
+stream is the shared stream used by GUIDie.roll() and by the engine when
+no rng is given.
+
+Run it from the command line to time a stream against the random module:
+    python dice.py [numRolls]'''
+import random
+import sys
+import time
+
+import numpy as np
+
+BLOCKSIZE = 1 << 16  # rolls made at a time
+
+class DiceRNG:
+    '''a seedable stream of 6-sided die rolls'''
+    __slots__ = ('seedSeq','generator','blockSize','_next')
+
+    def __init__(self,seed=None,blockSize=BLOCKSIZE):
+        '''DiceRNG([seed,blockSize]) -> DiceRNG
+        creates a stream of die rolls
+          seed is an int or a numpy SeedSequence (fresh entropy by default)
+          blockSize is the number of rolls made at a time'''
+        self.blockSize = blockSize
+        self.seed(seed)
+
+    def seed(self,seed=None):
+        '''DiceRNG.seed([seed])
+        restarts the stream from seed'''
+        if not isinstance(seed,np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seedSeq = seed
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self._next = iter(()).__next__  # empty, so the first roll refills
+
+    def _refill(self):
+        # makes the next block of rolls and returns its first roll
+        block = self.generator.integers(1,7,size=self.blockSize,
+                                        dtype=np.uint8)
+        self._next = iter(block.tolist()).__next__
+        return self._next()
+
+    def roll(self):
+        '''DiceRNG.roll() -> int
+        returns the top of one die roll (1-6)'''
+        try:
+            return self._next()
+        except StopIteration:
+            return self._refill()
+
+    def randrange(self,start,stop):
+        '''DiceRNG.randrange(1,7) -> int
+        returns the top of one die roll, like random.randrange(1,7)
+        (no other range is allowed)'''
+        if start != 1 or stop != 7:
+            raise ValueError('DiceRNG only rolls 6-sided dice')
+        try:
+            return self._next()
+        except StopIteration:
+            return self._refill()
+
+    def array(self,shape):
+        '''DiceRNG.array(shape) -> ndarray
+        returns a uint8 array of die tops (1-6) with the given shape,
+        made straight from the generator'''
+        return self.generator.integers(1,7,size=shape,dtype=np.uint8)
+
+    def spawn(self,numStreams):
+        '''DiceRNG.spawn(numStreams) -> list
+        returns numStreams new independent streams made from this one's
+        seed, always the same ones for the same seed'''
+        return [DiceRNG(seedSeq,self.blockSize)
+                for seedSeq in self.seedSeq.spawn(numStreams)]
+
+def game_streams(args,numStreams=2):
+    '''game_streams(args,[numStreams]) -> list
+    returns numStreams independent streams for one game, seeded by a
+    --seed=N argument in args (fresh entropy if there isn't one)'''
+    seed = None
+    for arg in args:
+        if arg.startswith('--seed='):
+            seed = int(arg.split('=',1)[1])
+    return DiceRNG(seed).spawn(numStreams)
+
+stream = DiceRNG()
+
+def main(args):
+    numRolls = int(args[0]) if len(args) > 0 else 1000000
+    rng = DiceRNG(0)
+    for name,randrange in (('random.randrange',random.randrange),
+                           ('DiceRNG.randrange',rng.randrange)):
+        start = time.perf_counter()
+        for n in range(numRolls):
+            randrange(1,7)
+        elapsed = time.perf_counter() - start
+        print('{:18s} {:6.1f} ns/roll'.format(name,1e9*elapsed/numRolls))
+    start = time.perf_counter()
+    rng.array(numRolls)
+    elapsed = time.perf_counter() - start
+    print('{:18s} {:6.1f} ns/roll'.format('DiceRNG.array',
+                                          1e9*elapsed/numRolls))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
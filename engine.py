@@ -0,0 +1,267 @@
+'''rules engine for all five events, with no display attached
+
+Each event keeps its game data in a small __slots__ state object, and the
+rules are plain step functions that change only the state they are given.
+The Tk frames are views over these states, and anything that wants to play
+games without a window (simulations, servers, replays) uses them directly.
+
+Every step function returns True if the move was made, or False (leaving
+the state alone) if the rules don't allow it right now.
+
+Dice are rolled with rng.randrange(1,7), one call per die in die order,
+where rng is the shared dice.stream by default.  Any object with that
+method works, so a random.Random or a dice.DiceRNG seeded the same way
+replays the same game.
+
+Run it from the command line to time the engine:
+    python engine.py [numGames]'''
+import random
+import sys
+import time
+
+import dice
+
+RUNFACES = [1,2,3,4,5,-6]     # die values in the running events
+DISCUSFACES = [0,2,0,4,0,6]   # die values in Discus
+SHOTPUTFACES = [1,2,3,4,5,6]  # die values in Shot Put
+SHOTPUTFOUL = 1               # a Shot Put die showing this fouls
+
+class RunningState:
+    '''game state for a running event (100M, 400M or 1500M)'''
+    __slots__ = ('score','rerolls','gameround','rolled','tops')
+    FACES = RUNFACES
+    NUMDICE = 1     # dice rolled per round
+    NUMROUNDS = 8
+    NUMREROLLS = 5  # rerolls shared by all rounds
+
+    def __init__(self):
+        '''RunningState() -> RunningState
+        creates the state at the start of a game'''
+        self.score = 0
+        self.rerolls = self.NUMREROLLS
+        self.gameround = 0
+        self.rolled = False  # have this round's dice been rolled?
+        self.tops = [1]*self.NUMDICE  # tops of this round's dice
+
+class Decath100MState(RunningState):
+    '''game state for 100 Meters'''
+    __slots__ = ()
+    NUMDICE = 4
+    NUMROUNDS = 2
+
+class Decath400MState(RunningState):
+    '''game state for 400 Meters'''
+    __slots__ = ()
+    NUMDICE = 2
+    NUMROUNDS = 4
+
+class Decath1500MState(RunningState):
+    '''game state for 1500 Meters'''
+    __slots__ = ()
+    NUMDICE = 1
+    NUMROUNDS = 8
+
+class DiscusState:
+    '''game state for Discus'''
+    __slots__ = ('score','attempt','numFrozen','frozen','locked','tops',
+                 'rollFouled')
+    FACES = DISCUSFACES
+    NUMDICE = 5
+    NUMATTEMPTS = 3
+
+    def __init__(self):
+        '''DiscusState() -> DiscusState
+        creates the state at the start of a game'''
+        self.score = 0    # high score
+        self.attempt = 1
+        reset_attempt(self)
+
+class ShotPutState:
+    '''game state for Shot Put'''
+    __slots__ = ('score','attempt','die','attemptscore','rollFouled','tops')
+    FACES = SHOTPUTFACES
+    NUMDICE = 8
+    NUMATTEMPTS = 3
+
+    def __init__(self):
+        '''ShotPutState() -> ShotPutState
+        creates the state at the start of a game'''
+        self.score = 0    # high score
+        self.attempt = 1
+        reset_attempt(self)
+
+def reset_attempt(state):
+    '''reset_attempt(state)
+    clears the dice of a Discus or Shot Put state for a new attempt'''
+    state.tops = [1]*state.NUMDICE
+    state.rollFouled = False
+    if isinstance(state,DiscusState):
+        state.numFrozen = -1  # dice frozen at the last roll, -1 if no roll
+        state.frozen = 0      # bitmask of frozen dice
+        state.locked = 0      # bitmask of dice frozen at the last roll
+    else:
+        state.die = 0         # next die to roll
+        state.attemptscore = 0
+
+def game_over(state):
+    '''game_over(state) -> bool
+    returns True if the game is finished'''
+    if isinstance(state,RunningState):
+        return state.gameround >= state.NUMROUNDS
+    return state.attempt > state.NUMATTEMPTS
+
+def can_stop(state):
+    '''can_stop(state) -> bool
+    returns True if the attempt of a Discus or Shot Put state can be
+    ended right now (not before its first roll)'''
+    if game_over(state):
+        return False
+    if isinstance(state,DiscusState):
+        return state.numFrozen >= 0
+    return state.die > 0 or state.rollFouled
+
+# running events
+
+def running_value(state):
+    '''running_value(state) -> int
+    returns the sum of the dice rolled this round'''
+    return sum([state.FACES[top-1] for top in state.tops])
+
+def running_roll(state,rng=dice.stream):
+    '''running_roll(state,[rng]) -> bool
+    rolls the dice for this round, spending a reroll if they were
+    already rolled'''
+    if state.gameround >= state.NUMROUNDS:
+        return False
+    if state.rolled:
+        if state.rerolls == 0:
+            return False
+        state.rerolls -= 1
+    state.rolled = True
+    state.tops = [rng.randrange(1,7) for n in range(state.NUMDICE)]
+    return True
+
+def running_keep(state):
+    '''running_keep(state) -> bool
+    adds this round's dice to the score and moves to the next round'''
+    if not state.rolled:
+        return False
+    state.score += running_value(state)
+    state.gameround += 1
+    state.rolled = False
+    return True
+
+# Discus
+
+def discus_attempt_score(state):
+    '''discus_attempt_score(state) -> int
+    returns the score the attempt would get if stopped now'''
+    if state.rollFouled:
+        return 0
+    return sum([state.FACES[top-1] for top in state.tops])
+
+def discus_can_freeze(state,n):
+    '''discus_can_freeze(state,n) -> bool
+    returns True if die n can be frozen or unfrozen right now'''
+    return state.numFrozen >= 0 and not state.rollFouled and \
+           not state.locked & (1 << n) and state.FACES[state.tops[n]-1] > 0
+
+def discus_freeze(state,n):
+    '''discus_freeze(state,n) -> bool
+    freezes die n, or unfreezes it if it was frozen since the last roll'''
+    if state.attempt > state.NUMATTEMPTS or not discus_can_freeze(state,n):
+        return False
+    state.frozen ^= 1 << n
+    return True
+
+def discus_roll(state,rng=dice.stream):
+    '''discus_roll(state,[rng]) -> bool
+    rolls the dice that aren't frozen
+    after the first roll of an attempt, another die must be frozen first'''
+    if state.attempt > state.NUMATTEMPTS or state.rollFouled:
+        return False
+    currentlyFrozen = bin(state.frozen).count('1')
+    if currentlyFrozen <= state.numFrozen:
+        return False  # need to freeze a die before can roll
+    rollFouled = True
+    for n in range(state.NUMDICE):
+        if not state.frozen & (1 << n):
+            state.tops[n] = rng.randrange(1,7)
+            if state.FACES[state.tops[n]-1] > 0:
+                rollFouled = False  # found a good die
+    state.numFrozen = currentlyFrozen
+    state.locked = state.frozen
+    state.rollFouled = rollFouled
+    return True
+
+def discus_stop(state):
+    '''discus_stop(state) -> bool
+    ends the attempt, keeping its score if it's a new high score'''
+    if not can_stop(state):
+        return False
+    state.score = max(state.score,discus_attempt_score(state))
+    state.attempt += 1
+    reset_attempt(state)
+    return True
+
+# Shot Put
+
+def shotput_roll(state,rng=dice.stream):
+    '''shotput_roll(state,[rng]) -> bool
+    rolls the next die of the attempt'''
+    if state.attempt > state.NUMATTEMPTS or state.rollFouled or \
+       state.die == state.NUMDICE:
+        return False
+    top = rng.randrange(1,7)
+    state.tops[state.die] = top
+    if state.FACES[top-1] == SHOTPUTFOUL:
+        state.rollFouled = True
+    else:
+        state.attemptscore += state.FACES[top-1]
+        state.die += 1
+    return True
+
+def shotput_stop(state):
+    '''shotput_stop(state) -> bool
+    ends the attempt, keeping its score if it's a new high score'''
+    if not can_stop(state):
+        return False
+    if not state.rollFouled:
+        state.score = max(state.score,state.attemptscore)
+    state.attempt += 1
+    reset_attempt(state)
+    return True
+
+def main(args):
+    numGames = int(args[0]) if len(args) > 0 else 100000
+    rng = dice.DiceRNG(0)      # rolls the dice
+    choices = random.Random(0)  # picks the moves
+    for stateClass in (Decath100MState,Decath400MState,Decath1500MState,
+                       DiscusState,ShotPutState):
+        steps = 0
+        start = time.perf_counter()
+        for game in range(numGames):
+            state = stateClass()
+            # play at random through the legal moves
+            while not game_over(state):
+                if isinstance(state,RunningState):
+                    if not (choices.random() < 0.5 and
+                            running_roll(state,rng)):
+                        if not running_keep(state):
+                            running_roll(state,rng)
+                elif isinstance(state,DiscusState):
+                    if choices.random() < 0.3 or not discus_roll(state,rng):
+                        # freeze the first die we can, or else stop
+                        if not any(discus_freeze(state,n)
+                                   for n in range(state.NUMDICE)):
+                            discus_stop(state)
+                else:
+                    if choices.random() < 0.2 or not shotput_roll(state,rng):
+                        shotput_stop(state)
+                steps += 1
+        elapsed = time.perf_counter() - start
+        print('{:16s} {:9,.0f} steps/sec'.format(stateClass.__name__,
+                                                 steps/elapsed))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,275 @@
+'''in-memory stand-in for the parts of tkinter the game frames use
+
+Tk, Frame, Label, Button, Entry and Canvas here keep their options in a
+dict and do nothing else: no display, no Tcl interpreter, so frames can
+be made and clicked through at full Python speed (see fuzz.py).  A
+widget remembers whether it is gridded, so tests can tell which buttons
+a player could actually see and click, and Canvas items are kept as
+dicts of their options.  after() callbacks are queued and run by
+update() or mainloop().
+
+install() puts this module in place of tkinter; it must be called before
+the frame modules (or guidie) are imported, since they bind the names
+with "from tkinter import *".'''
+import sys
+
+__all__ = ['N','S','E','W','NW','NE','SW','SE','LEFT','RIGHT','TOP','BOTTOM',
+           'CENTER','X','Y','BOTH','NORMAL','ACTIVE','DISABLED','HIDDEN',
+           'GROOVE','RAISED','SUNKEN','FLAT','RIDGE','END','VERTICAL',
+           'HORIZONTAL','TclError','Misc','Tk','Frame','Label','Scrollbar',
+           'Button','Entry','Canvas']
+
+# the tkinter constants the frames use
+N,S,E,W = 'n','s','e','w'
+NW,NE,SW,SE = 'nw','ne','sw','se'
+LEFT,RIGHT,TOP,BOTTOM,CENTER = 'left','right','top','bottom','center'
+X,Y,BOTH = 'x','y','both'
+NORMAL,ACTIVE,DISABLED,HIDDEN = 'normal','active','disabled','hidden'
+GROOVE,RAISED,SUNKEN,FLAT,RIDGE = 'groove','raised','sunken','flat','ridge'
+END,VERTICAL,HORIZONTAL = 'end','vertical','horizontal'
+
+class TclError(Exception):
+    '''raised for a bad widget operation, as tkinter does'''
+    pass
+
+class Misc:
+    '''base of all the widgets: options, geometry and the event queue'''
+
+    def __init__(self,master=None,cnf={},**options):
+        '''Misc([master],**options) -> Misc
+        creates a widget under master with the given options'''
+        self.master = master
+        self.options = dict(cnf,**options)
+        self.gridded = False
+        self.gridOptions = {}
+        self.children = []
+        self.bindings = {}
+        self.root = self if master is None else master.root
+        if master is not None:
+            master.children.append(self)
+
+    def __getitem__(self,key):
+        return self.options.get(key,'')
+
+    def __setitem__(self,key,value):
+        self.options[key] = value
+
+    def configure(self,cnf={},**options):
+        '''Misc.configure(**options)
+        sets options'''
+        self.options.update(cnf,**options)
+
+    config = configure
+
+    def cget(self,key):
+        '''Misc.cget(key) -> value
+        returns an option'''
+        return self.options.get(key,'')
+
+    def grid(self,cnf={},**options):
+        '''Misc.grid(**options)
+        shows the widget; like Tk, options not given keep the values it
+        was last gridded with'''
+        self.gridded = True
+        self.gridOptions = dict(self.gridOptions,**cnf,**options)
+
+    def grid_remove(self):
+        '''Misc.grid_remove()
+        hides the widget, remembering where it was'''
+        self.gridded = False
+
+    def grid_forget(self):
+        '''Misc.grid_forget()
+        hides the widget and forgets where it was'''
+        self.gridded = False
+        self.gridOptions = {}
+
+    pack = grid
+    pack_forget = grid_forget
+
+    def bind(self,sequence,function,add=None):
+        '''Misc.bind(sequence,function)
+        remembers function as the handler for sequence'''
+        self.bindings[sequence] = function
+
+    def bind_all(self,sequence,function,add=None):
+        '''Misc.bind_all(sequence,function)
+        remembers function as the handler for sequence on the root'''
+        self.root.bindings[sequence] = function
+
+    def after(self,ms,function=None,*args):
+        '''Misc.after(ms,function,*args) -> int
+        queues function(*args) to run on the next update()'''
+        self.root.queue.append((function,args))
+        return len(self.root.queue)
+
+    def after_idle(self,function,*args):
+        '''Misc.after_idle(function,*args) -> int
+        queues function(*args) to run on the next update()'''
+        return self.after(0,function,*args)
+
+    def update(self):
+        '''Misc.update()
+        runs the queued callbacks, including any they queue'''
+        queue = self.root.queue
+        while queue:
+            function,args = queue.pop(0)
+            function(*args)
+
+    def update_idletasks(self):
+        '''Misc.update_idletasks()
+        does nothing, as there is nothing to draw'''
+
+    def focus_set(self):
+        '''Misc.focus_set()
+        does nothing'''
+
+    def winfo_children(self):
+        '''Misc.winfo_children() -> list
+        returns the widgets made under this one that still exist'''
+        return list(self.children)
+
+    def destroy(self):
+        '''Misc.destroy()
+        removes the widget and everything under it'''
+        for child in list(self.children):
+            child.destroy()
+        if self.master is not None and self in self.master.children:
+            self.master.children.remove(self)
+
+class Tk(Misc):
+    '''root window'''
+
+    def __init__(self,*args,**options):
+        '''Tk() -> Tk
+        creates a root window'''
+        self.queue = []  # (function,args) queued by after()
+        Misc.__init__(self)
+
+    def title(self,text=None):
+        '''Tk.title([text]) -> str
+        sets or returns the window title'''
+        if text is not None:
+            self.options['title'] = text
+        return self.options.get('title','')
+
+    def mainloop(self,n=0):
+        '''Tk.mainloop()
+        runs the queued callbacks until there are none'''
+        self.update()
+
+class Frame(Misc):
+    '''frame widget'''
+    pass
+
+class Label(Misc):
+    '''label widget'''
+    pass
+
+class Scrollbar(Misc):
+    '''scrollbar widget'''
+    pass
+
+class Button(Misc):
+    '''button widget'''
+
+    def invoke(self):
+        '''Button.invoke() -> value
+        calls the command, unless the button is disabled'''
+        command = self.options.get('command')
+        if self.options.get('state') != DISABLED and command is not None:
+            return command()
+
+class Entry(Misc):
+    '''one-line text entry widget'''
+
+    def __init__(self,master=None,cnf={},**options):
+        '''Entry([master],**options) -> Entry
+        creates an empty entry'''
+        Misc.__init__(self,master,cnf,**options)
+        self.text = ''
+
+    def get(self):
+        '''Entry.get() -> str
+        returns the text'''
+        return self.text
+
+    def insert(self,index,text):
+        '''Entry.insert(index,text)
+        inserts text (at the end, whatever index is)'''
+        self.text += text
+
+    def delete(self,first,last=None):
+        '''Entry.delete(first,[last])
+        clears the text'''
+        self.text = ''
+
+class Canvas(Misc):
+    '''canvas widget, holding its items as dicts of options'''
+
+    def __init__(self,master=None,cnf={},**options):
+        '''Canvas([master],**options) -> Canvas
+        creates an empty canvas'''
+        Misc.__init__(self,master,cnf,**options)
+        self.items = {}
+        self.nextItem = 1
+
+    def _create(self,kind,coords,options):
+        # adds an item and returns its id
+        item = self.nextItem
+        self.nextItem += 1
+        self.items[item] = dict(options,kind=kind,coords=coords)
+        return item
+
+    def create_oval(self,*coords,**options):
+        '''Canvas.create_oval(*coords,**options) -> int
+        adds an oval item'''
+        return self._create('oval',coords,options)
+
+    def create_rectangle(self,*coords,**options):
+        '''Canvas.create_rectangle(*coords,**options) -> int
+        adds a rectangle item'''
+        return self._create('rectangle',coords,options)
+
+    def create_line(self,*coords,**options):
+        '''Canvas.create_line(*coords,**options) -> int
+        adds a line item'''
+        return self._create('line',coords,options)
+
+    def create_text(self,*coords,**options):
+        '''Canvas.create_text(*coords,**options) -> int
+        adds a text item'''
+        return self._create('text',coords,options)
+
+    def itemconfigure(self,item,cnf={},**options):
+        '''Canvas.itemconfigure(item,**options)
+        sets options of an item'''
+        if item not in self.items:
+            raise TclError('no item {}'.format(item))
+        self.items[item].update(cnf,**options)
+
+    itemconfig = itemconfigure
+
+    def itemcget(self,item,key):
+        '''Canvas.itemcget(item,key) -> value
+        returns an option of an item'''
+        return self.items[item].get(key,'')
+
+    def find_all(self):
+        '''Canvas.find_all() -> tuple
+        returns the ids of all the items'''
+        return tuple(self.items)
+
+    def delete(self,*items):
+        '''Canvas.delete(*items)
+        removes the given items (or every item, for the tag "all")'''
+        if 'all' in items:
+            self.items.clear()
+        for item in items:
+            self.items.pop(item,None)
+
+def install():
+    '''install()
+    makes "import tkinter" give this module
+    call it before importing the frame modules'''
+    sys.modules['tkinter'] = sys.modules[__name__]
@@ -0,0 +1,368 @@
+'''fuzzer for the event frames, clicking at random on an in-memory Tk
+
+Each sequence plays on one of the ten frames (the player's and the
+computer's for each event) on faketk instead of a real display, clicks
+random buttons among those a player could click (shown and not
+disabled) until the game is over, then clicks whatever is still
+clickable.  Each process makes each frame once and starts every later
+sequence on it with the frame's reset(), which is quicker than building
+the widgets again; a frame whose sequence failed is thrown away.  After
+every click the frame is checked against its state and against a model
+built from the moves the frame logged:
+    no handler raises
+    rerolls stay between 0 and NUMREROLLS, and are the ones spent
+    a running score is the sum of the kept dice shown, and so is its label
+    a high score is the best attempt stopped on, and so is its label
+    a Discus reroll always has more dice frozen than the roll before it,
+      and the dice shown frozen are the frozen ones
+    a Shot Put roll fouls exactly when the die comes up 1, and the
+      attempt score is the sum of the dice rolled
+    a game that isn't over always has a button to click
+    clicks after the game is over change nothing
+    the frame reset at the end looks the same as a new one
+A sequence is replayed from its seed (dice and clicks) and the list of
+click choices, so a failing one is shrunk by dropping choices while it
+still fails the same way, and reported with the buttons it clicks.
+Sequences run in a pool of processes.
+
+Python-level frames are slow to click through: a sequence takes some
+hundreds of microseconds, so one process runs on the order of a hundred
+thousand sequences a minute, and a million a minute takes ten or so
+cores.  main() prints the rate it got.
+
+Run it from the command line:
+    python fuzz.py [numSequences] [--seed=N] [--processes=N]'''
+import faketk
+faketk.install()  # before anything binds the tkinter names
+
+import importlib
+import multiprocessing
+import os
+import random
+import sys
+import time
+import traceback
+
+import decathlon
+import dice
+import engine
+import gamelog
+import gameserver
+
+# (module, frame class) for each frame, player then computer per event
+KINDS = [(module,frameClass)
+         for module,title,playerClass,computerClass in decathlon.EVENTS
+         for frameClass in (playerClass,computerClass)]
+MAXCLICKS = 500  # a Discus player can freeze and unfreeze forever
+BATCHSIZE = 200  # sequences per task handed to a worker process
+DICEBLOCK = 256  # rolls made at a time; most sequences roll fewer
+
+_root = None  # each process's faketk root window
+# each process's frame of each kind, with how it looked new and its buttons
+_frames = {}
+
+class Recorder(gamelog.NoLog):
+    '''stand-in for a GameLog that keeps a model of the game from the
+    moves logged to it'''
+
+    def __init__(self):
+        '''Recorder() -> Recorder
+        creates a recorder with no moves'''
+        self.rerollsSpent = 0
+        self.rolledThisRound = False
+        self.keeps = 0
+        self.attemptScores = []  # scores of the attempts stopped on
+        self.numFrozen = -1      # dice frozen at the last Discus roll
+        self.rollSum = 0         # Shot Put dice rolled this attempt
+        self.problem = None      # first bad move logged
+
+    def roll(self,game,player,state):
+        '''Recorder.roll(game,player,state)
+        checks and records a roll'''
+        if isinstance(state,engine.RunningState):
+            if self.rolledThisRound:
+                self.rerollsSpent += 1
+            self.rolledThisRound = True
+        elif isinstance(state,engine.DiscusState):
+            if state.numFrozen <= self.numFrozen:
+                self.fail('reroll without freezing another die')
+            self.numFrozen = state.numFrozen
+        else:
+            top = state.tops[state.die if state.rollFouled else state.die-1]
+            if state.rollFouled != (top == engine.SHOTPUTFOUL):
+                self.fail('foul on a {}'.format(top))
+            if not state.rollFouled:
+                self.rollSum += state.FACES[top-1]
+
+    def keep(self,game,player,state):
+        '''Recorder.keep(game,player,state)
+        records a keep'''
+        self.rolledThisRound = False
+        self.keeps += 1
+
+    def stop(self,game,player,state):
+        '''Recorder.stop(game,player,state)
+        records the score of the attempt being stopped'''
+        self.attemptScores.append(gamelog.state_fields(state,
+                                                       gamelog.STOP)[1])
+        self.numFrozen = -1
+        self.rollSum = 0
+
+    def fail(self,message):
+        '''Recorder.fail(message)
+        remembers message, if it is the first problem'''
+        if self.problem is None:
+            self.problem = message
+
+def all_buttons(widget):
+    '''all_buttons(widget) -> list
+    returns every button under widget, in the order they were made'''
+    found = []
+    for child in widget.children:
+        if isinstance(child,faketk.Button):
+            found.append(child)
+        elif isinstance(child,faketk.Frame):
+            found += all_buttons(child)
+    return found
+
+def buttons(widget,allButtons=None):
+    '''buttons(widget,[allButtons]) -> list
+    returns the buttons under widget that can be clicked, in the order
+    they were made
+      allButtons is all_buttons(widget), to save finding them again'''
+    if allButtons is None:
+        allButtons = all_buttons(widget)
+    return [button for button in allButtons
+            if button.gridded and button['state'] != faketk.DISABLED]
+
+def snapshot(state):
+    '''snapshot(state) -> tuple
+    returns a copy of the fields of state'''
+    return tuple(repr(getattr(state,name))
+                 for name in gameserver.FIELDS[type(state)])
+
+def view(widget):
+    '''view(widget) -> list
+    returns what can be seen of widget and everything under it: each
+    widget's options, where it is gridded, and its canvas items shown'''
+    options = dict(widget.options)
+    if options.get('state',faketk.NORMAL) == faketk.ACTIVE:
+        options['state'] = faketk.NORMAL  # only differs under the mouse
+    options.setdefault('state',faketk.NORMAL)
+    where = None
+    if widget.gridded:
+        where = (widget.gridOptions.get('row'),
+                 widget.gridOptions.get('column',0),
+                 widget.gridOptions.get('columnspan',1))
+    shown = None
+    if isinstance(widget,faketk.Canvas):
+        shown = [(item['kind'],item['coords'],item.get('fill'))
+                 for item in widget.items.values()
+                 if item.get('state') != faketk.HIDDEN]
+    seen = [(type(widget).__name__,options,where,shown)]
+    for child in widget.children:
+        seen += view(child)
+    return seen
+
+def check(frame,recorder,clickable=None):
+    '''check(frame,recorder,[clickable]) -> str or None
+    returns the first invariant frame breaks, or None
+      clickable is buttons(frame), to save finding them again'''
+    state = frame.state
+    if recorder.problem is not None:
+        return recorder.problem
+    if clickable is None:
+        clickable = buttons(frame)
+    over = engine.game_over(state)
+    if not over and len(clickable) == 0:
+        return 'no button to click before the game is over'
+    if isinstance(state,engine.RunningState):
+        if not 0 <= state.rerolls <= state.NUMREROLLS:
+            return 'rerolls out of range'
+        if state.rerolls != state.NUMREROLLS-recorder.rerollsSpent:
+            return 'rerolls are not the ones left'
+        if frame.rerollLabel['text'] not in \
+           ('Rerolls: {}'.format(state.rerolls),'Game over'):
+            return 'rerolls label wrong'
+        if state.gameround != recorder.keeps:
+            return 'round is not the number of keeps'
+        kept = sum([frame.dice[n].get_value()
+                    for n in range(state.NUMDICE*state.gameround)])
+        if state.score != kept:
+            return 'score is not the sum of the kept dice'
+        if frame.scoreLabel['text'] != 'Score: {}'.format(state.score):
+            return 'score label wrong'
+        return None
+    if state.score != max(recorder.attemptScores,default=0):
+        return 'high score is not the best attempt'
+    if frame.scoreLabel['text'] != 'High Score: {}'.format(state.score):
+        return 'high score label wrong'
+    if isinstance(state,engine.DiscusState):
+        if not over and any(frame.dice[n].is_frozen() !=
+                            bool(state.frozen & (1 << n))
+                            for n in range(state.NUMDICE)):
+            return 'frozen dice shown wrong'
+    elif state.attemptscore != recorder.rollSum:
+        return 'attempt score is not the sum of the dice rolled'
+    return None
+
+def run_sequence(kind,seed,choices=None,maxClicks=MAXCLICKS):
+    '''run_sequence(kind,seed,[choices,maxClicks]) -> (list,list,str)
+    plays one sequence on a frame of KINDS[kind] and returns (the
+    click choices, the labels of the buttons clicked, the first invariant
+    broken or None)
+    the dice come from seed; each click picks button number
+    choice % (number clickable), with the choices from seed too unless
+    they are given'''
+    global _root
+    if _root is None:
+        _root = faketk.Tk()
+    rng = dice.DiceRNG(seed,DICEBLOCK)
+    picker = None
+    if choices is None:
+        picker = random.Random(seed)
+        choices = []
+    recorder = Recorder()
+    labels = []
+    frame = None
+    passed = False  # True if the frame can be reset for another sequence
+    try:
+        if kind in _frames:
+            frame,newView,frameButtons = _frames.pop(kind)
+            frame.rng = rng
+            frame.log = recorder
+        else:
+            module,frameClass = KINDS[kind]
+            frameClass = getattr(importlib.import_module(module),frameClass)
+            if frameClass.PLAYER == gamelog.HUMAN:
+                frame = frameClass(_root,'Fuzz',rng,recorder)
+            else:
+                frame = frameClass(_root,rng,recorder)
+            newView = view(frame)
+            frameButtons = all_buttons(frame)
+        clickable = buttons(frame,frameButtons)
+        clicks = 0
+        while not engine.game_over(frame.state):
+            if picker is not None:
+                if clicks == maxClicks:
+                    break
+                choices.append(picker.randrange(1 << 16))
+            elif clicks == len(choices):
+                break
+            button = clickable[choices[clicks] % len(clickable)]
+            clicks += 1
+            labels.append(button['text'])
+            button.invoke()
+            clickable = buttons(frame,frameButtons)
+            failure = check(frame,recorder,clickable)
+            if failure is not None:
+                return choices[:clicks],labels,failure
+        if engine.game_over(frame.state):
+            # nothing left to click should do anything
+            before = snapshot(frame.state)
+            for button in clickable:
+                labels.append(button['text'])
+                button.invoke()
+                if snapshot(frame.state) != before:
+                    return choices,labels,'click after the game is over'
+        frame.reset()  # for the next sequence
+        if view(frame) != newView:
+            return choices,labels,'reset frame differs from a new one'
+        passed = True
+        return choices,labels,None
+    except Exception:
+        # where it went wrong, innermost first
+        fileName,line,function,text = traceback.extract_tb(
+            sys.exc_info()[2])[-1]
+        return choices[:len(labels)],labels,'{}: {} at {}:{}'.format(
+            sys.exc_info()[0].__name__,sys.exc_info()[1],
+            os.path.basename(fileName),line)
+    finally:
+        _root.queue.clear()
+        if passed:  # keep the frame for the next sequence
+            _frames[kind] = (frame,newView,frameButtons)
+        elif frame is not None:
+            frame.destroy()
+
+def fuzz_batch(seeds):
+    '''fuzz_batch(seeds) -> (int,int,list)
+    runs a sequence for each seed, of kind seed % len(KINDS), and returns
+    (sequences run, clicks made, failures as (kind,seed,choices,failure))'''
+    numClicks = 0
+    failures = []
+    for seed in seeds:
+        kind = seed % len(KINDS)
+        choices,labels,failure = run_sequence(kind,seed)
+        numClicks += len(labels)
+        if failure is not None:
+            failures.append((kind,seed,choices,failure))
+    return len(seeds),numClicks,failures
+
+def minimize(kind,seed,choices,failure):
+    '''minimize(kind,seed,choices,failure) -> list
+    returns a short list of choices that still breaks the same invariant
+    from seed: chunks of choices are dropped while it still fails (delta
+    debugging), then each choice left is made 0 (the first button) if it
+    can be'''
+    def fails(candidate):
+        return run_sequence(kind,seed,candidate)[2] == failure
+
+    numChunks = 2
+    while len(choices) >= 2:
+        size = -(-len(choices)//numChunks)
+        for start in range(0,len(choices),size):
+            candidate = choices[:start]+choices[start+size:]
+            if fails(candidate):
+                choices = candidate
+                numChunks = max(numChunks-1,2)
+                break
+        else:
+            if numChunks >= len(choices):
+                break
+            numChunks = min(2*numChunks,len(choices))
+    for n in range(len(choices)):
+        if choices[n] != 0 and fails(choices[:n]+[0]+choices[n+1:]):
+            choices = choices[:n]+[0]+choices[n+1:]
+    return choices
+
+def main(args):
+    numSequences = 20000
+    firstSeed = 0
+    numProcesses = os.cpu_count()
+    for arg in args:
+        if arg.startswith('--seed='):
+            firstSeed = int(arg[len('--seed='):])
+        elif arg.startswith('--processes='):
+            numProcesses = int(arg[len('--processes='):])
+        elif not arg.startswith('--'):
+            numSequences = int(arg)
+    batches = [range(start,min(start+BATCHSIZE,firstSeed+numSequences))
+               for start in range(firstSeed,firstSeed+numSequences,
+                                  BATCHSIZE)]
+    totalSequences = totalClicks = 0
+    failures = {}  # first failing sequence for each kind and invariant
+    start = time.perf_counter()
+    with multiprocessing.Pool(numProcesses) as pool:
+        for numRun,numClicks,batchFailures in \
+                pool.imap_unordered(fuzz_batch,batches):
+            totalSequences += numRun
+            totalClicks += numClicks
+            for kind,seed,choices,failure in batchFailures:
+                failures.setdefault((kind,failure),(seed,choices))
+    elapsed = time.perf_counter() - start
+    print('{:,} sequences, {:,} clicks in {:.1f} s on {} processes'.format(
+        totalSequences,totalClicks,elapsed,numProcesses))
+    print('{:,.0f} sequences/min, {:,.0f} clicks/s'.format(
+        60*totalSequences/elapsed,totalClicks/elapsed))
+    for (kind,failure),(seed,choices) in sorted(failures.items()):
+        choices = minimize(kind,seed,choices,failure)
+        labels = run_sequence(kind,seed,choices)[1]
+        print('\n{} {}: {}'.format(KINDS[kind][1],'seed={}'.format(seed),
+                                   failure))
+        print('  choices {}'.format(choices))
+        print('  clicks  {}'.format(' '.join(labels)))
+    if len(failures) == 0:
+        print('no invariant broken')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
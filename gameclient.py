@@ -0,0 +1,187 @@
+'''client for gameserver.py, and a load generator for it
+
+GameClient sends request lines over one connection and hands back the
+replies.  Requests from any number of coroutines can be in flight on a
+connection at once: the server answers a connection's requests in order,
+so each reply goes to the oldest request still waiting.
+
+Run it from the command line to play random games on a server at
+growing numbers of games at once, and report games/s and action latency
+at each:
+    python gameclient.py [--port=N | --unix=PATH] [--games=N]
+        [--levels=1,10,100,1000] [--connections=N]
+With no address it starts a server of its own on a Unix socket.'''
+import asyncio
+import collections
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import engine
+import gameserver
+
+MAXCONNECTIONS = 64  # connections the load generator spreads games over
+LEVELS = (1,10,100,1000)
+
+class GameClient:
+    '''connection to a game server'''
+
+    def __init__(self,reader,writer):
+        '''GameClient(reader,writer) -> GameClient
+        creates a client on an open connection; use connect() instead'''
+        self.reader = reader
+        self.writer = writer
+        self.waiting = collections.deque()  # futures for the replies
+        self.readTask = asyncio.ensure_future(self.read_replies())
+
+    @classmethod
+    async def connect(cls,args):
+        '''GameClient.connect(args) -> GameClient
+        connects to the server at the address in the command-line
+        arguments args (--port=N or --unix=PATH, or gameserver.PORT)'''
+        for arg in args:
+            if arg.startswith('--unix='):
+                return cls(*await asyncio.open_unix_connection(
+                    arg[len('--unix='):]))
+        port = gameserver.PORT
+        for arg in args:
+            if arg.startswith('--port='):
+                port = int(arg[len('--port='):])
+        return cls(*await asyncio.open_connection('127.0.0.1',port))
+
+    async def read_replies(self):
+        '''GameClient.read_replies()
+        passes each reply to the request waiting for it'''
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            self.waiting.popleft().set_result(json.loads(line))
+        for future in self.waiting:  # the server went away
+            future.set_exception(ConnectionError('server disconnected'))
+
+    async def request(self,line):
+        '''GameClient.request(line) -> dict
+        sends a request line and returns the server's reply'''
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append(future)
+        self.writer.write(line.encode()+b'\n')
+        return await future
+
+    async def close(self):
+        '''GameClient.close()
+        closes the connection'''
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.readTask
+
+def random_move(reply,choices):
+    '''random_move(reply,choices) -> list
+    returns a random legal next move for the state in a server reply, as
+    the request lines to send (a Discus freeze comes with its roll)
+    choices picks the moves'''
+    game = reply['game']
+    event = reply['event']
+    if event == 'Discus':
+        if reply['numFrozen'] < 0:
+            return ['roll {}'.format(game)]
+        if reply['rollFouled'] or choices.random() < 0.3:
+            return ['stop {}'.format(game)]
+        dice = [n for n in range(engine.DiscusState.NUMDICE)
+                if not reply['locked'] & (1 << n) and
+                engine.DISCUSFACES[reply['tops'][n]-1] > 0]
+        return ['freeze {} {}'.format(game,choices.choice(dice)),
+                'roll {}'.format(game)]
+    if event == 'ShotPut':
+        if reply['rollFouled'] or reply['die'] == engine.ShotPutState.NUMDICE \
+           or (reply['die'] > 0 and choices.random() < 0.2):
+            return ['stop {}'.format(game)]
+        return ['roll {}'.format(game)]
+    if reply['rolled'] and (reply['rerolls'] == 0 or choices.random() < 0.5):
+        return ['keep {}'.format(game)]
+    return ['roll {}'.format(game)]
+
+async def play_games(client,remaining,latencies,choices):
+    '''play_games(client,remaining,latencies,choices)
+    plays random games on client, one at a time, while remaining[0] > 0,
+    adding each request's round-trip time in seconds to latencies'''
+    events = list(gameserver.STATES)
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        reply = await client.request('new '+choices.choice(events))
+        while not reply['over']:
+            for line in random_move(reply,choices):
+                start = time.perf_counter()
+                reply = await client.request(line)
+                latencies.append(time.perf_counter()-start)
+                if 'error' in reply:
+                    raise RuntimeError('{}: {}'.format(line,reply['error']))
+
+async def load_level(args,concurrency,numGames,numConnections):
+    '''load_level(args,concurrency,numGames,numConnections) -> (float,list)
+    plays numGames random games with concurrency of them going at once,
+    over up to numConnections connections, and returns (elapsed seconds,
+    request latencies in seconds)'''
+    clients = [await GameClient.connect(args)
+               for n in range(min(concurrency,numConnections))]
+    remaining = [numGames]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_games(clients[n % len(clients)],remaining,
+                                      latencies,random.Random(n))
+                           for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+    return elapsed,latencies
+
+async def load_test(args,levels,numGames,numConnections):
+    '''load_test(args,levels,numGames,numConnections)
+    runs load_level() at each concurrency in levels and prints the
+    results'''
+    print('{:>8s} {:>8s} {:>10s} {:>11s} {:>9s} {:>9s}'.format(
+        'games at','games','games/s','actions/s','p50 ms','p99 ms'))
+    for concurrency in levels:
+        elapsed,latencies = await load_level(
+            args,concurrency,max(numGames,concurrency),numConnections)
+        p50,p99 = 1000*np.percentile(latencies,(50,99))
+        print('{:8d} {:8d} {:10.0f} {:11.0f} {:9.3f} {:9.3f}'.format(
+            concurrency,max(numGames,concurrency),
+            max(numGames,concurrency)/elapsed,len(latencies)/elapsed,
+            p50,p99))
+
+def main(args):
+    numGames = 2000
+    levels = LEVELS
+    numConnections = MAXCONNECTIONS
+    for arg in args:
+        if arg.startswith('--games='):
+            numGames = int(arg[len('--games='):])
+        elif arg.startswith('--levels='):
+            levels = [int(level)
+                      for level in arg[len('--levels='):].split(',')]
+        elif arg.startswith('--connections='):
+            numConnections = int(arg[len('--connections='):])
+    server = None
+    if not any(arg.startswith(('--port=','--unix=')) for arg in args):
+        # start a server of our own, in another process
+        path = os.path.join(tempfile.mkdtemp(),'games.sock')
+        server = subprocess.Popen([sys.executable,gameserver.__file__,
+                                   '--unix='+path],stdout=subprocess.PIPE)
+        server.stdout.readline()  # wait until it's listening
+        args = args+['--unix='+path]
+    try:
+        asyncio.run(load_test(args,levels,numGames,numConnections))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
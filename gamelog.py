@@ -0,0 +1,322 @@
+'''compact binary log of games, one fixed-width record per move
+
+A log file is a 16-byte header followed by RECORD entries of 20 bytes
+each, appended as the game is played.  GameLog writes them through a
+buffered file with one precompiled struct per record, and the frames call
+it from their handlers (roll/keep in the running events, freeze/roll/
+stop_attempt in Discus, roll/stop in Shot Put) when they are given a log.
+
+read_log() maps a file into a NumPy record array without copying it, so
+analytics can run vectorized over hundreds of millions of rolls; scan()
+hands it out in chunks so that only one chunk is paged in at a time.
+
+Run it from the command line to write a log of random games, time
+reading it back and check that a reopened log numbers its games on:
+    python gamelog.py [path] [numGames] [--seed=N]'''
+import atexit
+import os
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+import dice
+import engine
+
+MAGIC = b'DECLOG\x00\x01'  # format name and version
+HEADERSIZE = 16
+# event ids, in the same order as scoredist.EVENTS
+EVENTS = ('100M','400M','1500M','ShotPut','Discus')
+EVENTIDS = {engine.Decath100MState:0,engine.Decath400MState:1,
+            engine.Decath1500MState:2,engine.ShotPutState:3,
+            engine.DiscusState:4}
+# players
+HUMAN = 0
+COMPUTER = 1
+RANDOM = 2  # the random games that main() writes
+HEADTOHEAD = 3  # a computer playing to beat its opponent, not for score
+# actions
+ROLL = 0
+KEEP = 1
+FREEZE = 2
+STOP = 3
+FOUL = 4    # a roll that fouled the attempt
+ACTIONS = ('roll','keep','freeze','stop','foul')
+MAXDICE = 8  # most dice in an event (Shot Put)
+
+# game: game number in the log
+# event, player, action: ids from above
+# round: round of a running event, attempt of Discus or Shot Put
+# dice: bitmask of the dice rolled (roll, foul) or frozen (freeze)
+# score: total kept in a running event, attempt score in Discus or
+#   Shot Put (0 after a foul)
+# faces: tops of the event's dice (1 to 6), then 0s (for Shot Put dice
+#   not rolled yet too)
+RECORD = np.dtype([('game','<u4'),('event','u1'),('player','u1'),
+                   ('round','u1'),('action','u1'),('dice','u1'),
+                   ('pad','u1'),('score','<i2'),('faces','u1',MAXDICE)])
+PACKER = struct.Struct('<IBBBBBxh{}B'.format(MAXDICE))
+assert PACKER.size == RECORD.itemsize == 20
+
+def state_fields(state,action):
+    '''state_fields(state,action) -> (int,int,list)
+    returns the round, score and faces fields of a record of action in
+    state'''
+    if isinstance(state,engine.RunningState):
+        gameround = state.gameround
+        score = state.score
+        if action == KEEP:  # the round just kept
+            gameround -= 1
+        faces = state.tops
+    elif isinstance(state,engine.DiscusState):
+        gameround = state.attempt
+        score = engine.discus_attempt_score(state)
+        faces = state.tops
+    else:  # only the Shot Put dice rolled so far
+        gameround = state.attempt
+        score = 0 if state.rollFouled else state.attemptscore
+        faces = state.tops[:state.die+state.rollFouled]
+    return gameround,score,faces+[0]*(MAXDICE-len(faces))
+
+class GameLog:
+    '''writer that appends records to a log file'''
+
+    def __init__(self,path,bufferSize=1 << 16):
+        '''GameLog(path,[bufferSize]) -> GameLog
+        opens the log at path for appending, creating it if needed'''
+        self.nextGame = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            records = read_log(path)
+            # drop a partly written last record so the new ones line up
+            os.truncate(path,HEADERSIZE+len(records)*RECORD.itemsize)
+            # carry on after every game in the file; the last record can be
+            # from a lower-numbered game, as the player and computer frames
+            # write their games interleaved
+            if len(records) > 0:
+                self.nextGame = int(records['game'].max())+1
+            del records
+        self.file = open(path,'ab',buffering=bufferSize)
+        if self.file.tell() == 0:
+            self.file.write(MAGIC+bytes(HEADERSIZE-len(MAGIC)))
+
+    def new_game(self):
+        '''GameLog.new_game() -> int
+        returns the number to log the next game under'''
+        self.nextGame += 1
+        return self.nextGame-1
+
+    def write(self,game,player,action,state,dice=0):
+        '''GameLog.write(game,player,action,state,[dice])
+        appends a record of a move in state'''
+        gameround,score,faces = state_fields(state,action)
+        self.file.write(PACKER.pack(game,EVENTIDS[type(state)],player,
+                                    gameround,action,dice,score,*faces))
+
+    def roll(self,game,player,state):
+        '''GameLog.roll(game,player,state)
+        logs the roll just made in state, as a foul if it fouled'''
+        if isinstance(state,engine.RunningState):
+            rolled = (1 << state.NUMDICE)-1
+            action = ROLL
+        elif isinstance(state,engine.DiscusState):
+            rolled = ~state.locked & ((1 << state.NUMDICE)-1)
+            action = FOUL if state.rollFouled else ROLL
+        else:  # Shot Put moves on to the next die unless it fouled
+            rolled = 1 << (state.die if state.rollFouled else state.die-1)
+            action = FOUL if state.rollFouled else ROLL
+        self.write(game,player,action,state,rolled)
+
+    def keep(self,game,player,state):
+        '''GameLog.keep(game,player,state)
+        logs the round just kept in a running event'''
+        self.write(game,player,KEEP,state)
+
+    def freeze(self,game,player,state,n):
+        '''GameLog.freeze(game,player,state,n)
+        logs freezing or unfreezing die n in Discus'''
+        self.write(game,player,FREEZE,state,1 << n)
+
+    def stop(self,game,player,state):
+        '''GameLog.stop(game,player,state)
+        logs stopping an attempt; call it before the attempt is reset'''
+        self.write(game,player,STOP,state)
+
+    def flush(self):
+        '''GameLog.flush()
+        writes out the buffered records'''
+        self.file.flush()
+
+    def close(self):
+        '''GameLog.close()
+        writes out the buffered records and closes the file'''
+        self.file.close()
+
+class NoLog:
+    '''stand-in for a GameLog that logs nothing'''
+
+    def new_game(self):
+        '''NoLog.new_game() -> int
+        returns 0'''
+        return 0
+
+    def roll(self,game,player,state):
+        '''NoLog.roll(game,player,state)
+        does nothing'''
+
+    def keep(self,game,player,state):
+        '''NoLog.keep(game,player,state)
+        does nothing'''
+
+    def freeze(self,game,player,state,n):
+        '''NoLog.freeze(game,player,state,n)
+        does nothing'''
+
+    def stop(self,game,player,state):
+        '''NoLog.stop(game,player,state)
+        does nothing'''
+
+nolog = NoLog()  # default for frames that aren't logged
+
+def open_log(args):
+    '''open_log(args) -> GameLog or NoLog
+    returns a GameLog for a --log=PATH option in the command-line
+    arguments args, closed at exit, or nolog if there isn't one'''
+    for arg in args:
+        if arg.startswith('--log='):
+            log = GameLog(arg[len('--log='):])
+            atexit.register(log.close)
+            return log
+    return nolog
+
+def read_log(path):
+    '''read_log(path) -> numpy record array
+    maps the records of the log at path into memory without copying
+    a partly written last record is left out'''
+    with open(path,'rb') as logFile:
+        if logFile.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a game log'.format(path))
+    numRecords = (os.path.getsize(path)-HEADERSIZE)//RECORD.itemsize
+    if numRecords <= 0:  # mmap can't map nothing
+        return np.zeros(0,RECORD)
+    return np.memmap(path,RECORD,'r',HEADERSIZE,(numRecords,))
+
+def scan(path,chunkSize=1 << 20):
+    '''scan(path,[chunkSize]) -> generator
+    yields the records of the log at path in chunks of chunkSize'''
+    records = read_log(path)
+    for start in range(0,len(records),chunkSize):
+        yield records[start:start+chunkSize]
+
+def face_counts(path):
+    '''face_counts(path) -> numpy array
+    returns the number of times each face (1 to 6) was rolled in each
+    event, as an array indexed by [event id][face-1]'''
+    counts = np.zeros((len(EVENTS),7),np.int64)
+    shifts = np.arange(MAXDICE,dtype=np.uint8)
+    for chunk in scan(path):
+        rolls = chunk[(chunk['action'] == ROLL) | (chunk['action'] == FOUL)]
+        # faces of only the dice each record rolled
+        rolled = (rolls['dice'][:,None] >> shifts) & 1 == 1
+        events = np.broadcast_to(rolls['event'][:,None],rolled.shape)
+        counts += np.bincount(7*events[rolled].astype(np.int64)+
+                              rolls['faces'][rolled],
+                              minlength=7*len(EVENTS)).reshape(counts.shape)
+    return counts[:,1:]
+
+def play_random(log,state,player,rng,choices):
+    '''play_random(log,state,player,rng,choices)
+    plays a game in state with random legal moves, logging every move
+    rng rolls the dice and choices picks the moves'''
+    game = log.new_game()
+    while not engine.game_over(state):
+        if isinstance(state,engine.RunningState):
+            if choices.random() < 0.5 and engine.running_roll(state,rng):
+                log.roll(game,player,state)
+            elif engine.running_keep(state):
+                log.keep(game,player,state)
+            elif engine.running_roll(state,rng):
+                log.roll(game,player,state)
+        elif isinstance(state,engine.DiscusState):
+            if choices.random() >= 0.3 and engine.discus_roll(state,rng):
+                log.roll(game,player,state)
+                continue
+            # freeze the first die we can, or else stop
+            for n in range(state.NUMDICE):
+                if engine.discus_freeze(state,n):
+                    log.freeze(game,player,state,n)
+                    break
+            else:
+                if state.numFrozen >= 0:  # can't stop before the first roll
+                    log.stop(game,player,state)
+                    engine.discus_stop(state)
+        else:
+            if choices.random() >= 0.2 and engine.shotput_roll(state,rng):
+                log.roll(game,player,state)
+            elif state.die > 0 or state.rollFouled:
+                log.stop(game,player,state)
+                engine.shotput_stop(state)
+            elif engine.shotput_roll(state,rng):
+                log.roll(game,player,state)
+
+def check_reopen(path):
+    '''check_reopen(path)
+    writes two interleaved games to a new log at path, the second one
+    finishing first, then checks that a GameLog reopening it numbers its
+    next game after both
+    raises AssertionError if it doesn't'''
+    if os.path.exists(path):
+        os.remove(path)
+    rng, = dice.game_streams([],1)
+    log = GameLog(path)
+    games = [log.new_game(),log.new_game()]
+    states = [engine.Decath400MState(),engine.Decath400MState()]
+    for turn in range(2*states[0].NUMROUNDS):
+        n = (turn+1) % 2  # the second game's round, then the first's
+        engine.running_roll(states[n],rng)
+        log.roll(games[n],COMPUTER,states[n])
+        engine.running_keep(states[n])
+        log.keep(games[n],COMPUTER,states[n])
+    log.close()
+    try:
+        assert read_log(path)['game'][-1] < max(games)
+        log = GameLog(path)
+        nextGame = log.new_game()
+        log.close()
+        assert nextGame not in games and nextGame > max(games), \
+               'reopened log numbered its next game {} after games {}'.format(
+                   nextGame,games)
+    finally:
+        os.remove(path)
+
+def main(args):
+    numbers = [arg for arg in args if not arg.startswith('--')]
+    path = numbers[0] if len(numbers) > 0 else 'games.declog'
+    numGames = int(numbers[1]) if len(numbers) > 1 else 20000
+    rng, = dice.game_streams(args,1)
+    choices = random.Random(0)  # picks the moves
+    log = GameLog(path)
+    start = time.perf_counter()
+    for game in range(numGames):
+        for stateClass in EVENTIDS:
+            play_random(log,stateClass(),RANDOM,rng,choices)
+    log.close()
+    elapsed = time.perf_counter() - start
+    print('wrote {} games of each event in {:.2f} s'.format(numGames,elapsed))
+    start = time.perf_counter()
+    counts = face_counts(path)
+    elapsed = time.perf_counter() - start
+    numRolls = int(counts.sum())
+    print('read {:,} records, {:,} dice rolled, in {:.3f} s '
+          '({:,.0f} million rolls/minute)'.format(
+              len(read_log(path)),numRolls,elapsed,
+              60*numRolls/elapsed/1e6))
+    for event,eventCounts in zip(EVENTS,counts):
+        print('{:8s} '.format(event)+' '.join('{:9d}'.format(count)
+                                               for count in eventCounts))
+    check_reopen(path+'.reopen')
+    print('a reopened log numbers new games after all the ones in it')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
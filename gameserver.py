@@ -0,0 +1,226 @@
+'''asyncio server that hosts games of all five events over a socket
+
+Any number of clients connect over TCP or a Unix socket, and each can
+play any number of games at once.  A move is one line of text, and the
+reply is one line of JSON with the game's state, so the rules are the
+same ones the frames use: the step functions in engine.py, on the same
+__slots__ state objects.  A game is just its state object, so the server
+holds thousands of them in a few megabytes, and all of them roll from
+one dice stream.
+
+Requests, where GAME is the number that new returns:
+    new EVENT        start a game of 100M, 400M, 1500M, Discus or ShotPut
+    roll GAME        roll the dice (or reroll, or roll the next Shot Put
+                     die, or roll the unfrozen Discus dice)
+    keep GAME        keep the roll, in a running event
+    freeze GAME N    freeze or unfreeze Discus die N (0-4)
+    stop GAME        end the attempt, in Discus or Shot Put
+    show GAME        just return the state
+    quit GAME        give the game up
+A reply is an object with the game, its event, the state's fields and
+whether it is over, or {"error":message} if the move can't be made.  A
+finished game is dropped once its final state is sent, and the games of
+a client are dropped when it disconnects.
+
+Run it from the command line:
+    python gameserver.py [--port=N | --unix=PATH] [--seed=N] [--log=PATH]'''
+import asyncio
+import json
+import sys
+
+import dice
+import engine
+import gamelog
+
+PORT = 8765  # default TCP port, on localhost
+STATES = {'100M':engine.Decath100MState,'400M':engine.Decath400MState,
+          '1500M':engine.Decath1500MState,'Discus':engine.DiscusState,
+          'ShotPut':engine.ShotPutState}
+EVENTNAMES = {stateClass:event for event,stateClass in STATES.items()}
+
+def _fields(stateClass):
+    # the __slots__ of stateClass and its bases
+    return [name for cls in reversed(stateClass.__mro__)
+            for name in getattr(cls,'__slots__',())]
+
+FIELDS = {stateClass:_fields(stateClass) for stateClass in STATES.values()}
+
+class MoveError(Exception):
+    '''a request that can't be carried out'''
+    pass
+
+def state_reply(game,state):
+    '''state_reply(game,state) -> dict
+    returns the reply for game with the given state'''
+    reply = {'game':game,'event':EVENTNAMES[type(state)]}
+    for name in FIELDS[type(state)]:
+        reply[name] = getattr(state,name)
+    reply['over'] = engine.game_over(state)
+    return reply
+
+def parse_number(word,message):
+    '''parse_number(word,message) -> int
+    returns the whole number 0 or more written in word
+    raises MoveError with message if it isn't one'''
+    try:
+        number = int(word)
+    except ValueError:
+        raise MoveError(message)
+    if number < 0:
+        raise MoveError(message)
+    return number
+
+class GameServer:
+    '''the games being played, and the moves on them'''
+
+    def __init__(self,rng=dice.stream,log=gamelog.nolog):
+        '''GameServer([rng,log]) -> GameServer
+        creates a server with no games
+        rng is the dice stream to roll with (dice.stream by default)
+        log is the GameLog to record the moves in (none by default)'''
+        self.rng = rng
+        self.log = log
+        self.games = {}  # state of each game by number
+        self.nextGame = 0
+
+    def new_game(self,event):
+        '''GameServer.new_game(event) -> int
+        starts a game of event and returns its number'''
+        if event not in STATES:
+            raise MoveError('no event {}'.format(event))
+        game = self.nextGame
+        if self.log is not gamelog.nolog:  # number it as the log does
+            game = self.log.new_game()
+        self.nextGame = game+1
+        self.games[game] = STATES[event]()
+        return game
+
+    def move(self,command,game,args=()):
+        '''GameServer.move(command,game,[args]) -> dict
+        makes the move command ('roll', 'keep', 'freeze', 'stop', 'show'
+        or 'quit') in game and returns the reply
+        raises MoveError if it can't be made'''
+        state = self.games.get(game)
+        if state is None:
+            raise MoveError('no game {}'.format(game))
+        if command == 'roll':
+            if isinstance(state,engine.RunningState):
+                done = engine.running_roll(state,self.rng)
+            elif isinstance(state,engine.DiscusState):
+                done = engine.discus_roll(state,self.rng)
+            else:
+                done = engine.shotput_roll(state,self.rng)
+            if done:
+                self.log.roll(game,gamelog.HUMAN,state)
+        elif command == 'keep':
+            done = isinstance(state,engine.RunningState) and \
+                   engine.running_keep(state)
+            if done:
+                self.log.keep(game,gamelog.HUMAN,state)
+        elif command == 'freeze':
+            if len(args) != 1:
+                raise MoveError('freeze needs a die number')
+            n = parse_number(args[0],'freeze needs a die number')
+            done = isinstance(state,engine.DiscusState) and \
+                   n < state.NUMDICE and engine.discus_freeze(state,n)
+            if done:
+                self.log.freeze(game,gamelog.HUMAN,state,n)
+        elif command == 'stop':
+            done = not isinstance(state,engine.RunningState) and \
+                   engine.can_stop(state)
+            if done:  # logged before the attempt is reset
+                self.log.stop(game,gamelog.HUMAN,state)
+                if isinstance(state,engine.DiscusState):
+                    engine.discus_stop(state)
+                else:
+                    engine.shotput_stop(state)
+        elif command == 'show':
+            done = True
+        elif command == 'quit':
+            del self.games[game]
+            return {'game':game,'quit':True}
+        else:
+            raise MoveError('no command {}'.format(command))
+        if not done:
+            raise MoveError('{} is against the rules here'.format(command))
+        reply = state_reply(game,state)
+        if reply['over']:
+            del self.games[game]
+        return reply
+
+    def request(self,line,clientGames):
+        '''GameServer.request(line,clientGames) -> dict
+        carries out a request line and returns the reply
+          clientGames is the set of the client's games, which new adds to'''
+        words = line.split()
+        try:
+            if len(words) < 2:
+                raise MoveError('bad request {!r}'.format(line.strip()))
+            if words[0] == 'new':
+                game = self.new_game(words[1])
+                clientGames.add(game)
+                return state_reply(game,self.games[game])
+            game = parse_number(words[1],'no game {}'.format(words[1]))
+            if game not in clientGames:
+                raise MoveError('no game {}'.format(words[1]))
+            reply = self.move(words[0],game,words[2:])
+            if game not in self.games:  # over, or given up
+                clientGames.discard(game)
+            return reply
+        except MoveError as error:
+            return {'error':str(error)}
+
+    async def serve_client(self,reader,writer):
+        '''GameServer.serve_client(reader,writer)
+        answers a client's requests until it disconnects'''
+        clientGames = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # a line that isn't UTF-8 gets a bad request reply
+                reply = self.request(line.decode(errors='replace'),
+                                     clientGames)
+                writer.write(json.dumps(reply).encode()+b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game in clientGames:
+                self.games.pop(game,None)
+            writer.close()
+
+async def start(server,args):
+    '''start(server,args) -> asyncio.Server
+    starts serving server's games at the address in the command-line
+    arguments args (--port=N or --unix=PATH, or port PORT)'''
+    for arg in args:
+        if arg.startswith('--unix='):
+            return await asyncio.start_unix_server(server.serve_client,
+                                                   arg[len('--unix='):])
+    port = PORT
+    for arg in args:
+        if arg.startswith('--port='):
+            port = int(arg[len('--port='):])
+    return await asyncio.start_server(server.serve_client,'127.0.0.1',port)
+
+async def serve(args):
+    '''serve(args)
+    runs a server for the command-line arguments args until it is
+    interrupted'''
+    rng, = dice.game_streams(args,1)
+    listener = await start(GameServer(rng,gamelog.open_log(args)),args)
+    print('serving on',', '.join(str(sock.getsockname())
+                                 for sock in listener.sockets),flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+def main(args):
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
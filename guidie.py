@@ -0,0 +1,138 @@
+'''GUI dice shared by all five events
+
+GUIDie draws a 6-sided die on its own small Canvas, and GUIFreezeableDie
+adds the freezing used by Discus.  Each die makes its seven pips once and
+draw() only shows and hides them.'''
+from tkinter import *
+
+import dice
+
+class GUIDie(Canvas):
+    '''6-sided Die class for GUI'''
+    # location of which pips should be drawn for each top
+    pipList = [[(1,1)],
+               [(0,0),(2,2)],
+               [(0,0),(1,1),(2,2)],
+               [(0,0),(0,2),(2,0),(2,2)],
+               [(0,0),(0,2),(1,1),(2,0),(2,2)],
+               [(0,0),(0,2),(1,0),(1,2),(2,0),(2,2)]]
+    pipLocations = [(0,0),(0,2),(1,0),(1,1),(1,2),(2,0),(2,2)]
+
+    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
+        '''GUIDie(master,[valueList,colorList]) -> GUIDie
+        creates a GUI 6-sided die
+          valueList is the list of values (1,2,3,4,5,6 by default)
+          colorList is the list of colors (all black by default)'''
+        # create a 60x60 white canvas with a 5-pixel grooved border
+        Canvas.__init__(self,master,width=60,height=60,bg='white',\
+                        bd=5,relief=GROOVE)
+        # store the valuelist and colorlist
+        self.valueList = valueList
+        self.colorList = colorList
+        # create the pips for every location once; draw() only shows
+        #  and hides them
+        self.pips = {}
+        for location in self.pipLocations:
+            self.pips[location] = self.make_pip(location)
+        # initialize the top value
+        self.top = 1
+        self.rolled = False
+
+    def get_top(self):
+        '''GUIDie.get_top() -> int
+        returns the value on the die'''
+        return self.valueList[self.top-1]
+
+    def get_value(self):
+        '''GUIDie.get_value() -> int
+        returns the value of the die
+        returns 0 if the die hasn't been rolled yet'''
+        if self.rolled:
+            return self.valueList[self.top-1]
+        else:
+            return 0
+
+    def roll(self):
+        '''GUIDie.roll()
+        rolls the die'''
+        self.show(dice.stream.randrange(1,7))
+
+    def show(self,top):
+        '''GUIDie.show(top)
+        sets the die to show top and draws it'''
+        self.top = top
+        self.rolled = True
+        self.draw()
+
+    def draw(self):
+        '''GUIDie.draw()
+        draws the pips on the die'''
+        # show the pips for this top and hide the rest
+        shown = self.pipList[self.top-1]
+        color = self.colorList[self.top-1]
+        for location,pip in self.pips.items():
+            if location in shown:
+                self.itemconfigure(pip,state=NORMAL,fill=color)
+            else:
+                self.itemconfigure(pip,state=HIDDEN)
+
+    def make_pip(self,location):
+        '''GUIDie.make_pip(location) -> int
+        creates a hidden pip at (row,col) given by location
+        returns its canvas item id'''
+        (centerx,centery) = (17+20*location[1],17+20*location[0])  # center
+        return self.create_oval(centerx-5,centery-5,centerx+5,centery+5,\
+                                state=HIDDEN)
+
+    def erase(self):
+        '''GUIDie.erase()
+        erases all the pips'''
+        for pip in self.pips.values():
+            self.itemconfigure(pip,state=HIDDEN)
+
+    def reset(self):
+        '''GUIDie.reset()
+        erases the die so it can be used again'''
+        if self.rolled:  # pips are only ever shown by show()
+            self.erase()
+        self.top = 1
+        self.rolled = False
+
+
+class GUIFreezeableDie(GUIDie):
+    '''a GUIDie that can be "frozen" so that it can't be rolled'''
+
+    def __init__(self,master,valueList=[1,2,3,4,5,6],colorList=['black']*6):
+        '''GUIFreezeableDie(master,[valueList,colorList]) -> GUIFreezeableDie
+        creates a GUI 6-sided freeze-able die
+          valueList is the list of values (1,2,3,4,5,6 by default)
+          colorList is the list of colors (all black by default)'''
+        GUIDie.__init__(self,master,valueList,colorList)
+        self.isFrozen = False  # die starts out unfrozen
+
+    def is_frozen(self):
+        '''GUIFreezeableDie.is_frozen() -> bool
+        returns True if the die is frozen, False otherwise'''
+        return self.isFrozen
+    
+    def toggle_freeze(self):
+        '''GUIFreezeableDie.toggle_freeze()
+        toggles the frozen status'''
+        self.isFrozen = not self.isFrozen
+        if self.isFrozen:
+            self['bg'] = 'gray'
+        else:
+            self['bg'] = 'white'
+
+    def reset(self):
+        '''GUIFreezeableDie.reset()
+        unfreezes and erases the die so it can be used again'''
+        self.isFrozen = False
+        self['bg'] = 'white'
+        GUIDie.reset(self)
+
+    def roll(self):
+        '''GuiFreezeableDie.roll()
+        overloads GUIDie.roll() to not allow a roll if frozen'''
+        if not self.isFrozen:
+            GUIDie.roll(self)
@@ -0,0 +1,181 @@
+'''win-probability solver for head-to-head 400 Meters
+
+Instead of the best expected score, finds the reroll decisions that give
+the best chance of beating an opponent whose final score is known, or who
+is part way through a game.  Ties count as half a win.
+
+Value tables are NumPy arrays indexed by
+    [gameround,rerolls,score-LOWSCORE]
+holding the probability of winning from the start of gameround (before
+rolling) with that many rerolls left and that running score.  The tables
+for every known opponent score, and the final-score distributions, are
+kept in the table cache (see tablecache).
+
+Run it from the command line to time the full solve:
+    python headtohead400m.py'''
+import functools
+import sys
+import time
+
+import numpy as np
+
+import solve400m
+import solvereroll
+import tablecache
+from solve400m import FACES,NUMROUNDS,NUMDICE,NUMREROLLS
+
+MINSUM = NUMDICE*min(FACES)
+MAXSUM = NUMDICE*max(FACES)
+LOWSCORE = NUMROUNDS*MINSUM                    # lowest possible final score
+NUMSCORES = NUMROUNDS*(MAXSUM-MINSUM) + 1      # number of possible scores
+SCORES = np.arange(LOWSCORE,LOWSCORE+NUMSCORES)
+
+# exact roll distribution as parallel arrays of sums and probabilities
+_dist = solve400m.sum_distribution()
+SUMS = np.array(list(_dist.keys()))
+PROBS = np.array([float(prob) for prob in _dist.values()])
+del _dist
+
+def _shifted(shift):
+    # index array that moves a score axis along by shift, clipped at the ends
+    return np.clip(np.arange(NUMSCORES)+shift,0,NUMSCORES-1)
+
+_SHIFTS = [_shifted(rollValue) for rollValue in SUMS]
+
+def win_utility(opponentDist):
+    '''win_utility(opponentDist) -> ndarray
+    returns the chance of beating an opponent for each own final score
+      opponentDist is the opponent's final-score distribution (an array
+      over SCORES, or a stack of them along the first axes)'''
+    below = np.cumsum(opponentDist,axis=-1) - opponentDist
+    return below + 0.5*opponentDist
+
+def solve_utility(utility):
+    '''solve_utility(utility) -> ndarray
+    returns the table of the best expected utility from every state
+      utility is an array over SCORES giving the payoff of each final
+      score; extra leading axes are solved all at once
+    the result has shape utility.shape[:-1]+(NUMROUNDS+1,NUMREROLLS+1,
+    NUMSCORES)'''
+    lead = utility.shape[:-1]
+    table = np.empty(lead+(NUMROUNDS+1,NUMREROLLS+1,NUMSCORES))
+    table[...,NUMROUNDS,:,:] = utility[...,None,:]
+    for gameround in range(NUMROUNDS-1,-1,-1):
+        later = table[...,gameround+1,:,:]
+        for rerolls in range(NUMREROLLS+1):
+            total = np.zeros(lead+(NUMSCORES,))
+            for prob,shift in zip(PROBS,_SHIFTS):
+                keep = later[...,rerolls,shift]
+                if rerolls > 0:  # reroll is worth the same state, one fewer
+                    keep = np.maximum(keep,table[...,gameround,rerolls-1,:])
+                total += prob*keep
+            table[...,gameround,rerolls,:] = total
+    return table
+
+@tablecache.cached(rules=(FACES,NUMROUNDS,NUMDICE,NUMREROLLS),
+                   modules=(solve400m,solvereroll))
+def solve_known():
+    '''solve_known() -> ndarray
+    solves every known opponent final score at once and returns a table
+    indexed by [opponentScore-LOWSCORE,gameround,rerolls,score-LOWSCORE]'''
+    table = solve_utility(win_utility(np.eye(NUMSCORES)))
+    table.flags.writeable = False
+    return table
+
+def _shift_add(out,values,shift):
+    # out[i+shift] += values[i], dropping anything that falls off the ends
+    if shift >= 0:
+        out[shift:] += values[:NUMSCORES-shift]
+    else:
+        out[:NUMSCORES+shift] += values[-shift:]
+
+def final_distribution(gameround,rerolls,score,rerollTable=None):
+    '''final_distribution(gameround,rerolls,score,[rerollTable]) -> ndarray
+    returns the distribution over SCORES of the final score of a player
+    at the start of gameround with rerolls left and a running score,
+    who plays by rerollTable (the expected-score optimum by default)'''
+    if rerollTable is None:
+        rerollTable = solve400m.solve()[1]
+    mass = np.zeros((NUMREROLLS+1,NUMSCORES))
+    mass[rerolls,score-LOWSCORE] = 1
+    for g in range(gameround,NUMROUNDS):
+        nextMass = np.zeros_like(mass)
+        # rerolling only moves mass to fewer rerolls, so go from the top
+        for r in range(NUMREROLLS,-1,-1):
+            for rollValue,prob in zip(SUMS,PROBS):
+                if r > 0 and rerollTable[g][r][rollValue-MINSUM]:
+                    mass[r-1] += prob*mass[r]
+                else:
+                    _shift_add(nextMass[r],prob*mass[r],rollValue)
+        mass = nextMass
+    return mass.sum(axis=0)
+
+@tablecache.cached(rules=(FACES,NUMROUNDS,NUMDICE,NUMREROLLS),
+                   modules=(solve400m,solvereroll))
+def final_distributions():
+    '''final_distributions() -> ndarray
+    returns final_distribution() for every state at once, as a table
+    indexed by [gameround,rerolls,score-LOWSCORE] of distributions over
+    SCORES'''
+    rerollTable = solve400m.solve()[1]
+    table = np.zeros((NUMROUNDS+1,NUMREROLLS+1,NUMSCORES,NUMSCORES))
+    table[NUMROUNDS] = np.eye(NUMSCORES)  # the score is final
+    for gameround in range(NUMROUNDS-1,-1,-1):
+        for rerolls in range(NUMREROLLS+1):
+            total = table[gameround,rerolls]
+            for rollValue,prob,shift in zip(SUMS,PROBS,_SHIFTS):
+                if rerolls > 0 and rerollTable[gameround][rerolls][
+                        rollValue-MINSUM]:
+                    total += prob*table[gameround,rerolls-1]
+                else:
+                    total += prob*table[gameround+1,rerolls][shift]
+    table.flags.writeable = False
+    return table
+
+@functools.lru_cache(maxsize=4096)
+def opponent_table(gameround,rerolls,score):
+    '''opponent_table(gameround,rerolls,score) -> ndarray
+    returns the win-probability table against an opponent at the start of
+    gameround with rerolls left and a running score
+    an unfinished opponent is assumed to play the expected-score optimum'''
+    if gameround == NUMROUNDS:
+        return solve_known()[score-LOWSCORE]
+    table = solve_utility(win_utility(
+        final_distribution(gameround,rerolls,score)))
+    table.flags.writeable = False
+    return table
+
+def should_reroll(table,gameround,rerolls,score,rollValue):
+    '''should_reroll(table,gameround,rerolls,score,rollValue) -> bool
+    returns True if rerolling rollValue gives a better chance of winning
+    than keeping it, using a table from opponent_table()'''
+    if rerolls == 0:
+        return False
+    return table[gameround,rerolls-1,score-LOWSCORE] > \
+           table[gameround+1,rerolls,score+rollValue-LOWSCORE]
+
+def win_probability(table,gameround,rerolls,score):
+    '''win_probability(table,gameround,rerolls,score) -> float
+    returns the chance of winning from the start of gameround'''
+    return float(table[gameround,rerolls,score-LOWSCORE])
+
+def main(args):
+    start = time.perf_counter()
+    table = solve_known.uncached()  # afresh, rather than from the cache
+    elapsed = time.perf_counter() - start
+    print('solved all {} opponent scores in {:.1f} ms, table is {:.2f} MB'
+          .format(NUMSCORES,1000*elapsed,table.nbytes/2**20))
+    start = time.perf_counter()
+    opening = opponent_table(0,NUMREROLLS,0)
+    elapsed = time.perf_counter() - start
+    print('solved against an unplayed opponent in {:.1f} ms'.format(
+        1000*elapsed))
+    print('chance to beat an unplayed opponent: {:.4f}'.format(
+        win_probability(opening,0,NUMREROLLS,0)))
+    for target in (20,25,30,35):
+        print('chance to beat a final score of {}: {:.4f}'.format(
+            target,win_probability(opponent_table(NUMROUNDS,0,target),
+                                   0,NUMREROLLS,0)))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
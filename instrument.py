@@ -0,0 +1,132 @@
+'''opt-in timing of UI handlers, die drawing and the Tk event loop
+
+Nothing here runs unless install() is called, which the games do when
+they are started with --instrument.  install() wraps the handler methods
+of the given classes and GUIDie.draw() with timers, and starts a
+heartbeat on the root window that measures how late each after() call
+fires (event-loop lag).  Without it the classes are left untouched, so
+there is no cost at all.
+
+Times go into Histograms with one bucket per power of two microseconds,
+so recording is a few integer operations and memory use is fixed.
+summary() returns the table of all of them.  It is printed when the
+program exits, and when F12 is pressed in the window.'''
+import atexit
+import functools
+import time
+
+import guidie
+
+# method names that are timed if a class defines them
+HANDLERS = ('roll','keep','stop','stop_attempt','should_reroll','freeze',
+            'reset','draw','show_event','show_advice')
+HEARTBEAT = 50  # ms between event-loop lag samples
+NUMBUCKETS = 40
+
+class Histogram:
+    '''counts of times in power-of-two microsecond buckets'''
+    __slots__ = ('buckets','count','total','largest')
+
+    def __init__(self):
+        '''Histogram() -> Histogram
+        creates an empty histogram'''
+        self.buckets = [0]*NUMBUCKETS
+        self.count = 0
+        self.total = 0.0    # seconds
+        self.largest = 0.0  # seconds
+
+    def add(self,seconds):
+        '''Histogram.add(seconds)
+        records one time'''
+        # bucket n holds times from 2**(n-1) up to 2**n microseconds
+        bucket = int(seconds*1e6).bit_length()
+        self.buckets[min(bucket,NUMBUCKETS-1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.largest:
+            self.largest = seconds
+
+    def percentile(self,fraction):
+        '''Histogram.percentile(fraction) -> float
+        returns an upper bound in seconds on the given fraction of the
+        times (the top of the bucket the percentile falls in)'''
+        needed = fraction*self.count
+        seen = 0
+        for bucket,count in enumerate(self.buckets):
+            seen += count
+            if seen >= needed and count > 0:
+                return min((1 << bucket)*1e-6,self.largest)
+        return self.largest
+
+histograms = {}  # Histogram for each name
+
+def record(name,seconds):
+    '''record(name,seconds)
+    adds a time to the histogram called name'''
+    if name not in histograms:
+        histograms[name] = Histogram()
+    histograms[name].add(seconds)
+
+def timed(name,method):
+    '''timed(name,method) -> function
+    returns method wrapped so that each call's wall time is recorded
+    under name'''
+    @functools.wraps(method)
+    def wrapper(*args,**kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args,**kwargs)
+        finally:
+            record(name,time.perf_counter()-start)
+    wrapper.untimed = method
+    return wrapper
+
+def instrument_class(cls):
+    '''instrument_class(cls)
+    times the handler methods that cls itself defines'''
+    for methodName in HANDLERS:
+        method = cls.__dict__.get(methodName)
+        if method is not None and not hasattr(method,'untimed'):
+            setattr(cls,methodName,
+                    timed('{}.{}'.format(cls.__name__,methodName),method))
+
+def start_heartbeat(root,interval=HEARTBEAT):
+    '''start_heartbeat(root,[interval])
+    samples how late root's event loop runs an after() call, every
+    interval ms'''
+    def beat(expected):
+        now = time.perf_counter()
+        record('event loop lag',max(0.0,now-expected))
+        root.after(interval,beat,now+interval/1000)
+    root.after(interval,beat,time.perf_counter()+interval/1000)
+
+def summary():
+    '''summary() -> str
+    returns a table of every histogram, in milliseconds'''
+    lines = ['{:36s} {:>7s} {:>8s} {:>8s} {:>8s} {:>8s}'.format(
+        'name','count','mean','p50','p99','max')]
+    for name in sorted(histograms):
+        hist = histograms[name]
+        lines.append('{:36s} {:7d} {:8.3f} {:8.3f} {:8.3f} {:8.3f}'.format(
+            name,hist.count,1000*hist.total/hist.count,
+            1000*hist.percentile(0.5),1000*hist.percentile(0.99),
+            1000*hist.largest))
+    return '\n'.join(lines)
+
+def dump():
+    '''dump()
+    prints the summary table'''
+    print(summary())
+
+def install(root,classes):
+    '''install(root,classes)
+    turns on timing for the handler methods of each class in classes and
+    for GUIDie.draw(), starts the event-loop heartbeat on root, and
+    prints the summary at exit and when F12 is pressed
+    call it before making any frames, since a button keeps the handler
+    it was made with'''
+    for cls in list(classes)+[guidie.GUIDie]:
+        instrument_class(cls)
+    start_heartbeat(root)
+    root.bind_all('<F12>',lambda event: dump())
+    atexit.register(dump)
@@ -0,0 +1,438 @@
+'''replay and check games recorded in a game log, or played from a seed
+
+Every roll in a log records its faces, so a game can be replayed through
+the rules in engine.py by handing the recorded faces back out as the
+dice.  verify_game() does that and checks, move by move, that:
+    each move was legal and left the round, score and faces recorded
+    the final score is the one the frame showed (the last kept total in
+      a running event, the best attempt in Discus and Shot Put)
+    a computer player made the moves its frame's policy picks, the same
+      keep/reroll, stop/roll and freeze choices as the computer frames
+Games played by Decath400MHeadToHeadFrame depend on the other player's
+game, so they are logged as gamelog.HEADTOHEAD and checked with the rules
+only, like a human's.
+
+verify_log() checks a whole log in batches of games on a process pool.
+show_game() replays a game in an event's frame instead, one move every
+delay ms, through the frame's own handlers.  replay_seed() replays the
+computer's game of an event script (or of decathlon.py) started with
+--seed=N.  A head-to-head computer's moves depend on the player's game,
+so its game is replayed with the player's state at each of its rolls
+taken from the session's log.
+
+Run it from the command line:
+    python replay.py verify path [--processes=N] [--rules-only]
+    python replay.py show path game [--delay=ms]
+    python replay.py seed event --seed=N [--launcher]
+        [--log=PATH --head-to-head=GAME]'''
+import collections
+import functools
+import importlib
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+import decathlon
+import dice
+import engine
+import gamelog
+import headtohead400m
+import solve400m
+import solvediscus
+import solvereroll
+import solveshotput
+import tournament
+
+BATCHSIZE = 4096   # games checked per task
+MAXPROBLEMS = 20   # problems listed by verify_log()
+# player frame class of each event, for show_game()
+FRAMES = {'100M':'Decath100MFrame','400M':'Decath400MFrame',
+          '1500M':'Decath1500MFrame','ShotPut':'ShotPutFrame',
+          'Discus':'DecathDiscusFrame'}
+
+# a log record as plain Python values, which are much quicker to replay
+#  one at a time than NumPy records
+Record = collections.namedtuple('Record',('game','event','player','round',
+                                          'action','dice','score','faces'))
+
+class ReplayError(Exception):
+    '''a recorded game that doesn't replay the way it was recorded'''
+    pass
+
+class RecordedRNG:
+    '''dice stream that hands out recorded faces'''
+
+    def __init__(self):
+        '''RecordedRNG() -> RecordedRNG
+        creates a stream with no faces loaded'''
+        self.faces = []
+
+    def load(self,record):
+        '''RecordedRNG.load(record)
+        loads the faces of the dice rolled in a Record, in die order'''
+        self.faces = [face for n,face in enumerate(record.faces)
+                      if record.dice & (1 << n)]
+        self.faces.reverse()  # so the first die pops off first
+
+    def randrange(self,start,stop):
+        '''RecordedRNG.randrange(start,stop) -> int
+        returns the next recorded face'''
+        if not self.faces:
+            raise ReplayError('the rules rolled more dice than were recorded')
+        return self.faces.pop()
+
+@functools.lru_cache(maxsize=None)
+def frame_policy(event):
+    '''frame_policy(event) -> policy
+    returns the policy of event's computer frame, in the forms that
+    tournament.py plays (a keep table for 100 and 1500 Meters)'''
+    if event == '400M':
+        return solve400m.should_reroll
+    if event in solvereroll.EVENTS:
+        return solvereroll.solve_event(event)[1]
+    return tournament.get_policy(event,'optimal')
+
+def expected_moves(event,state):
+    '''expected_moves(event,state) -> list
+    returns the moves, as (action,dice) pairs, that event's computer
+    frame makes after a roll in state (dice is 0 unless it's a freeze)'''
+    if isinstance(state,engine.RunningState):
+        policy = frame_policy(event)
+        rollValue = engine.running_value(state)
+        if state.rerolls == 0:
+            reroll = False
+        elif callable(policy):
+            reroll = policy(state.gameround,state.rerolls,rollValue)
+        else:
+            reroll = rollValue < policy[state.gameround][state.rerolls]
+        return [(gamelog.ROLL,0)] if reroll else [(gamelog.KEEP,0)]
+    if state.rollFouled:  # nothing to decide, just take the foul
+        return [(gamelog.STOP,0)]
+    if isinstance(state,engine.ShotPutState):
+        if state.die == state.NUMDICE or \
+           solveshotput.should_stop(state.attempt,state.die,
+                                    state.attemptscore,state.score):
+            return [(gamelog.STOP,0)]
+        return [(gamelog.ROLL,0)]
+    # Discus: freeze the chosen dice as DecathDiscusComputerFrame does
+    values = [state.FACES[top-1] for top in state.tops]
+    frozenCode = solvediscus.encode([values[n] for n in range(state.NUMDICE)
+                                     if state.frozen & (1 << n)])
+    rollCode = solvediscus.encode([values[n] for n in range(state.NUMDICE)
+                                   if not state.frozen & (1 << n)])
+    freezeCode = solvediscus.best_move(state.attempt,state.score,
+                                       frozenCode,rollCode)
+    if freezeCode is None:
+        return [(gamelog.STOP,0)]
+    moves = []
+    counts = list(solvediscus.decode(freezeCode))
+    for n in range(state.NUMDICE):
+        if engine.discus_can_freeze(state,n) and \
+           counts[solvediscus.SCORINGFACES.index(values[n])] > 0:
+            counts[solvediscus.SCORINGFACES.index(values[n])] -= 1
+            moves.append((gamelog.FREEZE,1 << n))
+    return moves+[(gamelog.ROLL,0)]
+
+def to_records(records):
+    '''to_records(records) -> list
+    returns a list of Records with the values of the NumPy records'''
+    return [Record(*fields) for fields in zip(
+        *(records[name].tolist() for name in Record._fields))]
+
+def apply_move(state,record,rng):
+    '''apply_move(state,record,rng)
+    makes the move in a Record on state, rolling the recorded faces
+    raises ReplayError if the rules don't allow it or it doesn't leave
+    what was recorded'''
+    action = record.action
+    expected = (record.round,record.score,record.faces)
+    if action == gamelog.STOP:  # recorded before the attempt is reset
+        if gamelog.state_fields(state,action) != expected:
+            raise ReplayError('stop recorded {}, replayed {}'.format(
+                expected,gamelog.state_fields(state,action)))
+    if action in (gamelog.ROLL,gamelog.FOUL):
+        rng.load(record)
+        if isinstance(state,engine.RunningState):
+            done = engine.running_roll(state,rng)
+        elif isinstance(state,engine.DiscusState):
+            done = engine.discus_roll(state,rng)
+        else:
+            done = engine.shotput_roll(state,rng)
+        if done and rng.faces:
+            raise ReplayError('the rules rolled fewer dice than were recorded')
+        if done and (action == gamelog.FOUL) != \
+           getattr(state,'rollFouled',False):
+            raise ReplayError('foul recorded as {}, replayed as {}'.format(
+                action == gamelog.FOUL,state.rollFouled))
+    elif action == gamelog.KEEP:
+        done = engine.running_keep(state)
+    elif action == gamelog.FREEZE:
+        done = engine.discus_freeze(state,record.dice.bit_length()-1)
+    elif action == gamelog.STOP:
+        if isinstance(state,engine.DiscusState):
+            done = engine.discus_stop(state)
+        else:
+            done = engine.shotput_stop(state)
+    else:
+        raise ReplayError('unknown action {}'.format(action))
+    if not done:
+        raise ReplayError('{} is against the rules here'.format(
+            gamelog.ACTIONS[action]))
+    if action != gamelog.STOP and \
+       gamelog.state_fields(state,action) != expected:
+        raise ReplayError('{} recorded {}, replayed {}'.format(
+            gamelog.ACTIONS[action],expected,
+            gamelog.state_fields(state,action)))
+
+def verify_game(records,checkPolicy=True):
+    '''verify_game(records,[checkPolicy]) -> engine state
+    replays the Records of one game in order and returns the final state
+    raises ReplayError with the record number if something doesn't match
+      checkPolicy is True to also check a computer player's choices'''
+    first = records[0]
+    event = gamelog.EVENTS[first.event]
+    state = tournament.STATES[event]()
+    rng = RecordedRNG()
+    computer = checkPolicy and first.player == gamelog.COMPUTER
+    expected = []  # moves the computer frame should make next
+    bestStop = 0   # best attempt score the frame showed
+    for number,record in enumerate(records):
+        try:
+            if record.event != first.event or record.player != first.player:
+                raise ReplayError('event or player changed mid-game')
+            if record.action == gamelog.FREEZE:
+                move = (gamelog.FREEZE,record.dice)
+            elif record.action == gamelog.FOUL:
+                move = (gamelog.ROLL,0)
+            else:
+                move = (record.action,0)
+            if computer and expected:
+                if move != expected[0]:
+                    raise ReplayError('computer made {}, its policy makes '
+                                      '{}'.format(move,expected[0]))
+                expected.pop(0)
+            if record.action == gamelog.STOP:
+                bestStop = max(bestStop,record.score)
+            apply_move(state,record,rng)
+            if computer and move == (gamelog.ROLL,0):
+                expected = expected_moves(event,state)
+        except ReplayError as error:
+            raise ReplayError('game {} record {}: {}'.format(
+                record.game,number,error))
+    # the score the frame showed
+    if isinstance(state,engine.RunningState):
+        shown = records[-1].score
+    else:
+        shown = bestStop
+    if state.score != shown:
+        raise ReplayError('game {}: frame showed {}, replayed {}'.format(
+            first.game,shown,state.score))
+    return state
+
+def game_order(records):
+    '''game_order(records) -> (ndarray,ndarray)
+    returns the record numbers sorted by game (each game's records kept
+    in order) and where each game starts in them'''
+    order = np.argsort(records['game'],kind='stable')
+    games = records['game'][order]
+    starts = np.flatnonzero(np.r_[len(games) > 0,games[1:] != games[:-1]])
+    return order,starts
+
+def verify_batch(task):
+    '''verify_batch(task) -> (int,int,list)
+    checks a batch of games and returns (games finished, games not
+    finished, problems)
+      task is (records,starts,checkPolicy), the batch's records grouped
+      by game and where each game starts in them'''
+    records,starts,checkPolicy = task
+    records = to_records(records)
+    finished = 0
+    problems = []
+    ends = list(starts[1:])+[len(records)]
+    for start,end in zip(starts,ends):
+        try:
+            state = verify_game(records[start:end],checkPolicy)
+        except ReplayError as error:
+            problems.append(str(error))
+            continue
+        if engine.game_over(state):
+            finished += 1
+    return finished,len(starts)-finished-len(problems),problems
+
+def verify_log(path,numProcesses=None,checkPolicy=True):
+    '''verify_log(path,[numProcesses,checkPolicy]) -> (int,int,list)
+    checks every game in the log at path on a pool of numProcesses and
+    returns (games finished, games not finished, problems)'''
+    records = gamelog.read_log(path)
+    order,starts = game_order(records)
+    tasks = []
+    for first in range(0,len(starts),BATCHSIZE):
+        batchStarts = starts[first:first+BATCHSIZE]
+        end = starts[first+BATCHSIZE] if first+BATCHSIZE < len(starts) \
+              else len(order)
+        # the batch's records, copied in game order to send to the pool
+        tasks.append((np.asarray(records[order[batchStarts[0]:end]]),
+                      batchStarts-batchStarts[0],checkPolicy))
+    finished = unfinished = 0
+    problems = []
+    with multiprocessing.Pool(numProcesses) as pool:
+        for batchFinished,batchUnfinished,batchProblems in \
+            pool.imap(verify_batch,tasks):
+            finished += batchFinished
+            unfinished += batchUnfinished
+            problems.extend(batchProblems)
+    return finished,unfinished,problems
+
+def game_records(path,game):
+    '''game_records(path,game) -> list
+    returns the Records of game number game in the log at path'''
+    records = gamelog.read_log(path)
+    return to_records(records[records['game'] == game])
+
+def show_game(root,records,delay=500):
+    '''show_game(root,records,[delay]) -> Frame
+    replays the Records of one game in a new frame of its event on root,
+    making one move every delay ms, and returns the frame'''
+    event = gamelog.EVENTS[records[0].event]
+    eventModule = importlib.import_module(event)
+    rng = RecordedRNG()
+    frame = getattr(eventModule,FRAMES[event])(root,'Replay of game {}'.format(
+        records[0].game),rng)
+    handlers = {gamelog.KEEP:'keep',
+                gamelog.STOP:'stop' if event == 'ShotPut' else 'stop_attempt'}
+
+    def step(number):
+        record = records[number]
+        if record.action in (gamelog.ROLL,gamelog.FOUL):
+            rng.load(record)
+            frame.roll()
+        elif record.action == gamelog.FREEZE:
+            frame.freeze(record.dice.bit_length()-1)
+        else:
+            getattr(frame,handlers[record.action])()
+        if number+1 < len(records):
+            root.after(delay,step,number+1)
+
+    root.after(delay,step,0)
+    return frame
+
+def opponent_states(path,game):
+    '''opponent_states(path,game) -> list
+    returns the (round,rerolls,score) of the player's 400 Meters game at
+    each roll of the head-to-head game number game in the log at path;
+    the player's game is the one started just before it
+    raises ReplayError if the log doesn't hold the two games'''
+    records = gamelog.read_log(path)
+    records = to_records(records[(records['game'] == game) |
+                                 (records['game'] == game-1)])
+    players = {(record.game,record.player,record.event)
+               for record in records}
+    event = gamelog.EVENTS.index('400M')
+    if players != {(game,gamelog.HEADTOHEAD,event),
+                   (game-1,gamelog.HUMAN,event)}:
+        raise ReplayError('game {} is not a head-to-head 400 Meters game '
+                          'after a player\'s'.format(game))
+    state = engine.Decath400MState()
+    rng = RecordedRNG()
+    opponents = []
+    for record in records:  # in the order they were played
+        if record.game == game-1:
+            apply_move(state,record,rng)
+        elif record.action == gamelog.ROLL:
+            opponents.append((state.gameround,state.rerolls,state.score))
+    return opponents
+
+def play_head_to_head(state,rng,opponents):
+    '''play_head_to_head(state,rng,opponents) -> int
+    plays 400 Meters to the end as Decath400MHeadToHeadFrame does and
+    returns the score
+      opponents is the player's (round,rerolls,score) at each roll, as
+      opponent_states() returns them'''
+    rolls = iter(opponents)
+    while not engine.game_over(state):
+        engine.running_roll(state,rng)
+        while True:
+            opponent = next(rolls,None)
+            if opponent is None:
+                raise ReplayError('the computer rolled more than was logged')
+            if not headtohead400m.should_reroll(
+                    headtohead400m.opponent_table(*opponent),state.gameround,
+                    state.rerolls,state.score,engine.running_value(state)):
+                break
+            engine.running_roll(state,rng)
+        engine.running_keep(state)
+    return state.score
+
+def replay_seed(event,seed,launcher=False,headToHead=None):
+    '''replay_seed(event,seed,[launcher,headToHead]) -> int
+    replays the computer's game of event in a game started with
+    --seed=seed, and returns its score
+      launcher is True for a game in decathlon.py, False for one started
+      from the event's own script
+      headToHead is (log path,game number) for a 400 Meters game played
+      with --head-to-head'''
+    args = ['--seed={}'.format(seed)]
+    if launcher:
+        numbers = [module for module,title,playerClass,computerClass
+                   in decathlon.EVENTS]
+        rng = decathlon.event_streams(
+            dice.game_streams(args,decathlon.NUMSTREAMS),
+            numbers.index(event))[1]
+    else:
+        rng = dice.game_streams(args)[1]
+    state = tournament.STATES[event]()
+    if headToHead is not None:
+        return play_head_to_head(state,rng,opponent_states(*headToHead))
+    return tournament.PLAYERS[event](state,frame_policy(event),rng)
+
+def main(args):
+    options = [arg for arg in args if arg.startswith('--')]
+    args = [arg for arg in args if not arg.startswith('--')]
+    command = args[0] if len(args) > 0 else 'verify'
+    if command == 'verify':
+        path = args[1] if len(args) > 1 else 'games.declog'
+        numProcesses = None
+        for option in options:
+            if option.startswith('--processes='):
+                numProcesses = int(option.split('=',1)[1])
+        start = time.perf_counter()
+        finished,unfinished,problems = verify_log(
+            path,numProcesses,'--rules-only' not in options)
+        elapsed = time.perf_counter() - start
+        print('{:,} games finished, {:,} not finished, {} problems, in '
+              '{:.2f} s'.format(finished,unfinished,len(problems),elapsed))
+        for problem in problems[:MAXPROBLEMS]:
+            print('  '+problem)
+        if problems:
+            sys.exit(1)
+    elif command == 'show':
+        from tkinter import Tk
+        delay = 500
+        for option in options:
+            if option.startswith('--delay='):
+                delay = int(option.split('=',1)[1])
+        records = game_records(args[1],int(args[2]))
+        root = Tk()
+        root.title('Replay')
+        show_game(root,records,delay)
+        root.mainloop()
+    elif command == 'seed':
+        seed = None
+        path = None
+        game = None
+        for option in options:
+            if option.startswith('--seed='):
+                seed = int(option.split('=',1)[1])
+            elif option.startswith('--log='):
+                path = option.split('=',1)[1]
+            elif option.startswith('--head-to-head='):
+                game = int(option.split('=',1)[1])
+        headToHead = None if game is None else (path,game)
+        print(replay_seed(args[1],seed,'--launcher' in options,headToHead))
+    else:
+        print(__doc__)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
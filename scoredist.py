@@ -0,0 +1,297 @@
+'''exact final-score distributions for every event under a given policy
+
+Instead of sampling games, this works out the probability of every final
+score by pushing probability mass through the game with array operations:
+each round (or each die, or each roll of the free dice) convolves the mass
+with the distribution of that step.
+
+A distribution is returned as (lowScore,probs), where probs[i] is the
+probability of a final score of lowScore+i.
+
+The pieces that don't depend on the rest of the game are cached: the kept
+part of a roll for each reroll rule, Shot Put attempts for each stopping
+rule and Discus attempts for each (policy,attempt,high score), so many
+policies and rule variants can be compared quickly.
+
+Run it from the command line to print each event's distribution under
+the optimal policy:
+    python scoredist.py [event ...]'''
+import functools
+import sys
+import time
+
+import numpy as np
+
+import solvediscus
+import solveshotput
+import solvereroll
+
+EVENTS = ('100M','400M','1500M','ShotPut','Discus')
+
+def _convolve(first,second):
+    # distribution of the sum of two independent (lowScore,probs) scores
+    return first[0]+second[0],np.convolve(first[1],second[1])
+
+def _add_into(total,dist):
+    # adds the (lowScore,probs) dist into the (lowScore,probs) total
+    low = min(total[0],dist[0])
+    high = max(total[0]+len(total[1]),dist[0]+len(dist[1]))
+    probs = np.zeros(high-low)
+    probs[total[0]-low:total[0]-low+len(total[1])] += total[1]
+    probs[dist[0]-low:dist[0]-low+len(dist[1])] += dist[1]
+    return low,probs
+
+def _trim(dist):
+    # drops the impossible scores from both ends of a distribution
+    lowScore,probs = dist
+    nonzero = np.flatnonzero(probs)
+    if len(nonzero) == 0:
+        return lowScore,probs[:0]
+    return lowScore+nonzero[0],probs[nonzero[0]:nonzero[-1]+1]
+
+def _reroll_masks(faces,numDice,numGroups,numRerolls,policy):
+    # turns a keep table or a (gameround,rerolls,rollValue) -> bool reroll
+    # function into masks[gameround][rerolls][rollValue-minSum]
+    minSum,counts = solvereroll.sum_counts(faces,numDice)
+    sums = range(minSum,minSum+len(counts))
+    masks = []
+    for gameround in range(numGroups):
+        row = []
+        for rerolls in range(numRerolls+1):
+            if rerolls == 0:
+                row.append(tuple(False for rollValue in sums))
+            elif callable(policy):
+                row.append(tuple(bool(policy(gameround,rerolls,rollValue))
+                                 for rollValue in sums))
+            else:
+                keepFrom = policy[gameround][rerolls]
+                row.append(tuple(rollValue < keepFrom for rollValue in sums))
+        masks.append(tuple(row))
+    return tuple(masks)
+
+@functools.lru_cache(maxsize=None)
+def kept_part(faces,numDice,rerollMask):
+    '''kept_part(faces,numDice,rerollMask) -> (float,(int,ndarray))
+    splits one roll of numDice dice by a reroll rule
+    returns (rerollProb,keptDist): the chance that the roll is rerolled,
+    and the distribution of the sums that are kept (not normalized)
+      rerollMask[rollValue-minSum] is True for the sums that are rerolled'''
+    minSum,counts = solvereroll.sum_counts(faces,numDice)
+    probs = counts/counts.sum()
+    mask = np.array(rerollMask)
+    return float(probs[mask].sum()),(minSum,np.where(mask,0.0,probs))
+
+@functools.lru_cache(maxsize=None)
+def _reroll_distribution(faces,numDice,numGroups,numRerolls,masks):
+    # mass[rerolls] is the running-score distribution at the start of a round
+    mass = [(0,np.zeros(1)) for rerolls in range(numRerolls+1)]
+    mass[numRerolls] = (0,np.ones(1))
+    for gameround in range(numGroups):
+        nextMass = [(0,np.zeros(1)) for rerolls in range(numRerolls+1)]
+        # rerolling only moves mass to fewer rerolls, so go from the top
+        for rerolls in range(numRerolls,-1,-1):
+            rerollProb,keptDist = kept_part(faces,numDice,
+                                            masks[gameround][rerolls])
+            if rerolls > 0 and rerollProb > 0:
+                mass[rerolls-1] = _add_into(mass[rerolls-1],
+                    (mass[rerolls][0],rerollProb*mass[rerolls][1]))
+            nextMass[rerolls] = _add_into(nextMass[rerolls],
+                                          _convolve(mass[rerolls],keptDist))
+        mass = nextMass
+    total = (0,np.zeros(1))
+    for dist in mass:
+        total = _add_into(total,dist)
+    return _trim(total)
+
+def reroll_distribution(faces=solvereroll.RUNFACES,numDice=2,numGroups=4,
+                        numRerolls=solvereroll.NUMREROLLS,policy=None):
+    '''reroll_distribution([faces,numDice,numGroups,numRerolls,policy])
+      -> (int,ndarray)
+    returns the final-score distribution of a running event
+    (400 Meters by default)
+      policy is a keep table as made by solvereroll.solve() or a function
+      (gameround,rerolls,rollValue) -> bool that returns True to reroll
+      (the optimal policy by default)'''
+    faces = tuple(faces)
+    if policy is None:
+        policy = solvereroll.solve(faces,numDice,numGroups,numRerolls)[1]
+    masks = _reroll_masks(faces,numDice,numGroups,numRerolls,policy)
+    return _reroll_distribution(faces,numDice,numGroups,numRerolls,masks)
+
+_shotputCache = {}
+
+def shotput_distribution(policy=None,faces=solveshotput.FACES,
+                         foulFace=solveshotput.FOULFACE,
+                         numDice=solveshotput.NUMDICE,
+                         numAttempts=solveshotput.NUMATTEMPTS):
+    '''shotput_distribution([policy,faces,foulFace,numDice,numAttempts])
+      -> (int,ndarray)
+    returns the final high-score distribution of Shot Put
+      policy is a bool array indexed like the stopTable from
+      solveshotput.solve() or a function (attempt,dice,score,best) -> bool
+      that returns True to stop (the optimal policy by default)'''
+    numScores = numDice*max(faces) + 1
+    if policy is None:
+        policy = solveshotput.solve()[1]
+    if callable(policy):
+        table = np.zeros((numAttempts,numDice+1,numScores,numScores),
+                         dtype=bool)
+        for attempt in range(numAttempts):
+            for dice in range(1,numDice+1):
+                for score in range(numScores):
+                    for best in range(numScores):
+                        table[attempt,dice,score,best] = \
+                            policy(attempt+1,dice,score,best)
+        policy = table
+    stopTable = np.asarray(policy,dtype=bool)
+    key = (tuple(faces),foulFace,numDice,numAttempts,stopTable.tobytes())
+    if key not in _shotputCache:
+        _shotputCache[key] = _shotput_distribution(stopTable,tuple(faces),
+                                                   foulFace,numDice,
+                                                   numAttempts)
+    return _shotputCache[key]
+
+def _shotput_distribution(stopTable,faces,foulFace,numDice,numAttempts):
+    numScores = numDice*max(faces) + 1
+    prob = 1/len(faces)
+    scores = np.arange(numScores)
+    # bestMass[best] is the chance of each high score so far
+    bestMass = np.zeros(numScores)
+    bestMass[0] = 1
+    for attempt in range(numAttempts):
+        # mass[score,best] after rolling some dice; the first die is forced
+        mass = np.zeros((numScores,numScores))
+        mass[0] = bestMass
+        attemptMass = np.zeros((numScores,numScores))
+        for dice in range(numDice+1):
+            if dice > 0:
+                stop = stopTable[attempt,dice] if dice < numDice else True
+                attemptMass += np.where(stop,mass,0)
+                mass = np.where(stop,0,mass)
+            if dice == numDice:
+                break
+            # roll the next die: a foul ends the attempt at 0
+            rolled = np.zeros_like(mass)
+            for face in faces:
+                if face == foulFace:
+                    attemptMass[0] += prob*mass.sum(axis=0)
+                else:
+                    rolled[face:] += prob*mass[:numScores-face]
+            mass = rolled
+        # new high score is the larger of the old one and this attempt
+        newBest = np.zeros(numScores)
+        np.add.at(newBest,np.maximum.outer(scores,scores),attemptMass)
+        bestMass = newBest
+    return _trim((0,bestMass))
+
+@functools.lru_cache(maxsize=None)
+def discus_attempt(policy,attempt,best,faces=solvediscus.FACES,
+                   numDice=solvediscus.NUMDICE):
+    '''discus_attempt(policy,attempt,best,[faces,numDice]) -> ndarray
+    returns the distribution of one Discus attempt score (index score//2)
+      policy is a function (attempt,best,frozenCode,rollCode) -> freezeCode
+      or None to stop, like solvediscus.best_move
+      faces and numDice are the dice of a variant of the game'''
+    codeTotal,outcomes = solvediscus.code_tables(tuple(faces),numDice)
+    attemptMass = np.zeros(numDice*max(faces)//2 + 1)
+    # mass over frozen-dice codes, handled in order of dice frozen
+    mass = {0:1.0}
+    for numFrozen in range(numDice+1):
+        for frozenCode in [code for code in mass
+                           if solvediscus.CODECOUNT[code] == numFrozen]:
+            frozenMass = mass.pop(frozenCode)
+            numRolled = numDice - numFrozen
+            if numRolled == 0:  # nothing to roll, so it's a foul
+                attemptMass[0] += frozenMass
+                continue
+            for rollCode,prob in outcomes[numRolled]:
+                if rollCode == 0:  # foul
+                    attemptMass[0] += frozenMass*prob
+                    continue
+                freezeCode = policy(attempt,best,frozenCode,rollCode)
+                if freezeCode is None:  # stop
+                    score = codeTotal[frozenCode] + codeTotal[rollCode]
+                    attemptMass[score//2] += frozenMass*prob
+                else:
+                    newCode = frozenCode + freezeCode
+                    mass[newCode] = mass.get(newCode,0) + frozenMass*prob
+    return attemptMass
+
+def discus_distribution(policy=None,faces=solvediscus.FACES,
+                        numDice=solvediscus.NUMDICE,
+                        numAttempts=solvediscus.NUMATTEMPTS):
+    '''discus_distribution([policy,faces,numDice,numAttempts])
+      -> (int,ndarray)
+    returns the final high-score distribution of Discus (scores 0-30, in
+    the real game)
+      policy is a function like solvediscus.best_move (the optimal policy
+      by default)
+      faces, numDice and numAttempts give a variant of the game'''
+    faces = tuple(faces)
+    rules = (faces,numDice,numAttempts)
+    if policy is None and rules == (solvediscus.FACES,solvediscus.NUMDICE,
+                                    solvediscus.NUMATTEMPTS):
+        policy = solvediscus.best_move
+    elif policy is None:
+        policy = functools.partial(solvediscus.best_move,rules=rules)
+    numScores = numDice*max(faces)//2 + 1
+    bestMass = np.zeros(numScores)
+    bestMass[0] = 1
+    for attempt in range(1,numAttempts+1):
+        newBest = np.zeros(numScores)
+        for best in np.flatnonzero(bestMass):
+            attemptMass = discus_attempt(policy,attempt,2*int(best),faces,
+                                         numDice)
+            np.add.at(newBest,np.maximum(np.arange(numScores),best),
+                      bestMass[best]*attemptMass)
+        bestMass = newBest
+    # spread back out to one entry per point (odd scores can't happen)
+    probs = np.zeros(2*numScores-1)
+    probs[::2] = bestMass
+    return _trim((0,probs))
+
+def event_distribution(event,policy=None):
+    '''event_distribution(event,[policy]) -> (int,ndarray)
+    returns the final-score distribution of one event
+    ('100M','400M','1500M','ShotPut' or 'Discus') under policy
+    (the optimal policy by default)'''
+    if event in solvereroll.EVENTS:
+        numDice,numGroups = solvereroll.EVENTS[event]
+        return reroll_distribution(solvereroll.RUNFACES,numDice,numGroups,
+                                   solvereroll.NUMREROLLS,policy)
+    if event == 'ShotPut':
+        return shotput_distribution(policy)
+    if event == 'Discus':
+        return discus_distribution(policy)
+    raise ValueError('unknown event '+repr(event))
+
+def mean_and_std(dist):
+    '''mean_and_std(dist) -> (float,float)
+    returns the mean and standard deviation of a distribution'''
+    lowScore,probs = dist
+    scores = np.arange(lowScore,lowScore+len(probs))
+    mean = float((scores*probs).sum())
+    return mean,float(np.sqrt((probs*(scores-mean)**2).sum()))
+
+def chance_at_least(dist,score):
+    '''chance_at_least(dist,score) -> float
+    returns the probability of a final score of score or better'''
+    lowScore,probs = dist
+    return float(probs[max(0,score-lowScore):].sum())
+
+def main(args):
+    for event in args or EVENTS:
+        start = time.perf_counter()
+        dist = event_distribution(event)
+        elapsed = time.perf_counter() - start
+        mean,std = mean_and_std(dist)
+        print('{}: mean {:.4f}, std {:.4f}, total {:.12f} ({:.1f} ms)'.format(
+            event,mean,std,dist[1].sum(),1000*elapsed))
+        lowScore,probs = dist
+        for n,prob in enumerate(probs):
+            if prob > 0:
+                print('  {:4d} {:10.6f}%  (at least: {:10.6f}%)'.format(
+                    lowScore+n,100*prob,100*chance_at_least(dist,lowScore+n)))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,181 @@
+'''headless, vectorized Monte Carlo simulator for 400 Meters
+
+Plays many games of 400 Meters at once with NumPy arrays, using the same
+rules and the same reroll chart as Decath400MComputerFrame.  Before the
+run it plays a thousand seeded games through engine.py as well, on the
+dice a frame rolling from dice.DiceRNG(seed) gets, and checks that the
+simulator scores every one the same.
+
+Run it from the command line to get a score distribution:
+    python sim400m.py [numGames] [seed]'''
+import sys
+import time
+
+import numpy as np
+
+import dice
+import engine
+
+FACES = [1,2,3,4,5,-6]  # die values, same as the 400 Meters frames
+NUMROUNDS = 4           # rounds of two dice
+NUMDICE = 2             # dice rolled per round
+NUMREROLLS = 5          # rerolls shared by all rounds
+NUMROLLS = NUMROUNDS + NUMREROLLS  # most rolls a game can ever use
+MINSUM = NUMDICE*min(FACES)  # lowest possible sum of one roll
+MAXSUM = NUMDICE*max(FACES)  # highest possible sum of one roll
+
+def chart_should_reroll(gameround,rerolls,rollValue):
+    '''chart_should_reroll(gameround,rerolls,rollValue) -> bool
+    returns True if the chart in Decath400MComputerFrame.should_reroll()
+    says to reroll, False if it says to keep
+      gameround is the round (0-3), rerolls is the number of rerolls left
+      rollValue is the sum of the two dice just rolled'''
+    # must keep if no rerolls
+    if rerolls == 0:
+        return False
+    # use chart from optimal strategy
+    if gameround == 0 and rerolls >= 2:
+        return rollValue < rerolls
+    if gameround == 0 and rerolls == 1:
+        return rollValue < -1
+    if gameround == 1:
+        return rollValue < (rerolls + 1)
+    if gameround == 2 and rerolls >= 4:
+        return rollValue < 6
+    if gameround == 2 and 3 >= rerolls >= 2:
+        return rollValue < (rerolls + 2)
+    if gameround == 2 and rerolls == 1:
+        return rollValue < 2
+    if gameround == 3 and rerolls >= 3:
+        return rollValue < 7
+    if gameround == 3 and rerolls == 2:
+        return rollValue < 6
+    if gameround == 3 and rerolls == 1:
+        return rollValue < 3
+    return False
+
+def chart_table():
+    '''chart_table() -> ndarray
+    returns the reroll chart as a bool array indexed by
+    [gameround,rerolls,rollValue-MINSUM]'''
+    table = np.zeros((NUMROUNDS,NUMREROLLS+1,MAXSUM-MINSUM+1),dtype=bool)
+    for gameround in range(NUMROUNDS):
+        for rerolls in range(NUMREROLLS+1):
+            for rollValue in range(MINSUM,MAXSUM+1):
+                table[gameround,rerolls,rollValue-MINSUM] = \
+                    chart_should_reroll(gameround,rerolls,rollValue)
+    return table
+
+def random_rolls(numGames,seed=None):
+    '''random_rolls(numGames,[seed]) -> ndarray
+    returns a uint8 array of die tops (1-6) with shape (numGames,NUMROLLS,2)
+    row n holds every roll game n could possibly need, in order'''
+    rng = np.random.default_rng(seed)
+    return rng.integers(1,7,size=(numGames,NUMROLLS,NUMDICE),dtype=np.uint8)
+
+def seeded_rolls(seeds):
+    '''seeded_rolls(seeds) -> ndarray
+    returns the rolls that engine.running_roll() makes for each seed in
+    seeds, as a frame does: game n rolls its dice one at a time from
+    dice.DiceRNG(seeds[n])'''
+    rolls = np.empty((len(seeds),NUMROLLS,NUMDICE),dtype=np.uint8)
+    for n,seed in enumerate(seeds):
+        rng = dice.DiceRNG(seed)
+        for t in range(NUMROLLS):
+            for d in range(NUMDICE):
+                rolls[n,t,d] = rng.randrange(1,7)
+    return rolls
+
+def simulate(rolls,rerollTable=None):
+    '''simulate(rolls,[rerollTable]) -> ndarray
+    plays one game per row of rolls and returns the final scores (int16)
+      rolls is an array of die tops as made by random_rolls()
+      rerollTable is a bool array indexed like chart_table()
+        (the Decath400MComputerFrame chart by default)'''
+    if rerollTable is None:
+        rerollTable = chart_table()
+    numGames = rolls.shape[0]
+    faces = np.array(FACES,dtype=np.int16)
+    # sum of the two dice for every roll slot of every game
+    values = faces[rolls.astype(np.intp)-1].sum(axis=2)
+    games = np.arange(numGames)
+    score = np.zeros(numGames,dtype=np.int16)
+    rerolls = np.full(numGames,NUMREROLLS,dtype=np.intp)
+    used = np.zeros(numGames,dtype=np.intp)  # roll slots used so far
+    for gameround in range(NUMROUNDS):
+        # first roll of the round
+        rollValue = values[games,used]
+        used += 1
+        active = games
+        while len(active) > 0:
+            # reroll the games that the table tells to, keep the rest
+            reroll = rerollTable[gameround,rerolls[active],
+                                 rollValue[active]-MINSUM]
+            active = active[reroll]
+            rerolls[active] -= 1
+            rollValue[active] = values[active,used[active]]
+            used[active] += 1
+        score += rollValue
+    return score
+
+def play_engine(rng,shouldReroll=chart_should_reroll):
+    '''play_engine(rng,[shouldReroll]) -> int
+    plays one game through engine.running_roll() and running_keep(), the
+    moves Decath400MComputerFrame makes, and returns the final score
+      rng is the dice stream to roll with'''
+    state = engine.Decath400MState()
+    while not engine.game_over(state):
+        engine.running_roll(state,rng)
+        while shouldReroll(state.gameround,state.rerolls,
+                           engine.running_value(state)):
+            engine.running_roll(state,rng)
+        engine.running_keep(state)
+    return state.score
+
+def check_reference(seeds):
+    '''check_reference(seeds) -> bool
+    returns True if simulate() gives exactly the same score as
+    play_engine() with dice.DiceRNG(seed) for every seed in seeds'''
+    seeds = list(seeds)
+    vectorScores = simulate(seeded_rolls(seeds))
+    for n,seed in enumerate(seeds):
+        if play_engine(dice.DiceRNG(seed)) != vectorScores[n]:
+            return False
+    return True
+
+def run(numGames,seed=None,chunkSize=1000000,rerollTable=None):
+    '''run(numGames,[seed,chunkSize,rerollTable]) -> (ndarray,float)
+    plays numGames games in chunks of chunkSize
+    returns the count of games for each score (index 0 is the lowest
+    possible score) and the throughput in games/sec'''
+    rng = np.random.default_rng(seed)
+    lowScore = NUMROUNDS*MINSUM
+    counts = np.zeros(NUMROUNDS*(MAXSUM-MINSUM)+1,dtype=np.int64)
+    start = time.perf_counter()
+    played = 0
+    while played < numGames:
+        size = min(chunkSize,numGames-played)
+        rolls = rng.integers(1,7,size=(size,NUMROLLS,NUMDICE),dtype=np.uint8)
+        scores = simulate(rolls,rerollTable)
+        counts += np.bincount(scores-lowScore,minlength=len(counts))
+        played += size
+    elapsed = time.perf_counter() - start
+    return counts,numGames/elapsed
+
+def main(args):
+    numGames = int(args[0]) if len(args) > 0 else 1000000
+    seed = int(args[1]) if len(args) > 1 else 0
+    print('reference check:','ok' if check_reference(range(seed,seed+1000))
+          else 'MISMATCH')
+    counts,gamesPerSec = run(numGames,seed)
+    scores = np.arange(len(counts)) + NUMROUNDS*MINSUM
+    mean = (counts*scores).sum()/numGames
+    std = np.sqrt((counts*(scores-mean)**2).sum()/numGames)
+    print('{} games at {:,.0f} games/sec'.format(numGames,gamesPerSec))
+    print('mean score {:.4f}, std {:.4f}'.format(mean,std))
+    for score,count in zip(scores,counts):
+        if count > 0:
+            print('{:4d} {:8.5f}%'.format(score,100*count/numGames))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
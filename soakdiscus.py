@@ -0,0 +1,76 @@
+'''soak test for the Discus frame
+
+Plays many games of Discus in one DecathDiscusComputerFrame, using
+reset() between games, and checks that the number of Tk widgets, the
+number of canvas items on the dice and the process memory (RSS) stay
+flat.
+
+It needs a display; on a machine without one use a virtual X display:
+    xvfb-run python soakdiscus.py [numGames] [seed]'''
+import resource
+import sys
+from tkinter import Tk,TclError,DISABLED
+
+import Discus
+import dice
+import engine
+
+RSSSLACK = 1024  # RSS growth allowed after warming up, in KB
+
+def count_widgets(widget):
+    '''count_widgets(widget) -> int
+    returns the number of widgets under widget, counting itself'''
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+def rss():
+    '''rss() -> int
+    returns the resident memory of this process in KB'''
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1])*resource.getpagesize()//1024
+    except OSError:  # no /proc, so fall back on the peak
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def play_game(root,frame):
+    '''play_game(root,frame) -> int
+    plays one game in a computer frame by pressing its buttons and
+    returns the number of attempts'''
+    while not engine.game_over(frame.state):
+        if frame.rollButton['state'] != DISABLED:
+            frame.roll()
+        else:
+            frame.stop_attempt()
+        root.update_idletasks()
+    return frame.state.NUMATTEMPTS
+
+def main(args):
+    numGames = int(args[0]) if len(args) > 0 else 2000
+    seed = int(args[1]) if len(args) > 1 else 0
+    try:
+        root = Tk()
+    except TclError:
+        print('no display: run this under xvfb-run')
+        return
+    frame = Discus.DecathDiscusComputerFrame(root,dice.DiceRNG(seed))
+    attempts = 0
+    samples = []
+    for game in range(numGames):
+        if game > 0:
+            frame.reset()
+        attempts += play_game(root,frame)
+        if (game+1) % max(1,numGames//10) == 0:
+            sample = (count_widgets(root),
+                      sum(len(die.find_all()) for die in frame.dice),rss())
+            samples.append(sample)
+            print('{:7d} games {:8d} attempts: {} widgets, {} die items, '
+                  'RSS {} KB'.format(game+1,attempts,*sample))
+    root.destroy()
+    # compare with the first sample, taken once things have warmed up
+    first,last = samples[0],samples[-1]
+    flat = first[:2] == last[:2] and last[2]-first[2] <= RSSSLACK
+    print('flat' if flat else 'GROWING')
+    if not flat:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,140 @@
+'''exact optimal-strategy solver for 400 Meters
+
+Works out, by backward induction over (gameround, rerolls left, roll sum),
+the reroll decisions that maximize the expected final score.  The solving
+itself is done by solvereroll, which handles all the running events; this
+module keeps the 400 Meters view of it.
+
+Run it from the command line to print the optimal chart and every state
+where the chart in Decath400MComputerFrame.should_reroll() differs:
+    python solve400m.py'''
+import functools
+import sys
+import time
+from fractions import Fraction
+
+import solvereroll
+
+FACES = (1,2,3,4,5,-6)  # die values, same as the 400 Meters frames
+NUMROUNDS = 4
+NUMDICE = 2
+NUMREROLLS = 5
+MINSUM = NUMDICE*min(FACES)  # lowest roll sum, the first column of a chart
+
+def sum_distribution(faces=FACES,numDice=NUMDICE):
+    '''sum_distribution([faces,numDice]) -> dict
+    returns the exact distribution of the sum of numDice dice with the
+    given faces, as a dict mapping sum -> Fraction probability'''
+    minSum,counts = solvereroll.sum_counts(tuple(faces),numDice)
+    total = int(counts.sum())
+    return {minSum+n:Fraction(count,total)
+            for n,count in enumerate(counts.tolist()) if count > 0}
+
+@functools.lru_cache(maxsize=None)
+def solve(faces=FACES,numRounds=NUMROUNDS,numDice=NUMDICE,
+          numRerolls=NUMREROLLS):
+    '''solve([faces,numRounds,numDice,numRerolls]) -> (list,list)
+    solves the game exactly with solvereroll and returns
+    (valueTable,rerollTable)
+      valueTable[gameround][rerolls] is the expected score still to come
+        from the start of gameround (before rolling), as a Fraction
+      rerollTable[gameround][rerolls][rollValue-minSum] is True if the
+        best play is to reroll that roll, where minSum=numDice*min(faces)
+    ties are broken in favor of keeping'''
+    valueTable,keepTable = solvereroll.solve(faces,numDice,numRounds,
+                                             numRerolls)
+    minSum = numDice*min(faces)
+    maxSum = numDice*max(faces)
+    rerollTable = tuple(tuple(tuple(rollValue < keepFrom
+                                    for rollValue in range(minSum,maxSum+1))
+                              for keepFrom in row)
+                        for row in keepTable)
+    return valueTable,rerollTable
+
+def should_reroll(gameround,rerolls,rollValue):
+    '''should_reroll(gameround,rerolls,rollValue) -> bool
+    returns True if the optimal strategy rerolls rollValue in gameround
+    with the given number of rerolls left, False if it keeps'''
+    rerollTable = solve()[1]
+    return rerollTable[gameround][rerolls][rollValue-MINSUM]
+
+def expected_score(policy=None):
+    '''expected_score([policy]) -> Fraction
+    returns the exact expected final score of a game played with policy,
+    a function (gameround,rerolls,rollValue) -> bool that returns True
+    to reroll (the optimal strategy by default)'''
+    if policy is None:
+        return solve()[0][0][NUMREROLLS]
+    dist = sum_distribution()
+
+    @functools.lru_cache(maxsize=None)
+    def value(gameround,rerolls):
+        if gameround == NUMROUNDS:
+            return Fraction(0)
+        total = Fraction(0)
+        for rollValue,prob in dist.items():
+            if rerolls > 0 and policy(gameround,rerolls,rollValue):
+                total += prob*value(gameround,rerolls-1)
+            else:
+                total += prob*(rollValue+value(gameround+1,rerolls))
+        return total
+
+    return value(0,NUMREROLLS)
+
+def chart_disagreements():
+    '''chart_disagreements() -> list
+    returns a list of (gameround,rerolls,rollValue,chartRerolls,loss)
+    for every state where the hard-coded chart from
+    Decath400MComputerFrame.should_reroll() differs from the optimum
+      chartRerolls is what the chart does (True means reroll)
+      loss is the expected score given up in that state (a Fraction)'''
+    from sim400m import chart_should_reroll
+    valueTable = solve()[0]
+    dist = sum_distribution()
+    result = []
+    for gameround in range(NUMROUNDS):
+        for rerolls in range(1,NUMREROLLS+1):
+            keepLater = valueTable[gameround+1][rerolls]
+            rerollNow = valueTable[gameround][rerolls-1]
+            for rollValue in dist:
+                chartRerolls = chart_should_reroll(gameround,rerolls,rollValue)
+                if chartRerolls != should_reroll(gameround,rerolls,rollValue):
+                    loss = abs((rollValue+keepLater) - rerollNow)
+                    result.append((gameround,rerolls,rollValue,
+                                   chartRerolls,loss))
+    return result
+
+def main(args):
+    from sim400m import chart_should_reroll
+    solvereroll.value.cache_clear()
+    start = time.perf_counter()
+    # solve it afresh, rather than load it from the table cache
+    solvereroll.solve_tables.uncached(FACES,NUMDICE,NUMROUNDS,NUMREROLLS)
+    elapsed = time.perf_counter() - start
+    print('solved in {:.2f} ms'.format(1000*elapsed))
+    valueTable,rerollTable = solve()
+    print('optimal expected score {:.6f}'.format(
+        float(valueTable[0][NUMREROLLS])))
+    print('chart expected score   {:.6f}'.format(float(expected_score(
+        chart_should_reroll))))
+    # the optimal chart, as the lowest sum that is kept
+    minSum = NUMDICE*min(FACES)
+    print('lowest sum kept (round x rerolls left):')
+    for gameround in range(NUMROUNDS):
+        cells = []
+        for rerolls in range(1,NUMREROLLS+1):
+            row = rerollTable[gameround][rerolls]
+            kept = [minSum+n for n in range(len(row)) if not row[n]]
+            cells.append('{:3d}'.format(min(kept)))
+        print('  round {}: {}'.format(gameround,' '.join(cells)))
+    disagreements = chart_disagreements()
+    print('{} states where the chart differs:'.format(len(disagreements)))
+    for gameround,rerolls,rollValue,chartRerolls,loss in disagreements:
+        print('  round {} rerolls {} sum {:3d}: chart {}s, optimum {}s'
+              ' (loses {:.4f} when reached)'.format(
+                  gameround,rerolls,rollValue,
+                  'reroll' if chartRerolls else 'keep',
+                  'keep' if chartRerolls else 'reroll',float(loss)))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,218 @@
+'''exact optimal-strategy solver for Discus
+
+Works out when to stop and which scoring dice to freeze so that the
+expected high score over 3 attempts is as large as possible.
+
+A group of dice is encoded as a bitmask holding how many of them show
+2, 4 and 6, three bits each:
+    code = count2 | count4<<3 | count6<<6
+so adding two groups is just adding their codes.  The frozen dice of an
+attempt and the result of each roll are both kept this way.
+
+solve_rules() solves variants of the game with other dice, numbers of
+dice or attempts; their codes count the scoring values of their dice in
+the same three fields, lowest value first.
+
+The tables are kept in the table cache (see tablecache), so later runs
+load them instead of solving again.
+
+Run it from the command line to time the solve:
+    python solvediscus.py'''
+import functools
+import sys
+import time
+from fractions import Fraction
+from math import factorial
+
+import numpy as np
+
+import tablecache
+
+FACES = (0,2,0,4,0,6)  # die values, same as the Discus frame
+SCORINGFACES = (2,4,6)
+NUMDICE = 5
+NUMATTEMPTS = 3
+NUMSCORES = NUMDICE*max(FACES)//2 + 1  # attempt scores 0,2,...,30
+
+def encode(values):
+    '''encode(values) -> int
+    returns the bitmask code for a group of die values'''
+    code = 0
+    for value in values:
+        if value > 0:
+            code += 1 << 3*SCORINGFACES.index(value)
+    return code
+
+def decode(code):
+    '''decode(code) -> tuple
+    returns (count2,count4,count6) for a bitmask code'''
+    return (code & 7,(code >> 3) & 7,(code >> 6) & 7)
+
+def _outcomes(faces,numDice):
+    # every distinct result of rolling numDice dice, with its probability
+    zeroProb = Fraction(faces.count(0),len(faces))
+    prob2,prob4,prob6 = [Fraction(faces.count(face),len(faces))
+                         for face in scoring_faces(faces)] + \
+                        [0]*(3-len(scoring_faces(faces)))
+    result = []
+    for count2 in range(numDice+1):
+        for count4 in range(numDice+1-count2):
+            for count6 in range(numDice+1-count2-count4):
+                zeros = numDice - count2 - count4 - count6
+                ways = factorial(numDice)//(factorial(zeros)*
+                       factorial(count2)*factorial(count4)*factorial(count6))
+                prob = ways * zeroProb**zeros * \
+                       prob2**count2 * prob4**count4 * prob6**count6
+                if prob > 0:
+                    result.append((count2 | count4 << 3 | count6 << 6,prob))
+    return result
+
+def _subsets(code):
+    # every nonempty group of dice that can be frozen out of code
+    count2,count4,count6 = decode(code)
+    return [a | b << 3 | c << 6
+            for a in range(count2+1)
+            for b in range(count4+1)
+            for c in range(count6+1) if a+b+c > 0]
+
+def scoring_faces(faces):
+    '''scoring_faces(faces) -> tuple
+    returns the different scoring values of dice with the given faces,
+    lowest first, as the fields of their codes count them'''
+    return tuple(sorted(set(face for face in faces if face > 0)))
+
+@functools.lru_cache(maxsize=None)
+def code_tables(faces,numDice):
+    '''code_tables(faces,numDice) -> (list,list)
+    returns (codeTotal,outcomes) for numDice dice with the given faces
+      codeTotal[code] is the total of the dice in code
+      outcomes[n] lists (code,probability) for rolling n of the dice
+    faces must be 0 or even, with at most three scoring values, and
+    numDice at most 7, so that a count fits in its field'''
+    codeTotal = [sum(n*face for n,face in zip(decode(code),
+                                              scoring_faces(faces)))
+                 for code in range(512)]
+    outcomes = [None] + [[(code,float(prob))
+                          for code,prob in _outcomes(faces,n)]
+                         for n in range(1,numDice+1)]
+    return codeTotal,outcomes
+
+# number of dice and total of every possible code, and transition
+# tables: OUTCOMES[n] lists (code,probability) for rolling n dice
+CODECOUNT = [sum(decode(code)) for code in range(512)]
+CODETOTAL,OUTCOMES = code_tables(FACES,NUMDICE)
+SUBSETS = [_subsets(code) for code in range(512)]
+
+@tablecache.cached(rules=(FACES,NUMDICE,NUMATTEMPTS))
+def solve():
+    '''solve() -> (ndarray,ndarray)
+    solves the game exactly and returns (gameValue,rollValues)
+      gameValue[attempt-1][best//2] is the expected final high score from
+        the start of attempt (1-3) with a high score of best so far
+      rollValues[attempt-1][frozenCode] is an array over best//2 of the
+        expected final high score from rolling the unfrozen dice (NaN for
+        a frozenCode that can't come up)'''
+    return solve_rules(FACES,NUMDICE,NUMATTEMPTS)
+
+def solve_rules(faces,numDice,numAttempts):
+    '''solve_rules(faces,numDice,numAttempts) -> (ndarray,ndarray)
+    solves a variant of the game and returns its tables as solve() does
+      faces are the die values (see code_tables()), numDice the dice in
+      an attempt and numAttempts the number of attempts
+    the last k attempts of a game are a game of k attempts, so
+    gameValue[numAttempts-k][0] is the expected score of that game'''
+    codeTotal,outcomes = code_tables(faces,numDice)
+    numScores = numDice*max(faces)//2 + 1
+    gameValue = np.empty((numAttempts+1,numScores))
+    bestIndex = np.arange(numScores)
+    # after the last attempt the high score is final
+    gameValue[numAttempts] = 2*bestIndex
+    rollValues = np.full((numAttempts,512,numScores),np.nan)
+    for attempt in range(numAttempts-1,-1,-1):
+        # payoff[x] is the value, for every best so far, of scoring 2*x
+        payoff = gameValue[attempt+1][np.maximum.outer(bestIndex,bestIndex)]
+        memo = {}
+
+        def roll_value(frozenCode):
+            if frozenCode in memo:
+                return memo[frozenCode]
+            numRolled = numDice - CODECOUNT[frozenCode]
+            if numRolled == 0:  # nothing to roll, so it's a foul
+                value = payoff[0]
+            else:
+                value = np.zeros(numScores)
+                for rollCode,prob in outcomes[numRolled]:
+                    value += prob*move_value(frozenCode,rollCode)
+            memo[frozenCode] = value
+            return value
+
+        def move_value(frozenCode,rollCode):
+            if rollCode == 0:  # no unfrozen die scored, so it's a foul
+                return payoff[0]
+            stopScore = codeTotal[frozenCode] + codeTotal[rollCode]
+            value = payoff[stopScore//2]
+            for freezeCode in SUBSETS[rollCode]:
+                value = np.maximum(value,roll_value(frozenCode+freezeCode))
+            return value
+
+        gameValue[attempt] = roll_value(0)
+        for frozenCode,value in memo.items():
+            rollValues[attempt,frozenCode] = value
+    gameValue.flags.writeable = False
+    rollValues.flags.writeable = False
+    return gameValue,rollValues
+
+@functools.lru_cache(maxsize=8)
+def _variant_tables(faces,numDice,numAttempts):
+    # (gameValue,rollValues,codeTotal) of a variant, for best_move()
+    return solve_rules(faces,numDice,numAttempts)+ \
+           (code_tables(faces,numDice)[0],)
+
+def best_move(attempt,best,frozenCode,rollCode,rules=None):
+    '''best_move(attempt,best,frozenCode,rollCode,[rules]) -> int or None
+    returns the code of the dice to freeze before rolling again,
+    or None if the best move is to stop
+      attempt is the attempt number (1-3), best is the high score so far
+      frozenCode is the code of the dice frozen before this roll
+      rollCode is the code of the unfrozen dice that were just rolled
+      rules is (faces,numDice,numAttempts) to play a variant of the game
+        (see solve_rules()), or None for the real one'''
+    if rollCode == 0:
+        return None  # fouled, so there is nothing to decide
+    if rules is None:
+        gameValue,rollValues = solve()
+        codeTotal = CODETOTAL
+    else:
+        gameValue,rollValues,codeTotal = _variant_tables(*rules)
+    # stopping moves on to the next attempt with a new high score
+    stopValue = gameValue[attempt][max(best,codeTotal[frozenCode]+
+                                       codeTotal[rollCode])//2]
+    memo = rollValues[attempt-1]
+    move = None
+    moveValue = stopValue
+    for freezeCode in SUBSETS[rollCode]:
+        value = memo[frozenCode+freezeCode][best//2]
+        if value > moveValue:
+            move = freezeCode
+            moveValue = value
+    return move
+
+def expected_score():
+    '''expected_score() -> float
+    returns the expected final high score of a game played optimally'''
+    return float(solve()[0][0][0])
+
+def main(args):
+    start = time.perf_counter()
+    solve.uncached()  # afresh, rather than from the table cache
+    elapsed = time.perf_counter() - start
+    gameValue,rollValues = solve()
+    print('solved in {:.1f} ms ({} frozen states per attempt)'.format(
+        1000*elapsed,int(np.sum(~np.isnan(rollValues[0,:,0])))))
+    print('optimal expected high score {:.4f}'.format(expected_score()))
+    for attempt in range(1,NUMATTEMPTS+1):
+        print('attempt {} from a high score of 0: {:.4f}'.format(
+            attempt,gameValue[attempt-1][0]))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,141 @@
+'''exact reroll-budget solver for the running events
+
+100 Meters (2 groups of 4 dice), 400 Meters (4 groups of 2 dice) and
+1500 Meters (8 groups of 1 die) are all the same game: roll a group of
+dice, then keep it or spend one of the shared rerolls on it.  This solves
+that whole family from one code path.
+
+The value of a state only depends on the dice, the number of groups still
+to play and the rerolls left, so values are memoized on exactly that and
+are shared between events and rule variants.  The best move is always
+"reroll anything below a threshold", so a solved event is a small table of
+the lowest roll sum to keep.  Solved tables are kept in the table cache
+(see tablecache), so later runs load them instead of solving again.
+
+Run it from the command line to print the table for each event:
+    python solvereroll.py'''
+import functools
+import math
+import sys
+import time
+from fractions import Fraction
+
+import numpy as np
+
+import tablecache
+
+RUNFACES = (1,2,3,4,5,-6)  # die values used by all the running events
+NUMREROLLS = 5
+# (dice per group, number of groups) for each running event
+EVENTS = {'100M':(4,2),'400M':(2,4),'1500M':(1,8)}
+
+@functools.lru_cache(maxsize=None)
+def sum_counts(faces,numDice):
+    '''sum_counts(faces,numDice) -> (int,ndarray)
+    returns (minSum,counts) where counts[i] is the number of ways that
+    numDice dice with the given faces add up to minSum+i
+    (out of len(faces)**numDice), built by convolution'''
+    faceCounts = np.bincount(np.array(faces)-min(faces))
+    if numDice == 1:
+        return min(faces),faceCounts
+    minSum,counts = sum_counts(faces,numDice-1)
+    return minSum+min(faces),np.convolve(counts,faceCounts)
+
+@functools.lru_cache(maxsize=None)
+def value(faces,numDice,groupsLeft,rerolls):
+    '''value(faces,numDice,groupsLeft,rerolls) -> Fraction
+    returns the exact expected score still to come, playing optimally,
+    from the start of a group (before rolling) with groupsLeft groups to
+    play and rerolls left'''
+    if groupsLeft == 0:
+        return Fraction(0)
+    minSum,counts = sum_counts(faces,numDice)
+    later = value(faces,numDice,groupsLeft-1,rerolls)
+    if rerolls > 0:
+        rerollValue = value(faces,numDice,groupsLeft,rerolls-1)
+    total = 0
+    for n,count in enumerate(counts.tolist()):
+        keepValue = minSum + n + later
+        if rerolls > 0 and rerollValue > keepValue:
+            total += count*rerollValue
+        else:
+            total += count*keepValue
+    return Fraction(total,int(counts.sum()))
+
+def keep_from(faces,numDice,groupsLeft,rerolls):
+    '''keep_from(faces,numDice,groupsLeft,rerolls) -> int
+    returns the lowest roll sum that the best strategy keeps
+    (a roll is rerolled exactly when its sum is lower than this)'''
+    minSum = numDice*min(faces)
+    if rerolls == 0:
+        return minSum
+    # reroll only if it is worth strictly more than keeping
+    threshold = value(faces,numDice,groupsLeft,rerolls-1) - \
+                value(faces,numDice,groupsLeft-1,rerolls)
+    return max(minSum,math.ceil(threshold))
+
+def _exact_tables(faces,numDice,numGroups,numRerolls):
+    # (valueTable,keepTable) as solve() returns them, straight from value()
+    valueTable = [[value(faces,numDice,numGroups-gameround,rerolls)
+                   for rerolls in range(numRerolls+1)]
+                  for gameround in range(numGroups+1)]
+    keepTable = tuple(tuple(keep_from(faces,numDice,numGroups-gameround,
+                                      rerolls)
+                            for rerolls in range(numRerolls+1))
+                      for gameround in range(numGroups))
+    return valueTable,keepTable
+
+@tablecache.cached()
+def solve_tables(faces,numDice,numGroups,numRerolls):
+    '''solve_tables(faces,numDice,numGroups,numRerolls) -> tuple
+    solves one event and returns its tables as int64 arrays, which are
+    kept in the table cache: (numerators,denominators,keepTable), where
+    numerators/denominators is solve()'s valueTable
+    raises OverflowError if a value is too big to store exactly'''
+    valueTable,keepTable = _exact_tables(faces,numDice,numGroups,numRerolls)
+    numerators = np.array([[value.numerator for value in row]
+                           for row in valueTable],dtype=np.int64)
+    denominators = np.array([[value.denominator for value in row]
+                             for row in valueTable],dtype=np.int64)
+    return numerators,denominators,np.array(keepTable,dtype=np.int64)
+
+@functools.lru_cache(maxsize=None)
+def solve(faces,numDice,numGroups,numRerolls=NUMREROLLS):
+    '''solve(faces,numDice,numGroups,[numRerolls]) -> (list,tuple)
+    solves one event and returns (valueTable,keepTable)
+      valueTable[gameround][rerolls] is the expected score still to come
+        from the start of gameround (before rolling), as a Fraction
+      keepTable[gameround][rerolls] is the lowest roll sum to keep'''
+    try:
+        numerators,denominators,keepTable = solve_tables(faces,numDice,
+                                                         numGroups,numRerolls)
+    except OverflowError:  # can't be cached, so solve it here
+        return _exact_tables(faces,numDice,numGroups,numRerolls)
+    valueTable = [[Fraction(numerator,denominator)
+                   for numerator,denominator in zip(numeratorRow,
+                                                    denominatorRow)]
+                  for numeratorRow,denominatorRow in zip(
+                      numerators.tolist(),denominators.tolist())]
+    return valueTable,tuple(tuple(row) for row in keepTable.tolist())
+
+def solve_event(event):
+    '''solve_event(event) -> (list,tuple)
+    solves the running event named event ('100M', '400M' or '1500M')
+    and returns (valueTable,keepTable) as solve() does'''
+    numDice,numGroups = EVENTS[event]
+    return solve(RUNFACES,numDice,numGroups,NUMREROLLS)
+
+def main(args):
+    for event in args or list(EVENTS):
+        start = time.perf_counter()
+        valueTable,keepTable = solve_event(event)
+        elapsed = time.perf_counter() - start
+        print('{}: tables in {:.2f} ms, optimal expected score {:.6f}'
+              .format(event,1000*elapsed,float(valueTable[0][NUMREROLLS])))
+        print('  lowest sum kept (round x rerolls left 1-5):')
+        for gameround,row in enumerate(keepTable):
+            print('    round {}: {}'.format(gameround,' '.join(
+                '{:3d}'.format(keep) for keep in row[1:])))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
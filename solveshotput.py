@@ -0,0 +1,126 @@
+'''exact optimal-stopping solver for Shot Put
+
+Works out, for every (attempt, dice used, attempt score, high score so far),
+whether to roll the next die or stop, so that the expected high score over
+3 attempts is as large as possible.  The tables are kept in the table
+cache (see tablecache), so later runs load them instead of solving again.
+
+Run it from the command line to time the solve:
+    python solveshotput.py'''
+import sys
+import time
+
+import numpy as np
+
+import tablecache
+
+FACES = (1,2,3,4,5,6)  # die values, same as the Shot Put frame
+FOULFACE = 1           # rolling this fouls the attempt
+NUMDICE = 8
+NUMATTEMPTS = 3
+NUMSCORES = NUMDICE*max(FACES) + 1  # attempt scores 0-48
+
+@tablecache.cached(rules=(FACES,FOULFACE,NUMDICE,NUMATTEMPTS))
+def solve():
+    '''solve() -> (ndarray,ndarray,ndarray)
+    solves the game exactly and returns (gameValue,stopTable,rollTable)
+      gameValue[attempt-1][best] is the expected final high score from
+        the start of attempt (1-3) with a high score of best so far
+      stopTable[attempt-1][dice][score][best] is True if the best move is
+        to stop after rolling dice dice for an attempt score of score
+      rollTable[attempt-1][dice][score][best] is the expected final high
+        score from rolling another die there, and playing on the best way'''
+    return solve_rules(FACES,FOULFACE,NUMDICE,NUMATTEMPTS)
+
+def solve_rules(faces,foulFace,numDice,numAttempts):
+    '''solve_rules(faces,foulFace,numDice,numAttempts) -> tuple
+    solves a variant of the game and returns its tables as solve() does
+      faces are the die values, foulFace the value that fouls (None for
+      no fouls), numDice the dice in an attempt and numAttempts the
+      number of attempts
+    the last k attempts of a game are a game of k attempts, so
+    gameValue[numAttempts-k][0] is the expected score of that game'''
+    numScores = numDice*max(faces) + 1
+    prob = 1/len(faces)
+    foulProb = faces.count(foulFace)*prob
+    scores = np.arange(numScores)
+    gameValue = np.empty((numAttempts+1,numScores))
+    gameValue[numAttempts] = scores  # after the last attempt
+    stopTable = np.zeros((numAttempts,numDice+1,numScores,numScores),
+                         dtype=bool)
+    rollTable = np.zeros((numAttempts,numDice+1,numScores,numScores))
+    for attempt in range(numAttempts-1,-1,-1):
+        # stopValue[score][best] is the value of stopping on score
+        stopValue = gameValue[attempt+1][np.maximum.outer(scores,scores)]
+        # moveValue[dice][score][best] is the value of playing on from
+        # having rolled dice dice for score, with the best move
+        moveValue = np.empty((numDice+1,numScores,numScores))
+        moveValue[numDice] = stopValue  # no dice left, must stop
+        for dice in range(numDice-1,-1,-1):
+            # distribution of the next die: a foul ends the attempt at 0
+            rollValue = np.full((numScores,numScores),
+                                foulProb*stopValue[0][None,:])
+            for face in faces:
+                if face != foulFace:
+                    rollValue[:numScores-face] += prob*moveValue[dice+1][face:]
+            rollTable[attempt][dice] = rollValue
+            if dice == 0:  # can't stop before the first roll
+                moveValue[dice] = rollValue
+            else:
+                stopTable[attempt][dice] = stopValue >= rollValue
+                moveValue[dice] = np.maximum(stopValue,rollValue)
+        stopTable[attempt][numDice] = True
+        rollTable[attempt][numDice] = stopValue  # no die left to roll
+        gameValue[attempt] = moveValue[0][0]
+    gameValue.flags.writeable = False
+    stopTable.flags.writeable = False
+    rollTable.flags.writeable = False
+    return gameValue,stopTable,rollTable
+
+def should_stop(attempt,dice,score,best):
+    '''should_stop(attempt,dice,score,best) -> bool
+    returns True if the best move is to stop, False if it is to roll on
+      attempt is the attempt number (1-3), dice is the number of dice
+      rolled so far this attempt, score is the attempt score so far and
+      best is the high score so far'''
+    return bool(solve()[1][attempt-1,dice,score,best])
+
+def expected_score():
+    '''expected_score() -> float
+    returns the expected final high score of a game played optimally'''
+    return float(solve()[0][0][0])
+
+def reachable_scores(dice):
+    '''reachable_scores(dice) -> ndarray
+    returns a bool array, indexed by attempt score, that is True for the
+    scores dice dice can add up to without a foul'''
+    reachable = np.zeros(NUMSCORES,dtype=bool)
+    reachable[0] = True
+    for n in range(dice):
+        rolled = np.zeros(NUMSCORES,dtype=bool)
+        for face in FACES:
+            if face != FOULFACE:
+                rolled[face:] |= reachable[:NUMSCORES-face]
+        reachable = rolled
+    return reachable
+
+def main(args):
+    start = time.perf_counter()
+    solve.uncached()  # afresh, rather than from the table cache
+    elapsed = time.perf_counter() - start
+    gameValue,stopTable,rollTable = solve()
+    print('solved in {:.1f} ms'.format(1000*elapsed))
+    print('optimal expected high score {:.4f}'.format(expected_score()))
+    # with nothing to beat, the lowest attempt score that the dice rolled
+    #  so far can reach and that is worth stopping on (- if none is)
+    for attempt in range(1,NUMATTEMPTS+1):
+        cells = []
+        for dice in range(1,NUMDICE):
+            stops = np.flatnonzero(stopTable[attempt-1,dice,:,0] &
+                                   reachable_scores(dice))
+            cells.append('{:3d}'.format(stops[0]) if len(stops) else '  -')
+        print('attempt {}, stop from (dice 1-7): {}'.format(
+            attempt,' '.join(cells)))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
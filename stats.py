@@ -0,0 +1,352 @@
+'''constant-memory statistics for bulk simulations
+
+Simulations of billions of games can't keep every score.  The
+accumulators here keep a fixed summary instead, and two accumulators
+built on different workers merge into the one that would have seen all
+of their games:
+    Moments        count, mean and variance, updated one value at a time
+                   with Welford's method and merged with Chan's formula
+    Histogram      exact integer counts of each score in a bounded range,
+                   so exact means, spreads and quantiles
+    QuantileSketch approximate quantiles of values with no bounded range
+                   (such as timings), to a given relative error, from
+                   counts of logarithmically sized buckets
+Histogram and QuantileSketch merge exactly, since they only add counts.
+Moments merges to within rounding; merging in a fixed order (as the pool
+runs here do, by chunk) gives the same result however many processes
+play the games.
+
+An event plugs in through one hook: EventStats.game_finished(state) is
+called with the state of each finished game, and GameStats sends each
+state to the EventStats of its event.  Either takes arrays of final
+scores too, for the vectorized simulators.  The summary of every event
+together pickles to 10 to 15 KB: about a kilobyte for each event's
+histogram, and one or two for its timing sketch, which keeps a count for
+each of the hundred or so buckets that its games' times fall in.  Only a
+game slower or quicker than any before adds a bucket, so the size levels
+off however many games are played.
+
+Run it from the command line to play games of every event on a pool of
+processes and print their statistics:
+    python stats.py [numGames] [seed] [--processes=N]'''
+import collections
+import math
+import multiprocessing
+import pickle
+import sys
+import time
+
+import numpy as np
+
+import engine
+
+class Moments:
+    '''count, mean and variance of a stream of values'''
+
+    def __init__(self):
+        '''Moments() -> Moments
+        creates an accumulator that has seen no values'''
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+
+    def add(self,value):
+        '''Moments.add(value)
+        adds one value'''
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self.m2 += delta*(value-self.mean)
+
+    def add_array(self,values):
+        '''Moments.add_array(values)
+        adds an array of values'''
+        values = np.asarray(values,dtype=float)
+        if len(values) == 0:
+            return
+        batch = Moments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values-batch.mean)**2).sum())
+        self.merge(batch)
+
+    def merge(self,other):
+        '''Moments.merge(other)
+        adds the values that the Moments other has seen'''
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta*other.count/count
+        self.m2 += other.m2 + delta*delta*self.count*other.count/count
+        self.count = count
+
+    def variance(self):
+        '''Moments.variance() -> float
+        returns the (population) variance of the values'''
+        return self.m2/self.count if self.count > 0 else 0.0
+
+    def std(self):
+        '''Moments.std() -> float
+        returns the (population) standard deviation of the values'''
+        return math.sqrt(self.variance())
+
+class Histogram:
+    '''exact counts of integer scores from low to high'''
+
+    def __init__(self,low,high):
+        '''Histogram(low,high) -> Histogram
+        creates an empty histogram of the scores low to high'''
+        self.low = low
+        self.counts = np.zeros(high-low+1,dtype=np.int64)
+
+    def add(self,score):
+        '''Histogram.add(score)
+        counts one score'''
+        self.counts[score-self.low] += 1
+
+    def add_array(self,scores):
+        '''Histogram.add_array(scores)
+        counts an array of scores'''
+        self.counts += np.bincount(np.asarray(scores)-self.low,
+                                   minlength=len(self.counts))
+
+    def merge(self,other):
+        '''Histogram.merge(other)
+        adds the counts of the Histogram other, of the same scores'''
+        self.counts += other.counts
+
+    def count(self):
+        '''Histogram.count() -> int
+        returns the number of scores counted'''
+        return int(self.counts.sum())
+
+    def distribution(self):
+        '''Histogram.distribution() -> (int,ndarray)
+        returns the scores as a distribution (lowScore,probs), in the form
+        scoredist.py uses'''
+        return self.low,self.counts/max(self.count(),1)
+
+    def mean_and_std(self):
+        '''Histogram.mean_and_std() -> (float,float)
+        returns the exact mean and standard deviation of the scores'''
+        scores = np.arange(self.low,self.low+len(self.counts))
+        total = self.count()
+        if total == 0:
+            return 0.0,0.0
+        # exact in integers, then one rounding each
+        sumScores = int((self.counts*scores).sum())
+        sumSquares = sum(count*score*score for count,score in
+                         zip(self.counts.tolist(),scores.tolist()))
+        mean = sumScores/total
+        return mean,math.sqrt(max(0,total*sumSquares-sumScores**2))/total
+
+    def quantile(self,q):
+        '''Histogram.quantile(q) -> int
+        returns the lowest score that at least a fraction q of the scores
+        are at or below'''
+        cumulative = np.cumsum(self.counts)
+        n = int(np.searchsorted(cumulative,q*cumulative[-1]))
+        return self.low + min(n,len(self.counts)-1)
+
+class QuantileSketch:
+    '''approximate quantiles of a stream of values, to a relative error'''
+
+    def __init__(self,relativeError=0.01):
+        '''QuantileSketch([relativeError]) -> QuantileSketch
+        creates an empty sketch whose quantiles are within relativeError
+        of a value that was added'''
+        self.relativeError = relativeError
+        self.gamma = (1+relativeError)/(1-relativeError)
+        self.logGamma = math.log(self.gamma)
+        # counts of positive and negative values by bucket: bucket i holds
+        # magnitudes from gamma**(i-1) to gamma**i
+        self.positive = collections.Counter()
+        self.negative = collections.Counter()
+        self.zeros = 0
+        self.count = 0
+
+    def _bucket(self,magnitude):
+        # bucket of a positive magnitude
+        return math.ceil(math.log(magnitude)/self.logGamma)
+
+    def add(self,value):
+        '''QuantileSketch.add(value)
+        adds one value'''
+        self.count += 1
+        if value > 0:
+            self.positive[self._bucket(value)] += 1
+        elif value < 0:
+            self.negative[self._bucket(-value)] += 1
+        else:
+            self.zeros += 1
+
+    def add_array(self,values):
+        '''QuantileSketch.add_array(values)
+        adds an array of values'''
+        values = np.asarray(values,dtype=float)
+        self.count += len(values)
+        self.zeros += int(np.count_nonzero(values == 0))
+        for counter,magnitudes in ((self.positive,values[values > 0]),
+                                   (self.negative,-values[values < 0])):
+            buckets,counts = np.unique(np.ceil(np.log(magnitudes)/
+                                               self.logGamma),
+                                       return_counts=True)
+            counter.update(dict(zip(buckets.astype(int).tolist(),
+                                    counts.tolist())))
+
+    def merge(self,other):
+        '''QuantileSketch.merge(other)
+        adds the values that the QuantileSketch other, with the same
+        relative error, has seen'''
+        if other.gamma != self.gamma:
+            raise ValueError('sketches have different relative errors')
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self,q):
+        '''QuantileSketch.quantile(q) -> float
+        returns a value within the relative error of the one that a
+        fraction q of the values are at or below'''
+        if self.count == 0:
+            raise ValueError('no values in the sketch')
+        rank = q*(self.count-1)
+        seen = 0
+        # from the most negative value up
+        for bucket in sorted(self.negative,reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -2*self.gamma**bucket/(self.gamma+1)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return 2*self.gamma**bucket/(self.gamma+1)
+        return 2*self.gamma**max(self.positive)/(self.gamma+1)
+
+def score_range(stateClass):
+    '''score_range(stateClass) -> (int,int)
+    returns the lowest and highest possible final scores of the event
+    played with states of stateClass'''
+    if issubclass(stateClass,engine.RunningState):
+        numDice = stateClass.NUMDICE*stateClass.NUMROUNDS
+        return numDice*min(stateClass.FACES),numDice*max(stateClass.FACES)
+    return 0,stateClass.NUMDICE*max(stateClass.FACES)
+
+class EventStats:
+    '''statistics of the final scores of one event'''
+
+    def __init__(self,stateClass):
+        '''EventStats(stateClass) -> EventStats
+        creates the statistics of the event played with states of
+        stateClass, with no games yet'''
+        self.stateClass = stateClass
+        self.moments = Moments()
+        self.histogram = Histogram(*score_range(stateClass))
+        self.times = QuantileSketch()  # seconds per game, if timed
+
+    def game_finished(self,state,seconds=None):
+        '''EventStats.game_finished(state,[seconds])
+        adds the final score of a finished game, and how long it took
+        to play if seconds is given'''
+        self.moments.add(state.score)
+        self.histogram.add(state.score)
+        if seconds is not None:
+            self.times.add(seconds)
+
+    def add_scores(self,scores):
+        '''EventStats.add_scores(scores)
+        adds an array of final scores'''
+        self.moments.add_array(scores)
+        self.histogram.add_array(scores)
+
+    def merge(self,other):
+        '''EventStats.merge(other)
+        adds the games of the EventStats other, of the same event'''
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+        self.times.merge(other.times)
+
+class GameStats:
+    '''statistics of the final scores of every event'''
+
+    STATES = (engine.Decath100MState,engine.Decath400MState,
+              engine.Decath1500MState,engine.ShotPutState,
+              engine.DiscusState)  # in the order of scoredist.EVENTS
+
+    def __init__(self):
+        '''GameStats() -> GameStats
+        creates the statistics of every event, with no games yet'''
+        self.events = {stateClass:EventStats(stateClass)
+                       for stateClass in self.STATES}
+
+    def game_finished(self,state,seconds=None):
+        '''GameStats.game_finished(state,[seconds])
+        adds a finished game to the statistics of its event'''
+        self.events[type(state)].game_finished(state,seconds)
+
+    def merge(self,other):
+        '''GameStats.merge(other)
+        adds the games of the GameStats other'''
+        for stateClass,eventStats in other.events.items():
+            self.events[stateClass].merge(eventStats)
+
+def play_chunk(task):
+    '''play_chunk(task) -> (int,GameStats)
+    plays one chunk of games of every event with the optimal policies
+    and returns (chunk,statistics)
+      task is (chunk,size,seed)'''
+    import tournament  # it imports this module
+    chunk,size,seed = task
+    rng = tournament.chunk_rng(seed,chunk)
+    policies = tournament.get_policies(('optimal',)*len(tournament.EVENTS))
+    gameStats = GameStats()
+    for event,policy in zip(tournament.EVENTS,policies):
+        player = tournament.PLAYERS[event]
+        stateClass = tournament.STATES[event]
+        for game in range(size):
+            start = time.perf_counter()
+            state = stateClass()
+            player(state,policy,rng)
+            gameStats.game_finished(state,time.perf_counter()-start)
+    return chunk,gameStats
+
+def main(args):
+    import scoredist
+    numbers = [arg for arg in args if not arg.startswith('--')]
+    numGames = int(numbers[0]) if len(numbers) > 0 else 100000
+    seed = int(numbers[1]) if len(numbers) > 1 else 0
+    processes = None
+    for arg in args:
+        if arg.startswith('--processes='):
+            processes = int(arg[len('--processes='):])
+    chunkSize = 10000
+    tasks = [(chunk,min(chunkSize,numGames-chunk*chunkSize),seed)
+             for chunk in range((numGames+chunkSize-1)//chunkSize)]
+    total = GameStats()
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for chunk,gameStats in pool.imap(play_chunk,tasks):  # in order
+            total.merge(gameStats)
+    elapsed = time.perf_counter() - start
+    print('{:,} games of each event in {:.1f} s; statistics take {:.1f} KB'
+          .format(numGames,elapsed,len(pickle.dumps(total))/1024))
+    print('{:8s} {:>9s} {:>9s} {:>9s} {:>8s} {:>14s} {:>16s}'.format(
+        'event','mean','exact','hist','std','p1/p50/p99','game us p50/p99'))
+    for event,stateClass in zip(scoredist.EVENTS,GameStats.STATES):
+        eventStats = total.events[stateClass]
+        histogram = eventStats.histogram
+        print('{:8s} {:9.4f} {:9.4f} {:9.4f} {:8.4f} {:>14s} {:>16s}'.format(
+            event,eventStats.moments.mean,scoredist.mean_and_std(
+                scoredist.event_distribution(event))[0],
+            histogram.mean_and_std()[0],eventStats.moments.std(),
+            '/'.join(str(histogram.quantile(q)) for q in (0.01,0.5,0.99)),
+            '/'.join('{:.0f}'.format(1e6*eventStats.times.quantile(q))
+                     for q in (0.5,0.99))))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,176 @@
+'''sweep of the events' optimal expected scores over variants of the rules
+
+For every combination on a grid of rule variants this works out the
+expected score of the best strategy and the spread (standard deviation)
+of the final score under it:
+    running events: die faces, dice per round, rounds and rerolls
+    Shot Put: die faces, the foul face (or none), dice and attempts
+    Discus: die faces, dice and attempts
+The variants are split into tasks that share their sub-results, and the
+tasks are run in a pool of processes.  A running task takes one set of
+faces and dice per round: solvereroll.value() is memoized on the rounds
+and rerolls left, so solving the most rounds and rerolls solves every
+smaller game on the way, and the dice-sum distributions and kept parts
+of rolls are shared by all of them.  A Shot Put or Discus task solves the
+most attempts once, since the last k attempts of a game are a game of k
+attempts.
+
+The results go to one .npz file with a column for each field, one row per
+variant; a field that doesn't apply to an event (rounds in Shot Put, the
+foul face in Discus) is 0.
+
+Run it from the command line:
+    python sweep.py [--out=PATH] [--processes=N]'''
+import functools
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+import scoredist
+import solvediscus
+import solvereroll
+import solveshotput
+
+# the grid of variants
+RUNFACES = (solvereroll.RUNFACES,(1,2,3,4,5,6),(0,2,0,4,0,6),
+            (1,2,3,4,5,-3))
+RUNDICE = range(1,5)       # dice per round
+RUNROUNDS = range(1,9)
+RUNREROLLS = range(0,13)
+SHOTPUTFACES = (solveshotput.FACES,(1,1,3,4,5,6),(1,2,3,4,5,5))
+SHOTPUTFOULS = (solveshotput.FOULFACE,None)
+SHOTPUTDICE = range(4,13)
+DISCUSFACES = (solvediscus.FACES,(0,2,2,4,4,6),(0,0,0,4,0,6),(0,2,0,4,6,6))
+DISCUSDICE = range(1,8)    # a code has room for 7 dice of a value
+ATTEMPTS = range(1,7)      # in Shot Put and Discus
+
+EVENTKINDS = ('running','ShotPut','Discus')  # in the order of the rows
+# the output columns, and the type of each
+COLUMNS = (('event','U7'),('faces','i1'),('numDice','i1'),('numRounds','i1'),
+           ('numRerolls','i1'),('numAttempts','i1'),('foulFace','i1'),
+           ('mean','f8'),('std','f8'))
+
+def running_task(faces,numDice):
+    '''running_task(faces,numDice) -> list
+    returns the rows for the running events with numDice dice per round
+    of the given faces, for every number of rounds and rerolls'''
+    rows = []
+    for numRounds in RUNROUNDS:
+        for numRerolls in RUNREROLLS:
+            mean = solvereroll.value(faces,numDice,numRounds,numRerolls)
+            keepTable = [[solvereroll.keep_from(faces,numDice,
+                                                numRounds-gameround,rerolls)
+                          for rerolls in range(numRerolls+1)]
+                         for gameround in range(numRounds)]
+            dist = scoredist.reroll_distribution(faces,numDice,numRounds,
+                                                 numRerolls,keepTable)
+            rows.append(('running',faces,numDice,numRounds,numRerolls,0,0,
+                         float(mean),scoredist.mean_and_std(dist)[1]))
+    return rows
+
+def shotput_task(faces,foulFace,numDice):
+    '''shotput_task(faces,foulFace,numDice) -> list
+    returns the rows for Shot Put with numDice dice of the given faces,
+    fouling on foulFace, for every number of attempts'''
+    rows = []
+    mostAttempts = max(ATTEMPTS)
+    gameValue,stopTable,rollTable = solveshotput.solve_rules(
+        faces,foulFace,numDice,mostAttempts)
+    for numAttempts in ATTEMPTS:
+        skipped = mostAttempts-numAttempts
+        dist = scoredist.shotput_distribution(stopTable[skipped:],faces,
+                                              foulFace,numDice,numAttempts)
+        rows.append(('ShotPut',faces,numDice,0,0,numAttempts,foulFace or 0,
+                     float(gameValue[skipped][0]),
+                     scoredist.mean_and_std(dist)[1]))
+    return rows
+
+def _last_attempts_move(rules,skipped,attempt,best,frozenCode,rollCode):
+    # best move in a Discus game that starts skipped attempts into the
+    # variant rules
+    return solvediscus.best_move(attempt+skipped,best,frozenCode,rollCode,
+                                 rules)
+
+def discus_task(faces,numDice):
+    '''discus_task(faces,numDice) -> list
+    returns the rows for Discus with numDice dice of the given faces, for
+    every number of attempts'''
+    rows = []
+    rules = (faces,numDice,max(ATTEMPTS))
+    gameValue,rollValues = solvediscus.solve_rules(*rules)
+    for numAttempts in ATTEMPTS:
+        skipped = max(ATTEMPTS)-numAttempts
+        policy = functools.partial(_last_attempts_move,rules,skipped)
+        dist = scoredist.discus_distribution(policy,faces,numDice,
+                                             numAttempts)
+        rows.append(('Discus',faces,numDice,0,0,numAttempts,0,
+                     float(gameValue[skipped][0]),
+                     scoredist.mean_and_std(dist)[1]))
+    return rows
+
+def tasks():
+    '''tasks() -> list
+    returns the tasks of the sweep as (function,args), biggest first'''
+    result = [(running_task,(faces,numDice))
+              for numDice in reversed(RUNDICE) for faces in RUNFACES]
+    result += [(discus_task,(faces,numDice))
+               for numDice in reversed(DISCUSDICE) for faces in DISCUSFACES]
+    result += [(shotput_task,(faces,foulFace,numDice))
+               for numDice in reversed(SHOTPUTDICE)
+               for faces in SHOTPUTFACES for foulFace in SHOTPUTFOULS]
+    return result
+
+def run_task(task):
+    '''run_task(task) -> list
+    runs a task from tasks() and returns its rows'''
+    function,args = task
+    return function(*args)
+
+def sweep(numProcesses=None):
+    '''sweep([numProcesses]) -> dict
+    runs every task in a pool of numProcesses processes (one per core by
+    default) and returns the columns of the results, by name'''
+    rows = []
+    with multiprocessing.Pool(numProcesses) as pool:
+        for taskRows in pool.imap_unordered(run_task,tasks()):
+            rows += taskRows
+    rows.sort(key=lambda row: (EVENTKINDS.index(row[0]),)+row[2:7]+row[1])
+    return {name:np.array([row[n] for row in rows],dtype=dtype)
+            for n,(name,dtype) in enumerate(COLUMNS)}
+
+def main(args):
+    path = 'sweep.npz'
+    numProcesses = None
+    for arg in args:
+        if arg.startswith('--out='):
+            path = arg[len('--out='):]
+        elif arg.startswith('--processes='):
+            numProcesses = int(arg[len('--processes='):])
+    start = time.perf_counter()
+    columns = sweep(numProcesses)
+    elapsed = time.perf_counter() - start
+    np.savez(path,**columns)
+    print('{:,} variants in {:.1f} s on {} processes, written to {}'.format(
+        len(columns['mean']),elapsed,numProcesses or os.cpu_count(),path))
+    # the real rules of each event, to check against the solvers
+    real = [('100M',solvereroll.RUNFACES,4,2,solvereroll.NUMREROLLS,0,0),
+            ('400M',solvereroll.RUNFACES,2,4,solvereroll.NUMREROLLS,0,0),
+            ('1500M',solvereroll.RUNFACES,1,8,solvereroll.NUMREROLLS,0,0),
+            ('ShotPut',solveshotput.FACES,solveshotput.NUMDICE,0,0,
+             solveshotput.NUMATTEMPTS,solveshotput.FOULFACE),
+            ('Discus',solvediscus.FACES,solvediscus.NUMDICE,0,0,
+             solvediscus.NUMATTEMPTS,0)]
+    for name,faces,*fields in real:
+        match = np.all(columns['faces'] == faces,axis=1)
+        for column,value in zip(['numDice','numRounds','numRerolls',
+                                 'numAttempts','foulFace'],fields):
+            match &= columns[column] == value
+        n = np.flatnonzero(match)[0]
+        print('{:8s} mean {:8.4f}, std {:7.4f}'.format(
+            name,columns['mean'][n],columns['std'][n]))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
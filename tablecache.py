@@ -0,0 +1,183 @@
+'''on-disk cache of the solvers' policy and value tables
+
+The solvers work their tables out the first time they are asked for
+them.  cached() wraps a solver so that the NumPy arrays it returns are
+also saved, one .npy file each, in the cache directory, and later runs
+map them back in with np.load(mmap_mode='r') instead of solving again.
+Only the pages that are actually read get loaded, so a table is ready in
+the time it takes to open its files.
+
+Each entry is named after the solver, and keyed by a hash of its rule
+parameters (faces, dice, rounds, rerolls, attempts), the arguments it was
+called with and the source of the modules it is built from.  Changing any
+of those gives a new key, so a stale table is never read; the old entry
+is removed when the new one is saved.  Set DECATHLON_CACHE to a directory
+to keep the cache there, or to an empty string to turn it off.
+
+Run it from the command line to time loading each table against solving
+it:
+    python tablecache.py [--clear]'''
+import functools
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+FORMAT = 1  # bump if the layout of an entry changes
+CACHEDIR = os.environ.get('DECATHLON_CACHE',
+                          os.path.join(os.path.expanduser('~'),'.cache',
+                                       'decathlon'))
+
+_sourceDigests = {}  # hash of each module's source file, by file name
+
+def source_digest(fileName):
+    '''source_digest(fileName) -> str
+    returns a hash of the contents of the source file fileName'''
+    if fileName not in _sourceDigests:
+        with open(fileName,'rb') as sourceFile:
+            _sourceDigests[fileName] = hashlib.sha1(
+                sourceFile.read()).hexdigest()
+    return _sourceDigests[fileName]
+
+def module_name(function):
+    '''module_name(function) -> str
+    returns the name of the module function is defined in, taken from its
+    file, so that it is the same when the module is run as a script
+    (where __module__ is '__main__')'''
+    fileName = sys.modules[function.__module__].__file__
+    return os.path.splitext(os.path.basename(fileName))[0]
+
+def entry_name(function,rules,modules,args):
+    '''entry_name(function,rules,modules,args) -> str
+    returns the name of the cache entry for function(*args)
+    the name is the function's, then a hash of args, then a hash of the
+    rules, the format and the source of function's module and of
+    modules, so entries for the same call share everything up to the
+    last hash'''
+    sources = [sys.modules[function.__module__].__file__]+ \
+              [module.__file__ for module in modules]
+    argsHash = hashlib.sha1(repr(args).encode()).hexdigest()[:12]
+    rulesHash = hashlib.sha1(repr(
+        (FORMAT,rules,[source_digest(source) for source in sources]))
+        .encode()).hexdigest()[:16]
+    return '{}.{}-{}-{}'.format(module_name(function),function.__qualname__,
+                                argsHash,rulesHash)
+
+def load_array(fileName):
+    '''load_array(fileName) -> ndarray
+    maps the .npy file fileName into memory, read-only'''
+    # a plain ndarray view of the map, since indexing a np.memmap is slow
+    return np.load(fileName,mmap_mode='r').view(np.ndarray)
+
+def load(path):
+    '''load(path) -> ndarray or tuple
+    maps the arrays of the cache entry at path into memory, read-only
+    returns one array if the entry holds a single table'''
+    names = os.listdir(path)
+    if names == ['table.npy']:
+        return load_array(os.path.join(path,'table.npy'))
+    return tuple(load_array(os.path.join(path,'{}.npy'.format(n)))
+                 for n in range(len(names)))
+
+def save(path,result):
+    '''save(path,result)
+    saves result (an array or a tuple of them) as the cache entry at
+    path, and removes the other entries for the same call'''
+    cacheDir,name = os.path.split(path)
+    try:
+        os.makedirs(cacheDir,exist_ok=True)
+        # write somewhere else first, so an entry is never seen half written
+        tempDir = tempfile.mkdtemp(dir=cacheDir,prefix='.new-')
+    except OSError:  # nowhere to keep it, so it's solved every run
+        return
+    try:
+        if isinstance(result,np.ndarray):
+            np.save(os.path.join(tempDir,'table.npy'),result)
+        else:
+            for n,array in enumerate(result):
+                np.save(os.path.join(tempDir,'{}.npy'.format(n)),array)
+        shutil.rmtree(path,ignore_errors=True)  # an unreadable old copy
+        os.rename(tempDir,path)
+    except OSError:  # another process saved it first, or the disk is full
+        shutil.rmtree(tempDir,ignore_errors=True)
+        return
+    stalePrefix = name[:name.rindex('-')+1]
+    for other in os.listdir(cacheDir):
+        if other.startswith(stalePrefix) and other != name:
+            shutil.rmtree(os.path.join(cacheDir,other),ignore_errors=True)
+
+def cached(rules=(),modules=()):
+    '''cached([rules,modules]) -> decorator
+    returns a decorator for a solver that returns an array or a tuple of
+    arrays, which keeps each result in memory and in the cache directory
+      rules holds the rule parameters the tables are built for
+      modules lists the modules, besides the solver's own, whose code the
+        tables depend on
+    the wrapped solver has cache_clear() to forget the results held in
+    memory, and uncached, the solver itself'''
+    def decorator(function):
+        results = {}
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            if args in results:
+                return results[args]
+            if CACHEDIR == '':  # caching is off
+                result = function(*args)
+            else:
+                path = os.path.join(CACHEDIR,entry_name(function,rules,
+                                                        modules,args))
+                try:
+                    result = load(path)
+                except (OSError,ValueError):  # missing or unreadable
+                    result = function(*args)
+                    save(path,result)
+            results[args] = result
+            return result
+        wrapper.cache_clear = results.clear
+        wrapper.uncached = function
+        return wrapper
+    return decorator
+
+def main(args):
+    import headtohead400m
+    import solvediscus
+    import solvereroll
+    import solveshotput
+    if '--clear' in args and os.path.isdir(CACHEDIR):
+        shutil.rmtree(CACHEDIR)
+    tables = [('solvereroll '+event,solvereroll.solve_tables,
+               (solvereroll.RUNFACES,)+solvereroll.EVENTS[event]+
+               (solvereroll.NUMREROLLS,))
+              for event in solvereroll.EVENTS]
+    tables += [('solveshotput',solveshotput.solve,()),
+               ('solvediscus',solvediscus.solve,()),
+               ('headtohead400m known',headtohead400m.solve_known,()),
+               ('headtohead400m final',headtohead400m.final_distributions,
+                ())]
+    print('cache in {}'.format(CACHEDIR or '(off)'))
+    totalSolve = totalLoad = 0
+    for name,solver,solverArgs in tables:
+        solvereroll.value.cache_clear()
+        start = time.perf_counter()
+        solver.uncached(*solverArgs)
+        solveTime = time.perf_counter() - start
+        solver.cache_clear()
+        solver(*solverArgs)  # saves it if it isn't there yet
+        solver.cache_clear()
+        start = time.perf_counter()
+        solver(*solverArgs)
+        loadTime = time.perf_counter() - start
+        print('{:22s} solves in {:7.2f} ms, loads in {:5.2f} ms'.format(
+            name,1000*solveTime,1000*loadTime))
+        totalSolve += solveTime
+        totalLoad += loadTime
+    print('{:22s} solves in {:7.2f} ms, loads in {:5.2f} ms'.format(
+        'all',1000*totalSolve,1000*totalLoad))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
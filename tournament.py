@@ -0,0 +1,334 @@
+'''multiprocess decathlon tournament runner
+
+Simulated athletes play all five events with the rules in engine.py (the
+same rules the game frames use), each event under its own policy, and
+the results are merged into standings: the score distribution of every
+event and of the total, and the leading athletes.
+
+Policies take the same forms as in scoredist.py, so a simulated mean can
+be checked against the exact one:
+    running events: a keep table or (gameround,rerolls,rollValue) -> bool
+    Shot Put: (attempt,dice,score,best) -> bool, True to stop
+    Discus: (attempt,best,frozenCode,rollCode) -> freezeCode or None
+get_policy() looks them up by name ('optimal', 'timid', 'myopic' for the
+running events, and 'chart' for 400 Meters).
+
+Athletes are played in chunks on a process pool.  Chunk n always rolls
+its dice from its own stream spawned from (seed,n), so a run gives the
+same results however many processes play it.  Chunks are merged as they
+finish and only histograms and the leaders are kept, so memory use does
+not grow with the number of athletes; every athlete's scores can be
+streamed to a CSV file instead.
+
+Run it from the command line:
+    python tournament.py [numAthletes] [seed] [EVENT=policy ...]
+                         [--processes=N] [--out=scores.csv]'''
+import collections
+import functools
+import heapq
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+import dice
+import engine
+import scoredist
+import sim400m
+import solvediscus
+import solvereroll
+import solveshotput
+import stats
+
+EVENTS = scoredist.EVENTS
+STATES = {'100M':engine.Decath100MState,'400M':engine.Decath400MState,
+          '1500M':engine.Decath1500MState,'ShotPut':engine.ShotPutState,
+          'Discus':engine.DiscusState}
+POLICYNAMES = ('optimal','timid','myopic','chart')
+NUMLEADERS = 10  # athletes listed in the standings
+CHUNKSAHEAD = 2  # chunks queued per process before the parent merges
+
+def keep_first(gameround,rerolls,rollValue):
+    '''keep_first(gameround,rerolls,rollValue) -> bool
+    running-event policy that never rerolls'''
+    return False
+
+def reroll_below_mean(meanRoll,gameround,rerolls,rollValue):
+    '''reroll_below_mean(meanRoll,gameround,rerolls,rollValue) -> bool
+    running-event policy that rerolls any roll worth less than meanRoll,
+    the mean of a roll, while it has rerolls left'''
+    return rerolls > 0 and rollValue < meanRoll
+
+def stop_first(attempt,dice,score,best):
+    '''stop_first(attempt,dice,score,best) -> bool
+    Shot Put policy that stops after the first die'''
+    return True
+
+def stop_discus(attempt,best,frozenCode,rollCode):
+    '''stop_discus(attempt,best,frozenCode,rollCode) -> None
+    Discus policy that stops after the first roll'''
+    return None
+
+def get_policy(event,name):
+    '''get_policy(event,name) -> policy
+    returns the policy called name for event, in the form that
+    scoredist.event_distribution() takes'''
+    if name == 'optimal':
+        if event in solvereroll.EVENTS:
+            return solvereroll.solve_event(event)[1]
+        if event == 'ShotPut':
+            return solveshotput.should_stop
+        if event == 'Discus':
+            return solvediscus.best_move
+    elif name == 'timid':
+        if event in solvereroll.EVENTS:
+            return keep_first
+        if event == 'ShotPut':
+            return stop_first
+        if event == 'Discus':
+            return stop_discus
+    elif name == 'myopic' and event in solvereroll.EVENTS:
+        faces = STATES[event].FACES
+        return functools.partial(reroll_below_mean,
+                                 STATES[event].NUMDICE*sum(faces)/len(faces))
+    elif name == 'chart' and event == '400M':
+        return sim400m.chart_should_reroll
+    raise ValueError('no policy {!r} for event {!r}'.format(name,event))
+
+@functools.lru_cache(maxsize=None)
+def get_policies(policyNames):
+    '''get_policies(policyNames) -> tuple
+    returns the policy for each event in EVENTS
+      policyNames is a tuple of policy names in the same order'''
+    return tuple(get_policy(event,name)
+                 for event,name in zip(EVENTS,policyNames))
+
+def score_range(event):
+    '''score_range(event) -> (int,int)
+    returns the lowest and highest possible final scores of event'''
+    return stats.score_range(STATES[event])
+
+def play_running(state,policy,rng):
+    '''play_running(state,policy,rng) -> int
+    plays a running event to the end and returns the score
+      policy is a keep table or a function (gameround,rerolls,rollValue)
+      -> bool that returns True to reroll'''
+    while not engine.game_over(state):
+        engine.running_roll(state,rng)
+        while state.rerolls > 0:
+            rollValue = engine.running_value(state)
+            if callable(policy):
+                reroll = policy(state.gameround,state.rerolls,rollValue)
+            else:
+                reroll = rollValue < policy[state.gameround][state.rerolls]
+            if not reroll:
+                break
+            engine.running_roll(state,rng)
+        engine.running_keep(state)
+    return state.score
+
+def play_shotput(state,policy,rng):
+    '''play_shotput(state,policy,rng) -> int
+    plays Shot Put to the end and returns the high score
+      policy is a function (attempt,dice,score,best) -> bool that returns
+      True to stop'''
+    while not engine.game_over(state):
+        engine.shotput_roll(state,rng)
+        while not state.rollFouled and state.die < state.NUMDICE and \
+              not policy(state.attempt,state.die,state.attemptscore,
+                         state.score):
+            engine.shotput_roll(state,rng)
+        engine.shotput_stop(state)
+    return state.score
+
+def play_discus(state,policy,rng):
+    '''play_discus(state,policy,rng) -> int
+    plays Discus to the end and returns the high score
+      policy is a function (attempt,best,frozenCode,rollCode) -> freezeCode
+      that returns the dice to freeze, or None to stop'''
+    while not engine.game_over(state):
+        engine.discus_roll(state,rng)
+        while not state.rollFouled:
+            values = [state.FACES[top-1] for top in state.tops]
+            frozenCode = solvediscus.encode(
+                [values[n] for n in range(state.NUMDICE)
+                 if state.frozen & (1 << n)])
+            rollCode = solvediscus.encode(
+                [values[n] for n in range(state.NUMDICE)
+                 if not state.frozen & (1 << n)])
+            freezeCode = policy(state.attempt,state.score,frozenCode,rollCode)
+            if freezeCode is None:
+                break
+            # freeze the chosen dice, as DecathDiscusComputerFrame does
+            counts = list(solvediscus.decode(freezeCode))
+            for n in range(state.NUMDICE):
+                if engine.discus_can_freeze(state,n) and \
+                   counts[solvediscus.SCORINGFACES.index(values[n])] > 0:
+                    counts[solvediscus.SCORINGFACES.index(values[n])] -= 1
+                    engine.discus_freeze(state,n)
+            if not engine.discus_roll(state,rng):
+                break  # nothing new was frozen, so stop
+        engine.discus_stop(state)
+    return state.score
+
+PLAYERS = {'100M':play_running,'400M':play_running,'1500M':play_running,
+           'ShotPut':play_shotput,'Discus':play_discus}
+
+def chunk_rng(seed,chunk):
+    '''chunk_rng(seed,chunk) -> dice.DiceRNG
+    returns the dice stream for chunk number chunk of a run with seed'''
+    return dice.DiceRNG(np.random.SeedSequence(seed,spawn_key=(chunk,)))
+
+def play_chunk(task):
+    '''play_chunk(task) -> (int,ndarray)
+    plays one chunk of athletes and returns (chunk,scores)
+      task is (chunk,size,seed,policyNames)
+      scores[i,e] is athlete i's score in event EVENTS[e] (int16)'''
+    chunk,size,seed,policyNames = task
+    policies = get_policies(policyNames)
+    rng = chunk_rng(seed,chunk)
+    scores = np.empty((size,len(EVENTS)),dtype=np.int16)
+    for athlete in range(size):
+        for e,event in enumerate(EVENTS):
+            scores[athlete,e] = PLAYERS[event](STATES[event](),policies[e],
+                                               rng)
+    return chunk,scores
+
+class Standings:
+    '''merged results of a tournament, built up one chunk at a time'''
+
+    def __init__(self):
+        '''Standings() -> Standings
+        creates empty standings'''
+        self.numAthletes = 0
+        self.events = [stats.EventStats(STATES[event]) for event in EVENTS]
+        self.total = stats.Histogram(
+            sum(score_range(event)[0] for event in EVENTS),
+            sum(score_range(event)[1] for event in EVENTS))
+        self.leaders = []  # heap of (total,-athlete,scores)
+
+    def add(self,firstAthlete,scores):
+        '''Standings.add(firstAthlete,scores)
+        merges in the scores of athletes numbered from firstAthlete'''
+        for e in range(len(EVENTS)):
+            self.events[e].add_scores(scores[:,e])
+        totals = scores.sum(axis=1,dtype=np.int64)
+        self.total.add_array(totals)
+        self.numAthletes += len(scores)
+        # only this chunk's best few can be leaders
+        best = np.argsort(-totals,kind='stable')[:NUMLEADERS]
+        for i in best.tolist():
+            entry = (int(totals[i]),-(firstAthlete+i),tuple(scores[i].tolist()))
+            if len(self.leaders) < NUMLEADERS:
+                heapq.heappush(self.leaders,entry)
+            else:
+                heapq.heappushpop(self.leaders,entry)
+
+    def event_stats(self,e):
+        '''Standings.event_stats(e) -> (float,float)
+        returns the mean and std of event EVENTS[e], or of the total
+        if e is None'''
+        if e is None:
+            return self.total.mean_and_std()
+        return self.events[e].histogram.mean_and_std()
+
+    def top(self):
+        '''Standings.top() -> list
+        returns the leaders, best first, as (athlete,total,scores)'''
+        return [(-negAthlete,total,scores) for total,negAthlete,scores
+                in sorted(self.leaders,reverse=True)]
+
+def merge_chunk(standings,result,chunkSize,out=None):
+    '''merge_chunk(standings,result,chunkSize,[out])
+    merges a (chunk,scores) result of play_chunk into standings and
+    streams its rows to out as CSV'''
+    chunk,scores = result
+    firstAthlete = chunk*chunkSize
+    standings.add(firstAthlete,scores)
+    if out is not None:
+        rows = np.column_stack(
+            (np.arange(firstAthlete,firstAthlete+len(scores)),
+             scores,scores.sum(axis=1,dtype=np.int64)))
+        np.savetxt(out,rows,fmt='%d',delimiter=',')
+
+def run(numAthletes,policyNames=('optimal',)*len(EVENTS),seed=0,
+        chunkSize=10000,processes=None,out=None):
+    '''run(numAthletes,[policyNames,seed,chunkSize,processes,out])
+      -> (Standings,float)
+    plays a tournament of numAthletes athletes on a pool of processes
+    (one per core by default) and returns the standings and the
+    throughput in athletes/sec
+      policyNames is a tuple of policy names in the order of EVENTS
+      out is a file to stream every athlete's scores to as CSV'''
+    policyNames = tuple(policyNames)
+    get_policies(policyNames)  # check the names before starting the pool
+    tasks = ((chunk,min(chunkSize,numAthletes-chunk*chunkSize),seed,
+              policyNames)
+             for chunk in range((numAthletes+chunkSize-1)//chunkSize))
+    standings = Standings()
+    if out is not None:
+        out.write('athlete,'+','.join(EVENTS)+',total\n')
+    start = time.perf_counter()
+    if processes is None:
+        processes = os.cpu_count() or 1
+    window = collections.deque()
+    with multiprocessing.Pool(processes,initializer=get_policies,
+                              initargs=(policyNames,)) as pool:
+        # submit a bounded window of chunks so that results can't pile up
+        # in the parent, and merge in chunk order so the CSV rows come out
+        # in athlete order
+        for task in tasks:
+            window.append(pool.apply_async(play_chunk,(task,)))
+            if len(window) < CHUNKSAHEAD*processes:
+                continue
+            merge_chunk(standings,window.popleft().get(),chunkSize,out)
+        while window:
+            merge_chunk(standings,window.popleft().get(),chunkSize,out)
+    elapsed = time.perf_counter() - start
+    return standings,numAthletes/elapsed
+
+def main(args):
+    numbers = [arg for arg in args if '=' not in arg]
+    numAthletes = int(numbers[0]) if len(numbers) > 0 else 100000
+    seed = int(numbers[1]) if len(numbers) > 1 else 0
+    policyNames = dict.fromkeys(EVENTS,'optimal')
+    processes = None
+    outName = None
+    for arg in args:
+        if arg.startswith('--processes='):
+            processes = int(arg.split('=',1)[1])
+        elif arg.startswith('--out='):
+            outName = arg.split('=',1)[1]
+        elif '=' in arg:
+            event,name = arg.split('=',1)
+            if event not in policyNames:
+                raise ValueError('unknown event '+repr(event))
+            policyNames[event] = name
+    policyNames = tuple(policyNames[event] for event in EVENTS)
+    out = open(outName,'w') if outName is not None else None
+    try:
+        standings,athletesPerSec = run(numAthletes,policyNames,seed,
+                                       processes=processes,out=out)
+    finally:
+        if out is not None:
+            out.close()
+    print('{} athletes at {:,.0f} athletes/sec'.format(numAthletes,
+                                                      athletesPerSec))
+    for e,(event,name) in enumerate(zip(EVENTS,policyNames)):
+        mean,std = standings.event_stats(e)
+        exactMean = scoredist.mean_and_std(scoredist.event_distribution(
+            event,get_policy(event,name)))[0]
+        print('{:8s} {:8s} mean {:8.4f} (exact {:8.4f}), std {:.4f}'.format(
+            event,name,mean,exactMean,std))
+    mean,std = standings.event_stats(None)
+    print('{:17s} mean {:8.4f}, std {:.4f}'.format('total',mean,std))
+    print('leaders:')
+    for athlete,total,scores in standings.top():
+        print('  athlete {:9d} total {:4d}  ({})'.format(
+            athlete,total,' '.join('{}:{}'.format(event,score)
+                                   for event,score in zip(EVENTS,scores))))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])